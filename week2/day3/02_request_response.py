@@ -4,12 +4,23 @@ FastAPI GET/POST 요청 처리 및 JSON 응답
 - 쿼리 매개변수 처리
 - POST 요청 본문 처리
 - JSON 응답 반환
+- 인덱스가 있는 인메모리 저장소(user_store.UserStore) 사용
+- 사용자 목록은 id 커서 페이지네이션 (pagination.py)
+- NDJSON / CSV 스트리밍 대량 등록 (bulk_import.py)
 """
 
-from fastapi import FastAPI, Query
+import time
+from itertools import islice
+
+from fastapi import FastAPI, HTTPException, Query, Request
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 from typing import Optional
 
+from bulk_import import fill_missing_emails, iter_batches, validate_batch
+from pagination import CountCache, decode_cursor, encode_cursor
+from user_store import UserStore
+
 app = FastAPI(
     title="요청/응답 처리 API",
     description="GET/POST 요청 처리 및 JSON 응답 예제",
@@ -29,9 +40,15 @@ class UserResponse(BaseModel):
     age: Optional[int] = None
     message: str
 
-# 임시 데이터 저장소
-users_db = []
-user_id_counter = 1
+# 임시 데이터 저장소 (id / 이메일 / 이름 인덱스)
+users_db = UserStore()
+
+# 이름 필터별 전체 개수 캐시
+name_counts = CountCache()
+
+# 대량 등록: 한 번에 검증/저장하는 행 수, 응답에 담는 최대 오류 수
+IMPORT_CHUNK_ROWS = 1000
+IMPORT_MAX_ERRORS = 20
 
 # GET 요청 - 경로 매개변수
 @app.get("/users/{user_id}")
@@ -39,9 +56,9 @@ def get_user(user_id: int):
     """
     특정 사용자 정보 조회 (경로 매개변수 사용)
     """
-    for user in users_db:
-        if user["id"] == user_id:
-            return {"user": user, "found": True}
+    user = users_db.get(user_id)
+    if user is not None:
+        return {"user": user, "found": True}
     
     return {"message": f"사용자 ID {user_id}를 찾을 수 없습니다.", "found": False}
 
@@ -49,26 +66,49 @@ def get_user(user_id: int):
 @app.get("/users")
 def get_users(
     limit: int = Query(10, description="반환할 사용자 수", ge=1, le=100),
-    skip: int = Query(0, description="건너뛸 사용자 수", ge=0),
-    name: Optional[str] = Query(None, description="이름으로 필터링")
+    skip: int = Query(0, description="건너뛸 사용자 수 (깊은 페이지는 cursor 사용)", ge=0),
+    name: Optional[str] = Query(None, description="이름으로 필터링"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    include_total: bool = Query(False, description="이름 필터 결과의 전체 개수 포함 (캐시됨)")
 ):
     """
     사용자 목록 조회 (쿼리 매개변수 사용)
+
+    id 순서로 cursor 다음부터 limit명을 반환한다. 다음 페이지는 next_cursor를 cursor로 보내서 조회.
+    skip은 첫 페이지에서만 쓸 수 있다 (cursor와 함께 주면 페이지마다 skip명씩 빠지므로 400).
     """
-    filtered_users = users_db
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="cursor와 skip은 함께 사용할 수 없습니다.")
+    filters = {"name": name.lower()} if name else {}
+    try:
+        after = decode_cursor(cursor, **filters) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # 이름으로 필터링 (이름 역색인 사용)
+    users = users_db.search_names(name, after) if name else users_db.all(after)
     
-    # 이름으로 필터링
-    if name:
-        filtered_users = [user for user in filtered_users if name.lower() in user["name"].lower()]
+    # limit + 1명을 읽어서 다음 페이지가 있는지 확인
+    paginated_users = list(islice(users, skip, skip + limit + 1))
+    next_cursor = None
+    if len(paginated_users) > limit:
+        paginated_users = paginated_users[:limit]
+        next_cursor = encode_cursor(paginated_users[-1]["id"], **filters)
     
-    # 페이지네이션 적용
-    paginated_users = filtered_users[skip:skip + limit]
+    # 전체 개수: 필터가 없으면 바로, 이름 필터는 요청할 때만 (저장소가 바뀌기 전까지 캐시)
+    total = None
+    if not name:
+        total = len(users_db)
+    elif include_total:
+        total = name_counts.get(name.lower(), users_db.version,
+                                lambda: sum(1 for _ in users_db.search_names(name)))
     
     return {
         "users": paginated_users,
-        "total": len(filtered_users),
+        "total": total,
         "limit": limit,
-        "skip": skip
+        "skip": skip,
+        "next_cursor": next_cursor
     }
 
 # POST 요청 - JSON 본문 처리
@@ -77,19 +117,8 @@ def create_user(user: UserCreate):
     """
     새 사용자 생성 (POST 요청 본문 처리)
     """
-    global user_id_counter
-    
-    # 새 사용자 데이터 생성
-    new_user = {
-        "id": user_id_counter,
-        "name": user.name,
-        "email": user.email,
-        "age": user.age
-    }
-    
-    # 데이터베이스에 추가
-    users_db.append(new_user)
-    user_id_counter += 1
+    # 새 사용자 생성 (저장소가 id를 정하고 인덱스를 갱신)
+    new_user = users_db.create(user.name, user.email, user.age)
     
     # 응답 데이터 생성
     response = UserResponse(
@@ -112,20 +141,8 @@ def search_users(
     """
     사용자 검색 (복합 쿼리 매개변수)
     """
-    results = []
-    
-    for user in users_db:
-        # 이름 또는 이메일에서 검색어 확인
-        if (q.lower() in user["name"].lower() or 
-            q.lower() in user["email"].lower()):
-            
-            # 나이 범위 확인
-            if age_min is not None and user.get("age") and user["age"] < age_min:
-                continue
-            if age_max is not None and user.get("age") and user["age"] > age_max:
-                continue
-                
-            results.append(user)
+    # 이름 또는 이메일에서 검색어 확인 + 나이 범위 확인
+    results = list(users_db.search(q, age_min, age_max))
     
     return {
         "query": q,
@@ -134,26 +151,24 @@ def search_users(
         "count": len(results)
     }
 
+# GET 요청 - 이메일로 조회 (해시 인덱스)
+@app.get("/users/search/email/{email}")
+def get_users_by_email(email: str):
+    """
+    이메일로 사용자 조회 (대소문자 무시)
+    """
+    users = users_db.get_by_email(email)
+    return {"users": users, "found": bool(users)}
+
 # POST 요청 - 복잡한 데이터 처리
 @app.post("/users/batch")
 def create_multiple_users(users: list[UserCreate]):
     """
     여러 사용자 일괄 생성
     """
-    global user_id_counter
-    created_users = []
-    
-    for user_data in users:
-        new_user = {
-            "id": user_id_counter,
-            "name": user_data.name,
-            "email": user_data.email,
-            "age": user_data.age
-        }
-        
-        users_db.append(new_user)
-        created_users.append(new_user)
-        user_id_counter += 1
+    created_users = users_db.create_many(
+        (user_data.name, user_data.email, user_data.age) for user_data in users
+    )
     
     return {
         "message": f"{len(created_users)}명의 사용자가 생성되었습니다.",
@@ -161,6 +176,52 @@ def create_multiple_users(users: list[UserCreate]):
         "total_users": len(users_db)
     }
 
+def _import_chunk(batch, email_domain=None):
+    """청크 하나 검증 후 한 번에 저장 -> (생성된 사용자 목록, 오류 목록)"""
+    if email_domain:
+        batch = fill_missing_emails(batch, email_domain)
+    valid, errors = validate_batch(UserCreate, batch)
+    created = users_db.create_many((user.name, user.email, user.age) for user in valid)
+    return created, errors
+
+async def _import_stream(request, fmt, email_domain=None):
+    """본문을 받는 대로 청크 단위로 저장하고 요약 반환"""
+    started = time.perf_counter()
+    summary = {"format": fmt, "created": 0, "failed": 0, "first_id": None, "last_id": None, "errors": []}
+    async for batch in iter_batches(request.stream(), fmt, IMPORT_CHUNK_ROWS):
+        created, errors = await run_in_threadpool(_import_chunk, batch, email_domain)
+        summary["created"] += len(created)
+        summary["failed"] += len(errors)
+        if created:
+            summary["first_id"] = summary["first_id"] or created[0]["id"]
+            summary["last_id"] = created[-1]["id"]
+        summary["errors"].extend(errors[:IMPORT_MAX_ERRORS - len(summary["errors"])])
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    summary["total_users"] = len(users_db)
+    return summary
+
+# POST 요청 - 스트리밍 대량 등록
+@app.post("/users/import")
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson 또는 csv (없으면 Content-Type으로 판단)"),
+    email_domain: Optional[str] = Query(None, description="이메일이 없는 행에 row{줄 번호}@email_domain 이메일을 채움")
+):
+    """
+    NDJSON(줄마다 사용자 JSON) 또는 CSV(name,email,age 또는 이름,이메일,나이 헤더) 본문으로 대량 등록
+
+    name(이름)과 email(이메일)은 필수, age(나이)는 선택이고 다른 컬럼(필드)은 무시한다.
+    email_domain을 주면 이메일이 없는 행(예: week2/students.csv)도 row{줄 번호}@email_domain으로 등록한다.
+    본문을 받는 대로 IMPORT_CHUNK_ROWS행씩 검증/저장하고, 생성된 사용자 대신 요약을 반환한다.
+    잘못된 행은 건너뛰고 줄 번호와 함께 최대 IMPORT_MAX_ERRORS개까지 보고한다.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {format}")
+    
+    return await _import_stream(request, format, email_domain)
+
 if __name__ == "__main__":
     import uvicorn
     # uvicorn 02_request_response:app --reload
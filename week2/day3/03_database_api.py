@@ -4,14 +4,21 @@ FastAPI 데이터베이스 연동 API
 - 데이터베이스 테이블 생성
 - 데이터 CRUD 연산
 - 데이터베이스 연동 API 엔드포인트
+- 사용자 목록은 id 커서 페이지네이션 (pagination.py)
+- 커넥션 풀을 의존성(Depends)으로 주입해서 요청마다 연결을 새로 열지 않음
+  (WAL 모드, 커넥션별 prepared statement 캐시, RETURNING으로 쓰기 후 재조회 제거)
 """
 
+import queue
 import sqlite3
-from fastapi import FastAPI, HTTPException
+import threading
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
 from typing import Optional, List
 import os
 
+from pagination import CountCache, decode_cursor, encode_cursor
+
 app = FastAPI(
     title="데이터베이스 연동 API",
     description="SQLite 데이터베이스와 연동된 API 서버",
@@ -21,6 +28,21 @@ app = FastAPI(
 # 데이터베이스 파일 경로
 DB_PATH = "users.db"
 
+# 커넥션 풀 크기 (FastAPI 스레드 풀 기본 크기 40)
+POOL_SIZE = 40
+
+# 응답에 돌려줄 사용자 컬럼
+USER_COLUMNS = "id, name, email, age"
+
+# cursor만 주고 limit을 생략했을 때 페이지 크기
+DEFAULT_PAGE_SIZE = 100
+
+# 전체 사용자 수 캐시 (이 프로세스에서 사용자를 추가/삭제하면 users_version이 바뀌어 다시 계산)
+user_counts = CountCache()
+users_version = 0
+# 동기 엔드포인트는 스레드 풀에서 동시에 실행되므로 증가를 잠금으로 보호
+users_version_lock = threading.Lock()
+
 # 데이터 모델 정의
 class UserBase(BaseModel):
     name: str
@@ -41,10 +63,11 @@ class UserResponse(UserBase):
 # 데이터베이스 초기화
 def init_database():
     """
-    데이터베이스 테이블 생성
+    데이터베이스 테이블 생성 (WAL 모드는 DB 파일에 저장되어 이후 연결에도 적용됨)
     """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
     
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
@@ -58,47 +81,133 @@ def init_database():
     conn.commit()
     conn.close()
 
-# 데이터베이스 연결 헬퍼 함수
-def get_db_connection():
+# 데이터베이스 커넥션 풀
+class ConnectionPool:
     """
-    데이터베이스 연결 반환
+    SQLite 커넥션 풀 (요청 하나가 커넥션 하나를 빌려 쓰고 반납)
+
+    FastAPI는 의존성과 엔드포인트를 서로 다른 스레드에서 실행할 수 있으므로
+    스레드별 커넥션 대신 요청 단위로 빌려준다 (한 커넥션을 두 요청이 동시에 쓰지 않음).
+    커넥션을 계속 재사용하므로 sqlite3의 커넥션별 prepared statement 캐시가 유지된다.
     """
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
-    return conn
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row  # 딕셔너리 형태로 결과 반환
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            return self._connect() if can_create else self._idle.get()
+
+    def release(self, conn):
+        # 요청이 트랜잭션을 끝내지 못했으면 되돌리고 반납
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        """놀고 있는 커넥션을 모두 닫음"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+pool = ConnectionPool()
+
+# 데이터베이스 연결 의존성
+def get_db():
+    """
+    요청 동안 풀의 커넥션을 빌려주고 응답 후 반납
+    """
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+def _bump_users_version():
+    global users_version
+    with users_version_lock:
+        users_version += 1
 
 # 애플리케이션 시작 시 데이터베이스 초기화
 @app.on_event("startup")
 def startup_event():
     init_database()
 
-# 모든 사용자 조회
+@app.on_event("shutdown")
+def shutdown_event():
+    pool.close()
+
+# 사용자 목록 조회
 @app.get("/users", response_model=List[UserResponse])
-def get_all_users():
+def get_all_users(
+    response: Response,
+    limit: Optional[int] = Query(None, description="반환할 사용자 수 (cursor를 주면 기본 100)", ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    include_total: bool = Query(False, description="X-Total-Count 헤더로 전체 사용자 수 반환 (캐시됨)"),
+    conn: sqlite3.Connection = Depends(get_db)
+):
     """
-    모든 사용자 목록 조회
+    사용자 목록 조회 (id 순서 커서 페이지네이션)
+
+    limit과 cursor를 모두 생략하면 예전처럼 전체 사용자를 반환한다.
+    limit을 주면 다음 페이지가 있을 때 X-Next-Cursor 헤더를 보낸다. 그 값을 cursor로 보내면 다음 limit명을 반환.
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users")
-    users = cursor.fetchall()
-    conn.close()
+    try:
+        after = decode_cursor(cursor) if cursor else 0
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if limit is None and cursor:
+        limit = DEFAULT_PAGE_SIZE
+    
+    if limit is None:
+        users = conn.execute(f"SELECT {USER_COLUMNS} FROM users ORDER BY id").fetchall()
+    else:
+        # 기본 키 범위 조회라 깊은 페이지도 앞쪽 행을 건너뛰지 않음 (limit + 1행으로 다음 페이지 확인)
+        users = conn.execute(
+            f"SELECT {USER_COLUMNS} FROM users WHERE id > ? ORDER BY id LIMIT ?",
+            (after, limit + 1)
+        ).fetchall()
+    if include_total:
+        total = user_counts.get("users", users_version,
+                                lambda: conn.execute("SELECT COUNT(*) FROM users").fetchone()[0])
+        response.headers["X-Total-Count"] = str(total)
+    
+    if limit is not None and len(users) > limit:
+        users = users[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(users[-1]["id"])
     
     return [dict(user) for user in users]
 
 # 특정 사용자 조회
 @app.get("/users/{user_id}", response_model=UserResponse)
-def get_user(user_id: int):
+def get_user(user_id: int, conn: sqlite3.Connection = Depends(get_db)):
     """
     특정 사용자 정보 조회
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
-    conn.close()
+    user = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE id = ?", (user_id,)).fetchone()
     
     if user is None:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
@@ -107,49 +216,28 @@ def get_user(user_id: int):
 
 # 사용자 생성
 @app.post("/users", response_model=UserResponse)
-def create_user(user: UserCreate):
+def create_user(user: UserCreate, conn: sqlite3.Connection = Depends(get_db)):
     """
-    새 사용자 생성
+    새 사용자 생성 (RETURNING으로 생성된 행을 바로 받음)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
-            (user.name, user.email, user.age)
-        )
-        user_id = cursor.lastrowid
-        conn.commit()
-        
-        # 생성된 사용자 정보 조회
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        created_user = cursor.fetchone()
-        conn.close()
-        
-        return dict(created_user)
-    
+        with conn:
+            created_user = conn.execute(
+                f"INSERT INTO users (name, email, age) VALUES (?, ?, ?) RETURNING {USER_COLUMNS}",
+                (user.name, user.email, user.age)
+            ).fetchone()
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다.")
+    _bump_users_version()
+    
+    return dict(created_user)
 
 # 사용자 정보 수정
 @app.put("/users/{user_id}", response_model=UserResponse)
-def update_user(user_id: int, user_update: UserUpdate):
+def update_user(user_id: int, user_update: UserUpdate, conn: sqlite3.Connection = Depends(get_db)):
     """
-    사용자 정보 수정
+    사용자 정보 수정 (RETURNING으로 수정된 행을 바로 받고, 없으면 404)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 사용자 존재 확인
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    existing_user = cursor.fetchone()
-    
-    if existing_user is None:
-        conn.close()
-        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
-    
     # 업데이트할 필드 준비
     update_fields = []
     update_values = []
@@ -167,64 +255,48 @@ def update_user(user_id: int, user_update: UserUpdate):
         update_values.append(user_update.age)
     
     if not update_fields:
-        conn.close()
+        # 없는 사용자면 404가 우선
+        if conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone() is None:
+            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
         raise HTTPException(status_code=400, detail="수정할 데이터가 없습니다.")
     
     # 업데이트 실행
     update_values.append(user_id)
-    update_query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
+    update_query = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ? RETURNING {USER_COLUMNS}"
     
     try:
-        cursor.execute(update_query, update_values)
-        conn.commit()
-        
-        # 수정된 사용자 정보 조회
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        updated_user = cursor.fetchone()
-        conn.close()
-        
-        return dict(updated_user)
-    
+        with conn:
+            updated_user = conn.execute(update_query, update_values).fetchone()
     except sqlite3.IntegrityError:
-        conn.close()
         raise HTTPException(status_code=400, detail="이미 존재하는 이메일입니다.")
+    
+    if updated_user is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
+    
+    return dict(updated_user)
 
 # 사용자 삭제
 @app.delete("/users/{user_id}")
-def delete_user(user_id: int):
+def delete_user(user_id: int, conn: sqlite3.Connection = Depends(get_db)):
     """
     사용자 삭제
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with conn:
+        deleted = conn.execute("DELETE FROM users WHERE id = ? RETURNING id", (user_id,)).fetchone()
     
-    # 사용자 존재 확인
-    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-    user = cursor.fetchone()
-    
-    if user is None:
-        conn.close()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다.")
-    
-    # 사용자 삭제
-    cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
-    conn.commit()
-    conn.close()
+    _bump_users_version()
     
     return {"message": f"사용자 ID {user_id}가 삭제되었습니다."}
 
 # 이메일로 사용자 검색
 @app.get("/users/search/email/{email}", response_model=UserResponse)
-def get_user_by_email(email: str):
+def get_user_by_email(email: str, conn: sqlite3.Connection = Depends(get_db)):
     """
     이메일로 사용자 검색
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("SELECT * FROM users WHERE email = ?", (email,))
-    user = cursor.fetchone()
-    conn.close()
+    user = conn.execute(f"SELECT {USER_COLUMNS} FROM users WHERE email = ?", (email,)).fetchone()
     
     if user is None:
         raise HTTPException(status_code=404, detail="해당 이메일의 사용자를 찾을 수 없습니다.")
@@ -233,51 +305,33 @@ def get_user_by_email(email: str):
 
 # 나이 범위로 사용자 검색
 @app.get("/users/search/age", response_model=List[UserResponse])
-def get_users_by_age_range(min_age: int = 0, max_age: int = 150):
+def get_users_by_age_range(min_age: int = 0, max_age: int = 150, conn: sqlite3.Connection = Depends(get_db)):
     """
     나이 범위로 사용자 검색
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute(
-        "SELECT * FROM users WHERE age BETWEEN ? AND ?",
+    users = conn.execute(
+        f"SELECT {USER_COLUMNS} FROM users WHERE age BETWEEN ? AND ?",
         (min_age, max_age)
-    )
-    users = cursor.fetchall()
-    conn.close()
+    ).fetchall()
     
     return [dict(user) for user in users]
 
 # 데이터베이스 통계
 @app.get("/stats")
-def get_database_stats():
+def get_database_stats(conn: sqlite3.Connection = Depends(get_db)):
     """
-    데이터베이스 통계 정보
+    데이터베이스 통계 정보 (테이블을 한 번만 읽음)
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 총 사용자 수
-    cursor.execute("SELECT COUNT(*) as total FROM users")
-    total_users = cursor.fetchone()["total"]
-    
-    # 평균 나이
-    cursor.execute("SELECT AVG(age) as avg_age FROM users WHERE age IS NOT NULL")
-    avg_age_result = cursor.fetchone()["avg_age"]
-    avg_age = round(avg_age_result, 2) if avg_age_result else None
-    
-    # 최고/최저 나이
-    cursor.execute("SELECT MIN(age) as min_age, MAX(age) as max_age FROM users WHERE age IS NOT NULL")
-    age_range = cursor.fetchone()
-    
-    conn.close()
+    stats = conn.execute(
+        "SELECT COUNT(*) AS total, AVG(age) AS avg_age, MIN(age) AS min_age, MAX(age) AS max_age FROM users"
+    ).fetchone()
+    avg_age = round(stats["avg_age"], 2) if stats["avg_age"] else None
     
     return {
-        "total_users": total_users,
+        "total_users": stats["total"],
         "average_age": avg_age,
-        "min_age": age_range["min_age"],
-        "max_age": age_range["max_age"]
+        "min_age": stats["min_age"],
+        "max_age": stats["max_age"]
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+"""
+대량 사용자 등록용 스트리밍 파서
+- 요청 본문(bytes 청크의 async iterable)을 받는 대로 줄 단위로 나눠 NDJSON / CSV 레코드로 변환
+- chunk_rows개씩 묶어서 돌려주므로 본문 전체를 메모리에 올리지 않음
+- CSV는 첫 줄이 헤더 (영문 name,email,age 또는 한글 이름,이메일,나이, BOM 허용)
+  - 필수: name(이름), email(이메일) / 선택: age(나이) / 그 밖의 컬럼(예: 도시, 점수)은 무시
+  - 이메일 컬럼이 없는 파일(week2/students.csv)은 email_domain을 주면
+    fill_missing_emails로 "row{줄 번호}@{email_domain}" 이메일을 채워서 등록
+- 검증 실패는 줄 번호와 함께 모으고 나머지 행은 계속 처리
+"""
+
+import codecs
+import csv
+import json
+
+from pydantic import ValidationError
+
+# CSV 한글 헤더 -> 필드 이름
+CSV_HEADER_ALIASES = {"이름": "name", "이메일": "email", "나이": "age"}
+
+
+async def iter_lines(chunks):
+    """bytes 청크 -> (줄 번호, 줄) (UTF-8, 맨 앞 BOM 제거)"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    line_no = 0
+    started = False
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if not started and buffer:
+            buffer = buffer[1:] if buffer[0] == "\ufeff" else buffer
+            started = True
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_no + 1, buffer.rstrip("\r")
+
+
+async def iter_records(chunks, fmt):
+    """(줄 번호, dict 또는 파싱 오류 메시지)"""
+    header = None
+    pending, pending_no = "", 0
+    async for line_no, line in iter_lines(chunks):
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except ValueError as e:
+                yield line_no, f"JSON 파싱 오류: {e}"
+            continue
+        # CSV: 따옴표 안의 줄바꿈은 다음 줄과 이어서 한 레코드로
+        if pending:
+            pending += "\n" + line
+        else:
+            pending, pending_no = line, line_no
+        if pending.count('"') % 2:
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [CSV_HEADER_ALIASES.get(name.strip(), name.strip().lower()) for name in values]
+            continue
+        if len(values) != len(header):
+            yield pending_no, f"컬럼 수가 헤더와 다릅니다 ({len(values)} != {len(header)})"
+            continue
+        # 빈 칸은 값 없음으로
+        yield pending_no, {name: (value if value != "" else None) for name, value in zip(header, values)}
+    if pending:
+        yield pending_no, "닫히지 않은 따옴표"
+
+
+async def iter_batches(chunks, fmt, chunk_rows=1000):
+    """records를 chunk_rows개씩 묶은 리스트"""
+    batch = []
+    async for record in iter_records(chunks, fmt):
+        batch.append(record)
+        if len(batch) >= chunk_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fill_missing_emails(batch, email_domain):
+    """이메일이 없는 레코드에 row{줄 번호}@{email_domain} 이메일을 채운 batch"""
+    return [(line_no, {**record, "email": f"row{line_no}@{email_domain}"})
+            if isinstance(record, dict) and not record.get("email") else (line_no, record)
+            for line_no, record in batch]
+
+
+def _error_message(error)->str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+def validate_batch(model, batch):
+    """(줄 번호, 레코드) 목록 검증 -> (모델 객체 목록, [{"line", "error"}])"""
+    valid, errors = [], []
+    for line_no, record in batch:
+        if isinstance(record, str):
+            errors.append({"line": line_no, "error": record})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"line": line_no, "error": "JSON 객체가 아닙니다."})
+            continue
+        try:
+            valid.append(model(**record))
+        except ValidationError as e:
+            errors.append({"line": line_no, "error": _error_message(e)})
+    return valid, errors
@@ -0,0 +1,178 @@
+"""
+03_database_api 부하 테스트
+- users 테이블에 n명(기본 100만)을 채운 users.db 생성 (이미 있으면 부족한 만큼만 추가)
+- clients개 동시 클라이언트가 seconds초 동안 조회/이메일 검색/생성/수정을 섞어서 요청
+- 초당 요청 수와 엔드포인트별 p50 / p95 / p99 지연 시간 출력
+- --compare: HTTP 없이 DB 처리만 비교 (요청마다 연결 + 쓰기 후 재조회 vs 커넥션 재사용 + RETURNING)
+  (클라이언트와 서버가 CPU 하나를 나눠 쓰면 HTTP 처리량은 DB보다 프레임워크 비용에 좌우됨)
+
+실행:
+    python db_load_test.py --setup                # users.db 준비
+    uvicorn 03_database_api:app --port 8000
+    python db_load_test.py --clients 32 --seconds 20
+    python db_load_test.py --compare
+"""
+
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+# (비율, 이름) - 나머지는 id 조회
+WORKLOAD = ((0.2, "email"), (0.1, "create"), (0.1, "update"))
+
+
+def build_users_db(db_path="users.db", n=1_000_000, batch=100_000):
+    """users 테이블을 n명까지 채움 (이메일은 user{i}@example.com)"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            age INTEGER
+        )
+    """)
+    start = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    for first in range(start, n, batch):
+        rows = ((f"user{i}", f"user{i}@example.com", 15 + i % 60) for i in range(first, min(first + batch, n)))
+        with conn:
+            conn.executemany("INSERT INTO users (name, email, age) VALUES (?, ?, ?)", rows)
+    count = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    conn.close()
+    print(f"{db_path}: 사용자 {count:,}명")
+    return count
+
+
+def compare_connection_cost(db_path="users.db", n_users=1_000_000, reads=3000, writes=500):
+    """조회 / 생성 1건당 DB 처리 시간(us): 요청마다 연결 vs 커넥션 재사용"""
+    rng = random.Random(0)
+
+    def connect():
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_per_request():
+        conn = connect()
+        dict(conn.execute("SELECT * FROM users WHERE id = ?", (rng.randint(1, n_users),)).fetchone())
+        conn.close()
+
+    def create_per_request():
+        conn = connect()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+                       ("load", f"load-{uuid.uuid4().hex}@example.com", 30))
+        conn.commit()
+        cursor.execute("SELECT * FROM users WHERE id = ?", (cursor.lastrowid,))
+        dict(cursor.fetchone())
+        conn.close()
+
+    pooled = sqlite3.connect(db_path, cached_statements=256)
+    pooled.row_factory = sqlite3.Row
+    pooled.execute("PRAGMA journal_mode = WAL")
+    pooled.execute("PRAGMA synchronous = NORMAL")
+
+    def get_pooled():
+        dict(pooled.execute("SELECT id, name, email, age FROM users WHERE id = ?",
+                            (rng.randint(1, n_users),)).fetchone())
+
+    def create_pooled():
+        with pooled:
+            dict(pooled.execute("INSERT INTO users (name, email, age) VALUES (?, ?, ?) RETURNING id, name, email, age",
+                                ("load", f"load-{uuid.uuid4().hex}@example.com", 30)).fetchone())
+
+    print(f"{'':<8}{'요청마다 연결 (us)':>20}{'재사용+RETURNING (us)':>24}")
+    for label, before, after, n in (("조회", get_per_request, get_pooled, reads),
+                                    ("생성", create_per_request, create_pooled, writes)):
+        timings = []
+        for func in (before, after):
+            started = time.perf_counter()
+            for _ in range(n):
+                func()
+            timings.append((time.perf_counter() - started) / n * 1e6)
+        print(f"{label:<8}{timings[0]:20.1f}{timings[1]:24.1f}   {timings[0] / timings[1]:.1f}x")
+    pooled.close()
+
+
+def _pick(rng):
+    r = rng.random()
+    for ratio, name in WORKLOAD:
+        if r < ratio:
+            return name
+        r -= ratio
+    return "get"
+
+
+async def _client(client, n_users, deadline, results, seed):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        kind = _pick(rng)
+        user_id = rng.randint(1, n_users)
+        started = time.perf_counter()
+        try:
+            if kind == "get":
+                response = await client.get(f"/users/{user_id}")
+            elif kind == "email":
+                response = await client.get(f"/users/search/email/user{user_id - 1}@example.com")
+            elif kind == "create":
+                email = f"load-{uuid.uuid4().hex}@example.com"
+                response = await client.post("/users", json={"name": "load", "email": email, "age": 30})
+            else:
+                response = await client.put(f"/users/{user_id}", json={"age": rng.randint(15, 80)})
+            status = response.status_code
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        results.append((kind, status, time.perf_counter() - started))
+
+
+async def run_load_test(url, n_users, clients=32, seconds=20.0):
+    results = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        deadline = time.perf_counter() + seconds
+        started = time.perf_counter()
+        await asyncio.gather(*(_client(client, n_users, deadline, results, seed) for seed in range(clients)))
+        elapsed = time.perf_counter() - started
+    report(results, elapsed, clients)
+    return results
+
+
+def report(results, elapsed, clients):
+    print(f"=== {clients}개 동시 클라이언트, {len(results):,}개 요청, {elapsed:.1f}초 "
+          f"({len(results) / elapsed:,.0f} req/s) ===")
+    groups = {}
+    for kind, status, seconds in results:
+        groups.setdefault(kind, []).append((status, seconds))
+    groups["전체"] = [(status, seconds) for _, status, seconds in results]
+    for kind, items in groups.items():
+        latency = np.array([seconds for _, seconds in items]) * 1000
+        statuses = {}
+        for status, _ in items:
+            statuses[status] = statuses.get(status, 0) + 1
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        print(f"{kind:<8} n={len(items):<7} p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms  상태 {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="03_database_api 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--db", default="users.db")
+    parser.add_argument("--users", type=int, default=1_000_000, help="users 테이블 행 수")
+    parser.add_argument("--setup", action="store_true", help="users.db만 준비하고 종료")
+    parser.add_argument("--compare", action="store_true", help="HTTP 없이 연결 방식별 DB 처리 시간 비교")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+    if args.setup:
+        build_users_db(args.db, args.users)
+    elif args.compare:
+        compare_connection_cost(args.db, args.users)
+    else:
+        asyncio.run(run_load_test(args.url, args.users, args.clients, args.seconds))
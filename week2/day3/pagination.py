@@ -0,0 +1,55 @@
+"""
+커서(keyset) 페이지네이션 공통 함수 (02_request_response.py, 03_database_api.py)
+- 다음 페이지 토큰은 마지막 id와 필터 조건을 담은 base64url 문자열
+  (클라이언트는 내용을 해석하지 않고 그대로 다시 보냄)
+- 페이지는 id > 마지막 id 조건으로 읽으므로 깊은 페이지도 앞쪽 행을 건너뛰지 않음
+- 전체 개수는 요청할 때만 계산하고, 저장소 버전이 같으면 캐시한 값을 사용
+"""
+
+import base64
+import binascii
+import json
+import threading
+from collections import OrderedDict
+
+
+def encode_cursor(last_id, **filters)->str:
+    """마지막 id + 필터 조건 -> 불투명한 커서 문자열"""
+    raw = json.dumps({"after": last_id, **filters}, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor, **filters)->int:
+    """커서 -> 마지막 id. 형식이 잘못되었거나 필터 조건이 다르면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        after = data.pop("after")
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("잘못된 커서입니다.")
+    if not isinstance(after, int) or data != filters:
+        raise ValueError("커서의 조회 조건이 요청과 다릅니다.")
+    return after
+
+
+class CountCache:
+    """필터 조건별 전체 개수 캐시 (저장소 버전이 바뀌면 다시 계산, 최근 max_entries개 유지)"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version, compute)->int:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+        count = compute()
+        with self._lock:
+            self._entries[key] = (version, count)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return count
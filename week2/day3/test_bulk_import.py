@@ -0,0 +1,58 @@
+"""
+POST /users/import 테스트 (02_request_response.py + bulk_import.py)
+
+실행: python -m pytest week2/day3/test_bulk_import.py
+"""
+
+import importlib
+import sys
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+DAY3 = Path(__file__).resolve().parent
+STUDENTS_CSV = DAY3.parent / "students.csv"
+
+sys.path.insert(0, str(DAY3))
+api = importlib.import_module("02_request_response")
+client = TestClient(api.app)
+
+
+def _import(body, **params):
+    return client.post("/users/import", params=params, content=body,
+                       headers={"content-type": "text/csv"}).json()
+
+
+def test_students_csv_with_email_domain():
+    """이메일 컬럼이 없는 students.csv: email_domain으로 이메일을 채우고 도시/점수는 무시"""
+    before = len(api.users_db)
+    summary = _import(STUDENTS_CSV.read_bytes(), email_domain="students.example.com")
+
+    assert summary["format"] == "csv"
+    assert summary["created"] == 5
+    assert summary["failed"] == 0
+    users = [api.users_db.get(user_id) for user_id in range(summary["first_id"], summary["last_id"] + 1)]
+    assert len(api.users_db) == before + 5
+    assert users[0] == {"id": summary["first_id"], "name": "김철수", "email": "row2@students.example.com", "age": 25}
+    assert [user["email"] for user in users] == [f"row{line}@students.example.com" for line in range(2, 7)]
+
+
+def test_students_csv_without_email_domain():
+    """email_domain이 없으면 이메일이 없는 행은 줄 번호와 함께 실패로 보고"""
+    summary = _import(STUDENTS_CSV.read_bytes())
+
+    assert summary["created"] == 0
+    assert summary["failed"] == 5
+    assert [error["line"] for error in summary["errors"]] == [2, 3, 4, 5, 6]
+    assert all("email" in error["error"] for error in summary["errors"])
+
+
+def test_email_column_is_kept():
+    """이메일이 있는 행은 email_domain을 줘도 그대로 등록"""
+    body = "이름,이메일,나이\n홍길동,hong@example.com,40\n임꺽정,,\n".encode()
+    summary = _import(body, email_domain="example.org")
+
+    assert summary["created"] == 2
+    first, second = api.users_db.get(summary["first_id"]), api.users_db.get(summary["last_id"])
+    assert (first["email"], first["age"]) == ("hong@example.com", 40)
+    assert (second["email"], second["age"]) == ("row3@example.org", None)
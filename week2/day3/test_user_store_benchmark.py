@@ -0,0 +1,104 @@
+"""
+UserStore vs 리스트 순차 탐색 벤치마크 (pytest-benchmark)
+- n명의 가짜 사용자로 id 조회 / 이메일 조회 / 이름 검색 / 이름·이메일 검색 시간 비교
+- 리스트 방식은 기존 02_request_response.py의 구현(매 요청마다 전체 순회 + lower())과 같음
+- 측정마다 두 구현의 결과가 같은지 확인
+
+실행:
+    python -m pytest week2/day3/test_user_store_benchmark.py
+    USER_STORE_BENCH_USERS=1000000 python -m pytest week2/day3/test_user_store_benchmark.py
+"""
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from user_store import UserStore
+
+# 사용자 수 (기본은 CI에서 빨리 끝나는 크기)
+N_USERS = int(os.environ.get("USER_STORE_BENCH_USERS", 100_000))
+# 측정 1회에 조회하는 횟수
+LOOKUPS = 5
+
+FAMILY = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = "민서준우지현수영하은도윤예진성호태희"
+LATIN = ["kim", "lee", "park", "choi", "jung", "kang", "cho", "yoon", "jang", "lim"]
+
+
+def make_users(n, seed=0)->list:
+    rng = random.Random(seed)
+    users = []
+    for i in range(n):
+        name = rng.choice(FAMILY) + rng.choice(GIVEN) + rng.choice(GIVEN)
+        email = f"{rng.choice(LATIN)}{i}@example.com"
+        users.append((name, email, rng.randint(15, 80)))
+    return users
+
+
+# 기존 리스트 구현
+def list_get(users_db, user_id):
+    for user in users_db:
+        if user["id"] == user_id:
+            return user
+    return None
+
+def list_get_by_email(users_db, email):
+    return [user for user in users_db if user["email"].lower() == email.lower()]
+
+def list_search_names(users_db, name):
+    return [user for user in users_db if name.lower() in user["name"].lower()]
+
+def list_search(users_db, q):
+    return [user for user in users_db if q.lower() in user["name"].lower() or q.lower() in user["email"].lower()]
+
+
+# 측정 항목(id / 이메일 조회, 이름 / 이름·이메일 검색) -> (리스트 구현, UserStore 구현)
+CASES = {
+    "id": (list_get, lambda store, user_id: store.get(user_id)),
+    "email": (list_get_by_email, lambda store, email: store.get_by_email(email)),
+    "name": (list_search_names, lambda store, q: list(store.search_names(q))),
+    "name_or_email": (list_search, lambda store, q: list(store.search(q))),
+}
+
+
+@pytest.fixture(scope="module")
+def data():
+    raw = make_users(N_USERS)
+    users_db = [{"id": i + 1, "name": name, "email": email, "age": age} for i, (name, email, age) in enumerate(raw)]
+    store = UserStore()
+    store.create_many(raw)
+
+    rng = random.Random(1)
+    args = {
+        "id": [rng.randint(1, N_USERS) for _ in range(LOOKUPS)],
+        "email": [raw[rng.randrange(N_USERS)][1].upper() for _ in range(LOOKUPS)],
+        "name": [raw[rng.randrange(N_USERS)][0] for _ in range(LOOKUPS)],
+        "name_or_email": ["lee12345", raw[rng.randrange(N_USERS)][0][1:]],
+    }
+    return users_db, store, args
+
+
+def _as_list(result)->list:
+    return result if isinstance(result, list) else [result]
+
+
+@pytest.mark.parametrize("impl", ["list", "UserStore"])
+@pytest.mark.parametrize("case", list(CASES))
+def test_lookup(benchmark, data, case, impl):
+    users_db, store, args = data
+    list_func, store_func = CASES[case]
+    if impl == "list":
+        run = lambda: [_as_list(list_func(users_db, a)) for a in args[case]]
+    else:
+        run = lambda: [_as_list(store_func(store, a)) for a in args[case]]
+    benchmark.group = case
+    # 리스트 순회는 한 번에 수십 ms라 반복 횟수를 줄임
+    results = benchmark.pedantic(run, rounds=3 if impl == "list" else 20, iterations=1)
+
+    # 두 구현의 결과가 같은지 확인
+    assert results == [_as_list(list_func(users_db, a)) for a in args[case]]
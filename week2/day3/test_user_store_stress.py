@@ -0,0 +1,141 @@
+"""
+UserStore 동시성 스트레스 테스트
+- 쓰기 스레드 여러 개가 create / create_many를 동시에 호출
+- 그동안 읽기 스레드들이 get / search_names / 커서 페이지 조회를 반복
+- 확인: id가 중복·누락 없이 1..N, 읽기가 본 스냅샷이 항상 일관됨(공개된 id까지 빈틈 없음),
+  쓰기 중 읽기 처리량이 쓰기 없을 때의 min_ratio 이상
+- --api를 주면 02_request_response.py의 POST /users, /users/batch도 동시에 호출해서 id 중복 확인
+- pytest로 실행하면 CI에서 빨리 끝나는 크기로 같은 검사를 함 (test_ 함수)
+
+실행:
+    python -m pytest week2/day3/test_user_store_stress.py
+    python test_user_store_stress.py [--api]   (전체 크기)
+"""
+
+import importlib
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from user_store import UserStore
+
+
+def _reader(store, stop, counts, errors):
+    ops = 0
+    while not stop.is_set():
+        upto = len(store)
+        if upto:
+            # 공개된 마지막 사용자는 바로 보이고, 그 다음 페이지는 비어 있지 않아야 함
+            if store.get(upto) is None:
+                errors.append(f"공개된 id {upto}를 찾지 못함")
+            page = [user["id"] for user in islice(store.all(after=max(0, upto - 50)), 50)]
+            if page[:1] and page != list(range(page[0], page[0] + len(page))):
+                errors.append(f"페이지에 빈 id가 있음: {page[:5]}...")
+            list(islice(store.search_names("user1"), 20))
+        ops += 1
+    counts.append(ops)
+
+
+def _read_throughput(store, readers, seconds, stop_writers=None)->float:
+    """readers개 읽기 스레드의 초당 읽기 횟수 (stop_writers가 있으면 끝날 때 set)"""
+    stop, counts, errors = threading.Event(), [], []
+    threads = [threading.Thread(target=_reader, args=(store, stop, counts, errors)) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    if stop_writers is not None:
+        stop_writers.set()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise AssertionError(errors[:5])
+    return sum(counts) / seconds
+
+
+def stress_store(writers=8, creates_per_writer=5_000, batch=50, readers=4, seconds=3.0, min_ratio=0.3):
+    store = UserStore()
+    store.create_many((f"seed{i}", f"seed{i}@example.com", 20) for i in range(10_000))
+    baseline = _read_throughput(store, readers, seconds)
+
+    created_ids = []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def write(worker):
+        ids = []
+        for i in range(creates_per_writer):
+            if stop.is_set():
+                break
+            if i % batch == 0:
+                users = store.create_many((f"user{worker}-{i}-{j}", f"u{worker}.{i}.{j}@example.com", 30)
+                                          for j in range(batch))
+                ids.extend(user["id"] for user in users)
+            else:
+                ids.append(store.create(f"user{worker}-{i}", f"u{worker}.{i}@example.com", 30)["id"])
+        with lock:
+            created_ids.extend(ids)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=writers) as executor:
+        futures = [executor.submit(write, worker) for worker in range(writers)]
+        loaded = _read_throughput(store, readers, seconds, stop_writers=stop)
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    all_ids = [user["id"] for user in store.all()]
+    assert len(created_ids) == len(set(created_ids)), "중복 id 발생"
+    assert all_ids == list(range(1, len(store) + 1)), "id에 빈틈 또는 순서 오류"
+    assert set(created_ids) == set(range(10_001, len(store) + 1)), "할당한 id와 저장된 id가 다름"
+    ratio = loaded / baseline
+    print(f"=== 저장소: 쓰기 스레드 {writers}개, 생성 {len(created_ids):,}명 ({elapsed:.1f}초) ===")
+    print(f"읽기 처리량: 쓰기 없음 {baseline:,.0f}회/초, 쓰기 중 {loaded:,.0f}회/초 ({ratio:.0%})")
+    assert ratio >= min_ratio, f"쓰기 중 읽기 처리량이 {ratio:.0%}로 떨어짐"
+    print("통과")
+
+
+def stress_api(threads=16, requests_per_thread=100, batch=20):
+    """02_request_response 앱에 동시 POST -> id 중복 없음 확인"""
+    from fastapi.testclient import TestClient
+
+    api = importlib.import_module("02_request_response")
+    client = TestClient(api.app)
+    before = len(api.users_db)
+
+    def post(worker):
+        ids = []
+        for i in range(requests_per_thread):
+            if i % 10 == 0:
+                body = [{"name": f"b{worker}-{i}-{j}", "email": f"b{worker}.{i}.{j}@example.com"} for j in range(batch)]
+                ids.extend(user["id"] for user in client.post("/users/batch", json=body).json()["created_users"])
+            else:
+                body = {"name": f"a{worker}-{i}", "email": f"a{worker}.{i}@example.com"}
+                ids.append(client.post("/users", json=body).json()["id"])
+        return ids
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        ids = [user_id for result in executor.map(post, range(threads)) for user_id in result]
+    elapsed = time.perf_counter() - started
+    assert len(ids) == len(set(ids)) == len(api.users_db) - before, "API에서 중복 id 발생"
+    print(f"=== API: 스레드 {threads}개, 생성 {len(ids):,}명 ({elapsed:.1f}초) - id 중복 없음 ===")
+
+
+def test_store_concurrent_writes():
+    stress_store(writers=4, creates_per_writer=1_000, batch=50, readers=2, seconds=0.5)
+
+
+def test_api_concurrent_creates():
+    stress_api(threads=8, requests_per_thread=20, batch=10)
+
+
+if __name__ == "__main__":
+    stress_store()
+    if "--api" in sys.argv:
+        stress_api()
@@ -0,0 +1,158 @@
+"""
+인메모리 사용자 저장소 (인덱스 포함)
+- id -> 사용자 dict 인덱스로 O(1) 조회
+- 소문자 이메일 -> id 목록 해시 인덱스
+- 소문자 이름과 이메일 아이디(@ 앞)의 2글자 조각(bigram) -> id 배열 역색인으로 부분 문자열 검색
+  (검색어의 bigram 중 후보가 가장 적은 목록만 확인하므로 전체를 훑지 않음)
+- 이메일 도메인은 대부분 같으므로 bigram 대신 도메인 -> id 배열로 따로 관리
+- 소문자 변환은 생성할 때 한 번만 함
+
+id는 1부터 증가하므로 역색인의 id 배열은 항상 오름차순이다.
+그래서 after(커서) 이후 결과는 이분 탐색으로 시작 위치를 찾아 이어서 읽는다.
+
+동시성 (FastAPI는 동기 엔드포인트를 스레드 풀에서 실행)
+- 쓰기(id 할당 + 인덱스 갱신)는 쓰기 잠금 하나로 직렬화
+- 모든 인덱스는 추가만 하므로, 쓰기가 끝난 뒤 마지막 id(_committed)를 공개하고
+  읽기는 시작할 때 읽은 _committed 이하의 id만 봄 (잠금 없이 일관된 스냅샷)
+- 읽기 중에 순회하는 도메인 dict는 새 도메인이 생기면 복사본을 만들어 바꿔 끼움 (copy-on-write)
+"""
+
+import heapq
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Iterator, Optional
+
+
+def _bigrams(text)->set:
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _after(ids, after, upto)->Iterator[int]:
+    """오름차순 id 배열에서 after < id <= upto인 id"""
+    for i in range(bisect_right(ids, after), bisect_right(ids, upto)):
+        yield ids[i]
+
+
+class UserStore:
+    """사용자 저장소 (생성할 때 모든 인덱스를 함께 갱신, 여러 스레드에서 사용 가능)"""
+
+    def __init__(self):
+        self._users = {}
+        self._ids = array("q")
+        self._lower = {}
+        self._by_email = {}
+        self._name_grams = {}
+        self._email_grams = {}
+        self._domains = {}
+        self._next_id = 1
+        # 읽기에 공개된 마지막 id (쓰기가 모두 끝난 뒤에 갱신)
+        self._committed = 0
+        self._write_lock = threading.Lock()
+
+    def __len__(self):
+        # id는 빈틈없이 1부터 할당되므로 공개된 사용자 수와 같음
+        return self._committed
+
+    @property
+    def version(self)->int:
+        """사용자를 추가할 때마다 바뀌는 값 (개수 캐시 무효화용)"""
+        return self._committed
+
+    def create(self, name, email, age=None)->dict:
+        """새 사용자 추가 -> 사용자 dict"""
+        return self.create_many([(name, email, age)])[0]
+
+    def create_many(self, users)->list:
+        """(name, email, age) 또는 dict 목록을 추가 (목록 전체가 한 번에 공개됨)"""
+        rows = [(u["name"], u["email"], u.get("age")) if isinstance(u, dict) else tuple(u) for u in users]
+        created = []
+        with self._write_lock:
+            for name, email, age in rows:
+                user = {"id": self._next_id, "name": name, "email": email, "age": age}
+                self._next_id += 1
+                self._index(user)
+                created.append(user)
+            self._committed = self._next_id - 1
+        return created
+
+    def _index(self, user):
+        user_id = user["id"]
+        name, email = user["name"].lower(), user["email"].lower()
+        self._users[user_id] = user
+        self._ids.append(user_id)
+        self._lower[user_id] = (name, email)
+        self._by_email.setdefault(email, []).append(user_id)
+        local, _, domain = email.rpartition("@")
+        if domain not in self._domains:
+            self._domains = {**self._domains, domain: array("q")}
+        self._domains[domain].append(user_id)
+        for grams, text in ((self._name_grams, name), (self._email_grams, local)):
+            for gram in _bigrams(text):
+                postings = grams.get(gram)
+                if postings is None:
+                    grams[gram] = postings = array("q")
+                postings.append(user_id)
+
+    def get(self, user_id)->Optional[dict]:
+        return self._users.get(user_id) if user_id <= self._committed else None
+
+    def get_by_email(self, email)->list:
+        """이메일이 같은(대소문자 무시) 사용자 목록"""
+        upto = self._committed
+        return [self._users[i] for i in list(self._by_email.get(email.lower(), ())) if i <= upto]
+
+    def all(self, after=0)->Iterator[dict]:
+        """id 순서로 after 이후 전체 사용자"""
+        return (self._users[user_id] for user_id in _after(self._ids, after, self._committed))
+
+    def _candidates(self, grams, q)->array:
+        """q를 포함할 수 있는 id 배열 (오름차순). 한 글자 검색어는 전체 id"""
+        if len(q) < 2:
+            return self._ids
+        postings = [grams.get(gram) for gram in _bigrams(q)]
+        if any(p is None for p in postings):
+            return array("q")
+        return min(postings, key=len)
+
+    def _email_candidates(self, q)->list:
+        """이메일에 q가 포함될 수 있는 id 배열 목록 (각각 오름차순, 배열끼리는 중복 가능)"""
+        local, at, domain = q.partition("@")
+        if at and len(local) >= 2:
+            # @ 앞부분은 아이디의 끝이어야 함
+            return [self._candidates(self._email_grams, local)]
+        if at:
+            return [ids for d, ids in self._domains.items() if d.startswith(domain)]
+        lists = [ids for d, ids in self._domains.items() if q in d]
+        lists.append(self._candidates(self._email_grams, q))
+        return lists
+
+    def search_names(self, q, after=0)->Iterator[dict]:
+        """이름에 q가 포함된 사용자 (대소문자 무시, id 순서, after 이후)"""
+        q = q.lower()
+        upto = self._committed
+        for user_id in _after(self._candidates(self._name_grams, q), after, upto):
+            if q in self._lower[user_id][0]:
+                yield self._users[user_id]
+
+    def search(self, q, age_min=None, age_max=None, after=0)->Iterator[dict]:
+        """이름 또는 이메일에 q가 포함된 사용자 (나이 범위 필터, id 순서, after 이후)"""
+        q = q.lower()
+        upto = self._committed
+        lists = [self._candidates(self._name_grams, q), *self._email_candidates(q)]
+        ids = heapq.merge(*(_after(ids, after, upto) for ids in lists))
+        last = None
+        for user_id in ids:
+            if user_id == last:
+                continue
+            last = user_id
+            name, email = self._lower[user_id]
+            if q not in name and q not in email:
+                continue
+            user = self._users[user_id]
+            # 나이가 없는 사용자는 나이 조건과 관계없이 포함
+            if age_min is not None and user["age"] and user["age"] < age_min:
+                continue
+            if age_max is not None and user["age"] and user["age"] > age_max:
+                continue
+            yield user
@@ -0,0 +1,178 @@
+"""
+벡터화 백테스트
+- crypto_ohlcv에서 (날짜 x 티커) 종가 행렬을 만들어 모든 티커를 한 번에 계산
+- 매매 규칙은 NumPy 배열 연산 (신호 = 보유 비중 0/1)
+- 수익률, 최대 낙폭(MDD), 샤프 지수 계산
+- 이동평균 기간 조합 등 파라미터 스윕을 프로세스 풀로 병렬 실행
+
+실행: python backtest.py
+"""
+
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from storage import DB_PATH, query_ohlcv
+
+# 캔들 주기별 연간 봉 개수 (암호화폐는 365일 24시간 거래)
+PERIODS_PER_YEAR = {"day": 365, "minute60": 365 * 24, "minute1": 365 * 24 * 60}
+
+
+def load_close_matrix(tickers=None, start=None, end=None, db_path=DB_PATH)->pd.DataFrame:
+    """crypto_ohlcv 종가를 (date x ticker) 행렬로 로드 (상장 전 구간은 NaN)"""
+    df = query_ohlcv(db_path=db_path, tickers=tickers, start=start, end=end,
+                     columns=["date_str", "ticker", "close"])
+    wide = df.pivot(index="date_str", columns="ticker", values="close")
+    wide.index = pd.to_datetime(wide.index, format='%Y-%m-%d %H:%M:%S')
+    return wide.sort_index()
+
+
+def rolling_mean(close, window):
+    """열(티커)별 이동평균 (앞부분과 NaN이 섞인 구간은 NaN)"""
+    missing = np.isnan(close)
+    # 누적합에서만 NaN을 0으로 두고, NaN이 하나라도 들어간 창은 아래에서 NaN으로 덮음
+    csum = np.cumsum(np.where(missing, 0.0, close), axis=0)
+    result = np.full_like(close, np.nan)
+    if window <= len(close):
+        result[window - 1:] = csum[window - 1:]
+        result[window:] -= csum[:-window]
+        result[window - 1:] /= window
+    # 창 안에 NaN이 있으면 NaN
+    nan_count = np.cumsum(missing, axis=0)
+    has_nan = nan_count.copy()
+    has_nan[window:] -= nan_count[:-window]
+    result[has_nan > 0] = np.nan
+    return result
+
+
+class MovingAverageCache:
+    """같은 기간의 이동평균을 여러 조합에서 다시 계산하지 않도록 저장"""
+
+    def __init__(self, close):
+        self.close = close
+        self._cache = {}
+
+    def __call__(self, window):
+        if window not in self._cache:
+            self._cache[window] = rolling_mean(self.close, window)
+        return self._cache[window]
+
+
+def ma_cross(close, ma, fast, slow):
+    """단기 이동평균이 장기 이동평균보다 위면 보유"""
+    return ma(fast) > ma(slow)
+
+
+def price_above_ma(close, ma, window):
+    """종가가 이동평균(기본 ma5) 위면 보유"""
+    return close > ma(window)
+
+
+RULES = {
+    "ma_cross": ma_cross,
+    "price_above_ma": price_above_ma,
+}
+
+
+def evaluate(close, signal, fee=0.0005, periods_per_year=PERIODS_PER_YEAR["day"]):
+    """신호(보유 여부) 행렬로 티커별 성과 계산
+
+    신호는 해당 봉 종가에서 결정되어 다음 봉부터 반영된다(미래 참조 방지).
+    fee: 진입/청산 시마다 차감하는 수수료 비율 (Upbit KRW 마켓 0.05%)
+    상장 전처럼 종가가 NaN인 구간의 수익률은 0으로 채우지 않고 통계에서 빼므로,
+    티커별 통계는 첫 유효 종가부터 계산된다.
+    """
+    returns = np.full_like(close, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    valid = np.isfinite(returns)
+
+    position = np.zeros_like(close)
+    position[1:] = signal[:-1]
+    trades = np.abs(np.diff(position, axis=0, prepend=0))
+    strategy = np.where(valid, position * returns - trades * fee, np.nan)
+
+    # 유효하지 않은 봉은 자산 변화 없음
+    equity = np.cumprod(np.where(valid, 1 + strategy, 1.0), axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    with warnings.catch_warnings():
+        # 유효한 봉이 없는 티커는 NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(strategy, axis=0)
+        std = np.nanstd(strategy, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), np.nan)
+    return {
+        "total_return": equity[-1] - 1,
+        "max_drawdown": drawdown.min(axis=0),
+        "sharpe": sharpe,
+        "trades": np.where(valid, trades, 0.0).sum(axis=0),
+    }
+
+
+def run_backtest(close, rule="price_above_ma", fee=0.0005, periods_per_year=PERIODS_PER_YEAR["day"], ma=None, **params)->pd.DataFrame:
+    """규칙 하나를 모든 티커에 적용한 결과 (티커별 행)"""
+    values = close.to_numpy(dtype=float)
+    ma = ma or MovingAverageCache(values)
+    signal = RULES[rule](values, ma, **params)
+    result = evaluate(values, signal.astype(float), fee, periods_per_year)
+    frame = pd.DataFrame(result, index=close.columns)
+    frame.index.name = "ticker"
+    return frame
+
+
+# 프로세스 풀 작업자마다 종가 행렬을 한 번만 받아 둠
+_worker = {}
+
+def _init_worker(close, rule, fee, periods_per_year):
+    _worker["close"] = close
+    _worker["ma"] = MovingAverageCache(close.to_numpy(dtype=float))
+    _worker["options"] = (rule, fee, periods_per_year)
+
+def _run_chunk(param_chunk):
+    rule, fee, periods_per_year = _worker["options"]
+    frames = []
+    for params in param_chunk:
+        frame = run_backtest(_worker["close"], rule, fee, periods_per_year, ma=_worker["ma"], **params)
+        frames.append(frame.assign(**params))
+    return pd.concat(frames)
+
+
+def parameter_sweep(close, rule, grid, fee=0.0005, periods_per_year=PERIODS_PER_YEAR["day"], max_workers=None, chunk_size=50):
+    """파라미터 격자 전체를 백테스트
+
+    grid: {"fast": [5, 10], "slow": [20, 60]} 처럼 파라미터별 후보 목록
+    반환: (파라미터 조합 x 티커) 행의 DataFrame
+    """
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    if rule == "ma_cross":
+        combos = [c for c in combos if c["fast"] < c["slow"]]
+    chunks = [combos[pos:pos + chunk_size] for pos in range(0, len(combos), chunk_size)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(close, rule, fee, periods_per_year)) as executor:
+        results = pd.concat(executor.map(_run_chunk, chunks))
+    elapsed = time.perf_counter() - started
+    print(f"{len(combos)}개 조합 x {close.shape[1]}개 티커 - {elapsed:.2f}초 "
+          f"({len(combos) / elapsed * 60:,.0f} 조합/분)")
+    return results.reset_index()
+
+
+def summarize(results, params)->pd.DataFrame:
+    """파라미터 조합별 티커 평균 성과 (샤프 내림차순)"""
+    summary = results.groupby(params)[["total_return", "max_drawdown", "sharpe", "trades"]].mean()
+    return summary.sort_values("sharpe", ascending=False)
+
+
+if __name__ == "__main__":
+    close = load_close_matrix()
+    print(run_backtest(close, "price_above_ma", window=5))
+    grid = {"fast": range(2, 30), "slow": range(10, 120, 2)}
+    results = parameter_sweep(close, "ma_cross", grid, max_workers=os.cpu_count())
+    print(summarize(results, ["fast", "slow"]).head(10))
@@ -0,0 +1,192 @@
+"""
+pyupbit 응답 디스크 캐시
+- (endpoint, ticker, interval, count, to)를 키로 SQLite 파일에 저장
+- to를 지정했고 마감된 캔들만 담긴 OHLCV 응답은 만료되지 않음
+- to가 없는(최신 구간) 응답, 진행 중인 캔들이 포함된 응답, 현재가는 몇 초만 유지
+- 전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+
+주의: 값은 pickle로 저장하므로 신뢰할 수 있는 로컬 캐시 파일에만 사용할 것.
+"""
+
+import json
+import pickle
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+# 캔들 하나의 길이
+INTERVAL_PERIODS = {
+    "day": pd.Timedelta(days=1),
+    "days": pd.Timedelta(days=1),
+    "week": pd.Timedelta(weeks=1),
+    "weeks": pd.Timedelta(weeks=1),
+}
+for _minutes in (1, 3, 5, 10, 15, 30, 60, 240):
+    INTERVAL_PERIODS[f"minute{_minutes}"] = pd.Timedelta(minutes=_minutes)
+    INTERVAL_PERIODS[f"minutes{_minutes}"] = pd.Timedelta(minutes=_minutes)
+
+# pyupbit가 돌려주는 캔들 시각(KST) 기준 시간대
+KST = "Asia/Seoul"
+
+
+def candle_close_time(start, interval):
+    """캔들 시작 시각(KST)으로 마감 시각(epoch 초) 계산"""
+    start = pd.Timestamp(start)
+    if interval in ("month", "months"):
+        end = start + pd.offsets.MonthBegin(1)
+    else:
+        end = start + INTERVAL_PERIODS.get(interval, pd.Timedelta(days=1))
+    if end.tzinfo is None:
+        end = end.tz_localize(KST)
+    return end.timestamp()
+
+
+class ResponseCache:
+    """SQLite 파일 기반 키-값 캐시 (TTL + 크기 제한 LRU)"""
+
+    def __init__(self, path="upbit_cache.db", max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache (accessed_at)")
+        self._conn.commit()
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(endpoint, **params)->str:
+        """요청 파라미터로 캐시 키 생성"""
+        return json.dumps([endpoint, sorted((k, str(v)) for k, v in params.items())], ensure_ascii=False)
+
+    def get(self, key, count_miss=True):
+        """값이 없거나 만료되었으면 None
+
+        count_miss=False: 바로 뒤에 같은 키로 다시 조회하는 확인용 호출 (miss를 한 번만 세도록)
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key, value, expires_at=None):
+        """expires_at(epoch 초)이 None이면 만료되지 않음"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), expires_at, time.time())
+            )
+            self._total += len(blob) - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """만료된 항목을 먼저 지우고, 그래도 크면 오래 안 쓴 항목부터 삭제 (lock을 잡은 상태에서 호출)"""
+        self._conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        cursor = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at")
+        victims = []
+        for key, size in cursor:
+            if self._total <= self.max_bytes:
+                break
+            victims.append((key,))
+            self._total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self._total = 0
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedUpbitApi:
+    """pyupbit와 같은 함수 이름을 가진 캐시 래퍼 (UpbitDataCollector의 api로 사용)"""
+
+    def __init__(self, api, cache, price_ttl=2.0, live_candle_ttl=5.0, tickers_ttl=3600.0):
+        # live_candle_ttl: 백테스트처럼 최신 캔들 변화가 중요하지 않으면 길게 잡아도 됨
+        self.api = api
+        self.cache = cache
+        self.price_ttl = price_ttl
+        self.live_candle_ttl = live_candle_ttl
+        self.tickers_ttl = tickers_ttl
+
+    def __getattr__(self, name):
+        # 캐시하지 않는 함수는 원래 api로 전달
+        return getattr(self.api, name)
+
+    def lookup_ohlcv(self, ticker, interval="day", count=200, to=None):
+        """네트워크 호출 없이 캐시만 확인 (없으면 None)
+
+        없으면 이어서 get_ohlcv를 호출하므로 miss는 그쪽에서만 센다.
+        """
+        key = self.cache.make_key("get_ohlcv", ticker=ticker, interval=interval, count=count, to=to)
+        return self.cache.get(key, count_miss=False)
+
+    def get_ohlcv(self, ticker="KRW-BTC", interval="day", count=200, to=None, **kwargs):
+        key = self.cache.make_key("get_ohlcv", ticker=ticker, interval=interval, count=count, to=to)
+        df = self.cache.get(key)
+        if df is not None:
+            return df
+        df = self.api.get_ohlcv(ticker, interval=interval, count=count, to=to, **kwargs)
+        if df is None or len(df) == 0:
+            return df
+        # 과거 구간(to 지정)이고 마지막 캔들이 마감되었으면 영구 보관.
+        # to가 없으면 새 캔들이 생길 때마다 결과 구간이 바뀌므로 잠깐만 보관
+        now = time.time()
+        close_time = candle_close_time(df.index.max(), interval)
+        if to is not None and close_time <= now:
+            expires_at = None
+        else:
+            expires_at = now + self.live_candle_ttl
+            if close_time > now:
+                expires_at = min(expires_at, close_time)
+        self.cache.set(key, df, expires_at)
+        return df
+
+    def get_current_price(self, ticker="KRW-BTC", **kwargs):
+        key = self.cache.make_key("get_current_price", ticker=ticker, **kwargs)
+        price = self.cache.get(key)
+        if price is not None:
+            return price
+        price = self.api.get_current_price(ticker, **kwargs)
+        if price is not None:
+            self.cache.set(key, price, time.time() + self.price_ttl)
+        return price
+
+    def get_tickers(self, fiat="", **kwargs):
+        key = self.cache.make_key("get_tickers", fiat=fiat, **kwargs)
+        tickers = self.cache.get(key)
+        if tickers is not None:
+            return tickers
+        tickers = self.api.get_tickers(fiat=fiat, **kwargs)
+        if tickers:
+            self.cache.set(key, tickers, time.time() + self.tickers_ttl)
+        return tickers
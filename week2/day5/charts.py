@@ -0,0 +1,163 @@
+"""
+가격 차트 일괄 내보내기 (서버용)
+- pyplot/GUI 백엔드 없이 matplotlib Figure(Agg)로 직접 렌더링
+- 티커별 1장 또는 여러 티커를 한 페이지 격자로 PNG/SVG 저장
+- 프로세스 풀로 병렬 렌더링, 차트별 렌더링 시간 보고
+- 긴 이력은 화면 해상도에 맞게 min/max 구간 축소(decimation)
+- matplotlib은 함수 안에서 import (이 모듈을 import해도 matplotlib을 읽지 않음)
+
+실행: python charts.py   (crypto_ohlcv 전체를 charts/ 에 저장)
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from frame_memory import epoch_to_datetime
+
+
+def prepare_chart_frame(df):
+    """date_str(또는 compact 표현의 ts)을 한 번만 datetime으로 변환해서 date 컬럼으로 붙임 (이미 있으면 그대로)"""
+    if "date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["date"]):
+        return df
+    if "date_str" not in df.columns and "ts" in df.columns:
+        return df.assign(date=epoch_to_datetime(df["ts"]).to_numpy())
+    return df.assign(date=pd.to_datetime(df["date_str"], format='%Y-%m-%d %H:%M:%S'))
+
+
+def decimate(dates, *series, max_points=2000):
+    """구간마다 종가 최솟값/최댓값 위치만 남겨 점 개수를 약 max_points로 줄임
+
+    선 그래프의 모양(고점/저점)은 유지하면서 렌더링 비용을 화면 픽셀 수 수준으로 낮춘다.
+    첫 번째 series(종가)를 기준으로 고르고 나머지 series는 같은 위치를 사용한다.
+    """
+    n = len(dates)
+    if n <= max_points:
+        return (dates, *series)
+    buckets = max_points // 2
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+    # 구간 -> 종가 순으로 정렬하면 각 구간의 첫 위치가 최솟값, 마지막 위치가 최댓값
+    order = np.lexsort((series[0], bucket))
+    min_pos = order[edges[:-1]]
+    max_pos = order[edges[1:] - 1]
+    keep = np.unique(np.concatenate([min_pos, max_pos, [0, n - 1]]))
+    return (dates[keep], *(s[keep] for s in series))
+
+
+def _render_page(job):
+    """차트 한 페이지 렌더링 (프로세스 풀 작업 함수) -> (경로, 소요 시간)"""
+    from matplotlib.figure import Figure
+
+    started = time.perf_counter()
+    panels = job["panels"]
+    cols = job["cols"]
+    rows = math.ceil(len(panels) / cols)
+    fig = Figure(figsize=(job["width"] * cols, job["height"] * rows))
+    axes = fig.subplots(rows, cols, squeeze=False).flatten()
+    for ax, panel in zip(axes, panels):
+        ax.plot(panel["date"], panel["close"], color="red", linewidth=0.8, label="close")
+        ax.plot(panel["date"], panel["ma5"], color="blue", linewidth=0.8, label="ma5")
+        ax.set_title(f"{panel['ticker']} close / ma5 visualization ")
+        ax.set_xlabel("date")
+        ax.set_ylabel("price")
+        ax.legend(loc="upper left")
+    for ax in axes[len(panels):]:
+        ax.set_visible(False)
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    fig.savefig(job["path"], dpi=job["dpi"])
+    return job["path"], time.perf_counter() - started
+
+
+def _pyplot():
+    """화면 출력용 pyplot을 처음 쓸 때 import하고 폰트 설정"""
+    import matplotlib.pyplot as plt
+
+    # 한글 폰트 설정
+    plt.rcParams['font.family'] = 'DejaVu Sans'
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def plot_price_trends(df):
+    """가격 트렌드 시각화 함수"""
+    print("=== 가격 트렌드 시각화 ===")
+    plt = _pyplot()
+    # 날짜 컬럼을 datetime으로 변환 (이미 변환된 date 컬럼이 있으면 재사용)
+    # 서버에서 파일로 저장하려면 export_charts 사용
+    df = prepare_chart_frame(df)
+
+    # 고유 티커 목록
+    tickers = df['ticker'].unique()
+    
+    # 서브플롯 생성(티커 수만큼 세로로 배치)
+    fig, axes = plt.subplots(len(tickers),1,figsize=(15,max(8,len(tickers)*8/3)),squeeze=False)
+    axes = axes.flatten()
+    
+    colors = ['red','blue','green']
+    for i,ticker in enumerate(tickers):
+        ticker_data = df[df["ticker"]==ticker].sort_values("date")
+        ticker_data['date'] = ticker_data['date'].dt.strftime('%m-%d')
+        ax = axes[i]
+        ax.plot(ticker_data["date"],ticker_data['close'],color=colors[0])
+        ax.plot(ticker_data["date"],ticker_data['ma5'],color=colors[1])
+        ax.set_title(f"{ticker} close / ma5 visualization ")
+        ax.set_xlabel("date")
+        ax.set_ylabel("price")
+        # print(ticker_data)
+    
+    plt.show()
+
+
+def export_charts(df, out_dir="charts", fmt="png", per_page=1, cols=1,
+                  width=12, height=4, dpi=100, max_points=None, max_workers=None):
+    """티커별 종가/ma5 차트를 파일로 저장
+
+    per_page: 한 파일에 넣을 티커 수 (1이면 티커별 파일, 그 이상이면 cols 열 격자로 페이지 분할)
+    max_points: 차트당 최대 점 수 (None이면 가로 픽셀 수 x 2)
+    반환: [{"path", "tickers", "seconds"}] (차트별 렌더링 시간)
+    """
+    if fmt not in ("png", "svg"):
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+    os.makedirs(out_dir, exist_ok=True)
+    df = prepare_chart_frame(df)
+    max_points = max_points or width * dpi * 2
+
+    panels = []
+    for ticker, each_df in df.groupby("ticker", sort=True):
+        each_df = each_df.sort_values("date")
+        date, close, ma5 = decimate(each_df["date"].to_numpy(), each_df["close"].to_numpy(),
+                                    each_df["ma5"].to_numpy(), max_points=max_points)
+        panels.append({"ticker": ticker, "date": date, "close": close, "ma5": ma5})
+
+    jobs = []
+    for page, pos in enumerate(range(0, len(panels), per_page)):
+        page_panels = panels[pos:pos + per_page]
+        name = page_panels[0]["ticker"] if per_page == 1 else f"page_{page + 1:03d}"
+        jobs.append({
+            "path": os.path.join(out_dir, f"{name}.{fmt}"),
+            "panels": page_panels,
+            "cols": min(cols, len(page_panels)),
+            "width": width, "height": height, "dpi": dpi,
+        })
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for job, (path, seconds) in zip(jobs, executor.map(_render_page, jobs)):
+            results.append({"path": path, "tickers": [p["ticker"] for p in job["panels"]], "seconds": seconds})
+            print(f"{path} 저장 - {seconds * 1000:.0f}ms")
+    elapsed = time.perf_counter() - started
+    print(f"차트 {len(results)}개 저장 완료 - 전체 {elapsed:.2f}초")
+    return results
+
+
+if __name__ == "__main__":
+    from storage import query_ohlcv
+
+    export_charts(query_ohlcv(columns=["date_str", "ticker", "close", "ma5"]))
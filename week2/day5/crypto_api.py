@@ -0,0 +1,377 @@
+"""
+crypto_data.db 조회 API (FastAPI)
+- 티커별 OHLCV 구간 조회 (json / ndjson / arrow 스트리밍)
+- 최신 가격, 티커별 지표(ma5, rsi14 ...) 조회
+- SQLite 조회는 읽기 전용 커넥션 풀(storage.ReadConnectionPool)을 스레드 풀에서 실행해서
+  이벤트 루프를 막지 않음
+- 모두 마감된 캔들로만 이뤄진 구간은 ETag를 보내고, If-None-Match가 같으면 304
+  (json은 읽은 본문으로 계산, 스트리밍은 end가 마감된 구간만 집계 쿼리로 계산)
+- 최근 N개 캔들은 인메모리 캐시(hot_cache)에서 응답하고, 저장되는 캔들을 SSE로 전달
+  (REALTIME_TICKERS 환경 변수를 주면 같은 프로세스에서 실시간 수집을 돌려 캐시를 갱신)
+
+실행: uvicorn crypto_api:app --port 8000
+부하 테스트: python load_test.py --clients 500
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from dataclasses import replace
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from cache import candle_close_time
+from hot_cache import HotCache
+from indicators import INDICATORS, compute_indicators, parse_indicator
+from rollup import ROLLUP_TABLES
+from storage import (DB_PATH, OHLCV_COLUMNS, OhlcvQuery, ReadConnectionPool, add_write_listener,
+                     remove_write_listener)
+
+app = FastAPI(
+    title="암호화폐 OHLCV API",
+    description="crypto_data.db에 저장된 Upbit 캔들 조회 API",
+    version="1.0.0"
+)
+
+# 주기별 테이블 (일봉은 API로 받은 crypto_ohlcv, 분봉은 롤업 테이블)
+INTERVAL_TABLES = {
+    "day": "crypto_ohlcv",
+    "minute1": ROLLUP_TABLES["minute1"],
+    "minute5": ROLLUP_TABLES["minute5"],
+    "minute60": ROLLUP_TABLES["minute60"],
+}
+
+# 스트리밍 응답에서 한 번에 읽는 행 수
+STREAM_CHUNK_ROWS = 5000
+
+# 마감된 구간 응답의 브라우저/프록시 캐시 시간(초)
+CLOSED_MAX_AGE = 86400
+
+# 스레드 풀 작업 수보다 적게 두면 나머지 요청은 커넥션을 기다림
+pool = ReadConnectionPool(DB_PATH, size=8)
+
+# 티커별 최근 캔들 캐시 (같은 프로세스의 upsert_to_database로 갱신)
+hot_cache = HotCache(capacity=500)
+
+# SSE 연결 유지용 주석 전송 간격(초)
+SSE_HEARTBEAT = 15.0
+
+# 같은 프로세스에서 실시간 수집할 티커 (콤마 구분, 없으면 수집 안 함)
+REALTIME_TICKERS = [t for t in os.environ.get("REALTIME_TICKERS", "").split(",") if t]
+_background = []
+
+
+class LatestPrice(BaseModel):
+    ticker: str
+    price: float
+    date_str: str
+    source: str
+
+class TickerInfo(BaseModel):
+    ticker: str
+    first: str
+    last: str
+    candles: int
+
+
+def _table(interval):
+    if interval not in INTERVAL_TABLES:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 주기입니다: {interval}")
+    return INTERVAL_TABLES[interval]
+
+def _columns(columns):
+    if columns is None:
+        return OHLCV_COLUMNS
+    selected = [c.strip() for c in columns.split(",") if c.strip()]
+    unknown = [c for c in selected if c not in OHLCV_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 컬럼입니다: {unknown}")
+    return selected
+
+def _is_closed(last, interval)->bool:
+    return candle_close_time(last, interval) <= time.time()
+
+def _range_etag(query, interval, fmt):
+    """스트리밍 응답의 ETag: 구간의 행 수/마지막 시각/합계로 계산. 마감이 보장되지 않으면 None
+
+    헤더를 본문보다 먼저 보내야 해서 집계 쿼리를 한 번 더 실행하므로,
+    end가 없거나 end 캔들이 아직 마감 전이면(진행 중인 캔들이 포함될 수 있음) 집계하지 않는다.
+    """
+    if query.end is None or not _is_closed(query.end, interval):
+        return None
+    # 같은 조건(limit 포함)의 행을 집계만 하므로 직렬화 비용 없이 구간 내용 변화를 감지
+    inner, params = replace(query, columns=["date_str", "close", "volume"]).to_sql()
+    sql = f"SELECT COUNT(*), MAX(date_str), TOTAL(close), TOTAL(volume) FROM ({inner})"
+    with pool.connection() as conn:
+        count, last, close_sum, volume_sum = conn.execute(sql, params).fetchone()
+    if count == 0 or not _is_closed(last, interval):
+        return None
+    key = json.dumps([query.table, query.tickers, str(query.start), str(query.end), query.columns,
+                      query.limit, query.descending, fmt, count, last, close_sum, volume_sum])
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+def _json_response(query, interval):
+    """JSON 응답과 ETag (이미 읽은 행과 본문으로 계산, 진행 중인 캔들이 포함되면 ETag None)"""
+    selected = list(query.columns)
+    # 마감 여부 확인용 date_str은 선택하지 않았어도 함께 읽고 본문에서는 뺀다
+    extra = [] if "date_str" in selected else ["date_str"]
+    rows = _fetch_rows(replace(query, columns=extra + selected))
+    response = JSONResponse([dict(zip(selected, row[len(extra):])) for row in rows])
+    etag = None
+    if rows:
+        position = 0 if extra else selected.index("date_str")
+        if _is_closed(max(row[position] for row in rows), interval):
+            etag = '"' + hashlib.sha1(response.body).hexdigest() + '"'
+    return response, etag
+
+def _fetch_rows(query):
+    sql, params = query.to_sql()
+    with pool.connection() as conn:
+        return conn.execute(sql, params).fetchall()
+
+def _iter_chunks(query):
+    """풀 커넥션 하나로 STREAM_CHUNK_ROWS행씩 읽음 (클라이언트가 끊으면 커넥션 반납)"""
+    sql, params = query.to_sql()
+    with pool.connection() as conn:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(STREAM_CHUNK_ROWS)
+            if not rows:
+                break
+            yield rows
+
+def _ndjson_stream(query, columns):
+    for rows in _iter_chunks(query):
+        yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in rows)
+
+def _arrow_stream(query, columns):
+    """Arrow IPC 스트림 형식으로 청크마다 record batch 하나씩 전송"""
+    import pyarrow as pa
+
+    sink = io.BytesIO()
+    writer = None
+    for rows in _iter_chunks(query):
+        batch = pa.RecordBatch.from_pydict({c: list(values) for c, values in zip(columns, zip(*rows))})
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+        yield sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+    if writer is not None:
+        writer.close()
+        yield sink.getvalue()
+
+
+# 저장된 티커 목록
+@app.get("/tickers", response_model=List[TickerInfo])
+async def get_tickers(interval: str = Query("day", description="캔들 주기")):
+    """
+    티커별 저장 구간과 캔들 수
+    """
+    table = _table(interval)
+
+    def fetch():
+        with pool.connection() as conn:
+            return conn.execute(
+                f"SELECT ticker, MIN(date_str), MAX(date_str), COUNT(*) FROM {table} GROUP BY ticker"
+            ).fetchall()
+
+    rows = await run_in_threadpool(fetch)
+    return [{"ticker": t, "first": first, "last": last, "candles": n} for t, first, last, n in rows]
+
+# 티커별 OHLCV 구간 조회
+@app.get("/ohlcv/{ticker}")
+async def get_ohlcv(
+    request: Request,
+    ticker: str,
+    start: Optional[str] = Query(None, description="시작 시각 (포함, 'YYYY-MM-DD HH:MM:SS' 또는 날짜)"),
+    end: Optional[str] = Query(None, description="끝 시각 (포함)"),
+    interval: str = Query("day", description="캔들 주기 (day, minute1, minute5, minute60)"),
+    columns: Optional[str] = Query(None, description="콤마로 구분한 컬럼 목록"),
+    limit: Optional[int] = Query(None, description="최대 행 수 (정렬 순서의 앞에서부터)", ge=1),
+    descending: bool = Query(False, description="True면 최신 캔들부터 (limit과 함께 쓰면 최근 limit개)"),
+    format: str = Query("json", description="json, ndjson, arrow")
+):
+    """
+    티커의 OHLCV 구간 조회
+
+    기본은 오래된 캔들부터라 limit만 주면 가장 오래된 limit개를 반환한다.
+    최근 캔들이 필요하면 descending=true (최신 캔들이 먼저 옴).
+    큰 구간은 format=ndjson 또는 arrow로 받으면 서버가 전체를 메모리에 올리지 않고 나눠서 보낸다.
+    ETag는 json이면 읽은 행으로, ndjson/arrow면 end가 마감된 구간에서만 집계 쿼리로 계산한다.
+    """
+    if format not in ("json", "ndjson", "arrow"):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 형식입니다: {format}")
+    selected = _columns(columns)
+    query = OhlcvQuery(tickers=[ticker], start=start, end=end, columns=selected, limit=limit,
+                       descending=descending, table=_table(interval))
+
+    if format == "json":
+        response, etag = await run_in_threadpool(_json_response, query, interval)
+    else:
+        response, etag = None, await run_in_threadpool(_range_etag, query, interval, format)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CLOSED_MAX_AGE}"} if etag else {"Cache-Control": "no-cache"}
+    if etag is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    if format == "ndjson":
+        return StreamingResponse(_ndjson_stream(query, selected), media_type="application/x-ndjson", headers=headers)
+    if format == "arrow":
+        return StreamingResponse(_arrow_stream(query, selected),
+                                 media_type="application/vnd.apache.arrow.stream", headers=headers)
+    response.headers.update(headers)
+    return response
+
+# 최신 가격
+@app.get("/prices/latest", response_model=List[LatestPrice])
+async def get_latest_prices(tickers: Optional[str] = Query(None, description="콤마로 구분한 티커 목록 (없으면 전체)")):
+    """
+    티커별 최신 가격 (시장 스냅샷이 있으면 스냅샷, 없으면 마지막 일봉 종가)
+    """
+    wanted = [t.strip() for t in tickers.split(",") if t.strip()] if tickers else None
+
+    def fetch():
+        with pool.connection() as conn:
+            has_snapshot = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crypto_snapshot'").fetchone()
+            if has_snapshot:
+                rows = conn.execute(
+                    "SELECT ticker, price, snapshot_ts, 'snapshot' FROM crypto_snapshot "
+                    "WHERE snapshot_ts = (SELECT MAX(snapshot_ts) FROM crypto_snapshot)").fetchall()
+                if rows:
+                    return rows
+            return conn.execute(
+                "SELECT ticker, close, date_str, 'candle' FROM crypto_ohlcv "
+                "WHERE (ticker, date_str) IN (SELECT ticker, MAX(date_str) FROM crypto_ohlcv GROUP BY ticker)"
+            ).fetchall()
+
+    rows = await run_in_threadpool(fetch)
+    return [{"ticker": t, "price": p, "date_str": d, "source": s}
+            for t, p, d, s in rows if wanted is None or t in wanted]
+
+# 티커별 지표
+@app.get("/indicators/{ticker}")
+async def get_indicators(
+    ticker: str,
+    indicators: str = Query("ma5", description="콤마로 구분한 지표 (ma5, ema12, rsi14, bb20, atr14, vwap)"),
+    interval: str = Query("day", description="캔들 주기"),
+    limit: int = Query(100, description="최근 캔들 수", ge=1, le=5000)
+):
+    """
+    최근 limit개 캔들의 지표 계산 결과
+
+    지표 계산에 필요한 이전 캔들(가장 긴 기간의 3배)을 함께 읽어서 계산한 뒤 잘라낸다.
+    """
+    specs = [s.strip() for s in indicators.split(",") if s.strip()]
+    try:
+        periods = [parse_indicator(spec) for spec in specs]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    unknown = [name for name, _ in periods if name not in INDICATORS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 지표입니다: {unknown}")
+    warmup = 3 * max((period or 0 for _, period in periods), default=0)
+    query = OhlcvQuery(tickers=[ticker], columns=["date_str", "ticker", "open", "high", "low", "close", "volume"],
+                       limit=limit + warmup, descending=True, table=_table(interval))
+
+    def compute():
+        rows = _fetch_rows(query)
+        if not rows:
+            return None
+        df = pd.DataFrame(rows[::-1], columns=query.columns)
+        df["date"] = pd.to_datetime(df["date_str"], format='%Y-%m-%d %H:%M:%S')
+        result = compute_indicators(df, specs).tail(limit)
+        added = [c for c in result.columns if c not in df.columns]
+        result = result[["date_str", "close"] + added]
+        # NaN은 JSON 표준이 아니므로 null로
+        return json.loads(result.to_json(orient="records"))
+
+    records = await run_in_threadpool(compute)
+    if records is None:
+        raise HTTPException(status_code=404, detail=f"{ticker} 데이터가 없습니다.")
+    return {"ticker": ticker, "interval": interval, "indicators": specs, "rows": records}
+
+# 최근 캔들 (인메모리 캐시)
+@app.get("/candles/{ticker}/latest")
+async def get_latest_candles(
+    ticker: str,
+    n: int = Query(100, description="최근 캔들 수", ge=1, le=5000),
+    interval: str = Query("minute1", description="캔들 주기"),
+    columns: Optional[str] = Query(None, description="콤마로 구분한 컬럼 목록")
+):
+    """
+    최근 n개 캔들 (오래된 순)
+
+    캐시에 있으면 DB를 읽지 않는다. 없으면 DB에서 최근 캔들을 읽어 캐시를 채운다.
+    """
+    table = _table(interval)
+    selected = _columns(columns)
+    rows = hot_cache.latest(table, ticker, n, selected)
+    if rows is None:
+        query = OhlcvQuery(tickers=[ticker], columns=OHLCV_COLUMNS, limit=max(n, hot_cache.capacity),
+                           descending=True, table=table)
+        fetched = await run_in_threadpool(_fetch_rows, query)
+        if fetched and n <= hot_cache.capacity:
+            hot_cache.load(table, ticker, fetched)
+        rows = [dict(zip(OHLCV_COLUMNS, row)) for row in fetched[:n][::-1]]
+        rows = [{c: row[c] for c in selected} for row in rows]
+    return JSONResponse(rows)
+
+async def _sse_stream(request, table, ticker):
+    queue = hot_cache.subscribe(table, ticker)
+    try:
+        while not await request.is_disconnected():
+            try:
+                record = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: candle\ndata: {json.dumps(record, ensure_ascii=False)}\n\n"
+    finally:
+        hot_cache.unsubscribe(table, ticker, queue)
+
+# 저장되는 캔들 구독 (Server-Sent Events)
+@app.get("/stream/{ticker}")
+async def stream_candles(
+    request: Request,
+    ticker: str,
+    interval: str = Query("minute1", description="캔들 주기")
+):
+    """
+    ticker의 캔들이 저장될 때마다 candle 이벤트 전송 (같은 프로세스의 쓰기만 전달됨)
+    """
+    return StreamingResponse(_sse_stream(request, _table(interval), ticker), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.on_event("startup")
+async def startup_event():
+    add_write_listener(hot_cache.publish)
+    if REALTIME_TICKERS:
+        from realtime import RealtimeIngestor
+
+        stop_event = asyncio.Event()
+        task = asyncio.create_task(RealtimeIngestor(REALTIME_TICKERS).run(stop_event))
+        _background.append((stop_event, task))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for stop_event, task in _background:
+        stop_event.set()
+        await asyncio.gather(task, return_exceptions=True)
+    remove_write_listener(hot_cache.publish)
+    pool.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvicorn crypto_api:app --port 8000
+    uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,102 @@
+"""
+OHLCV DataFrame 메모리 절약 표현
+- ticker: category (티커 문자열을 행마다 저장하지 않고 코드만 저장)
+- 날짜: date/date_str 대신 int64 epoch 초(ts, UTC 기준) 한 컬럼
+- 실수 컬럼: float32로 바꿨다가 되돌려도 모든 값이 원래 값과 정확히 같을 때만 float32
+  (정수 호가 가격처럼 2^24 이하 값은 float32, 소수 거래량/거래대금과 큰 가격은 float64 그대로)
+- date_str 문자열은 저장(upsert) 직전에만 만든다 (to_storage_frame)
+
+report_memory(stage, df)를 수집 함수의 memory_hook으로 넘기면 단계별 메모리 사용량을 출력한다.
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import format_date_str
+
+# pyupbit 캔들 시각(date, date_str)의 시간대
+KST = "Asia/Seoul"
+
+
+def to_epoch(dates)->np.ndarray:
+    """KST 시각(datetime 또는 'YYYY-MM-DD HH:MM:SS' 문자열)을 int64 epoch 초로"""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format='%Y-%m-%d %H:%M:%S')
+    index = pd.DatetimeIndex(dates)
+    if index.tz is None:
+        index = index.tz_localize(KST)
+    return np.asarray(index.tz_convert("UTC").tz_localize(None), dtype="datetime64[s]").astype(np.int64)
+
+
+def epoch_to_datetime(ts)->pd.Series:
+    """epoch 초를 KST 시각(시간대 없는 datetime)으로"""
+    ts = pd.Series(ts)
+    return pd.to_datetime(ts, unit="s", utc=True).dt.tz_convert(KST).dt.tz_localize(None)
+
+
+def epoch_to_date_str(ts)->pd.Series:
+    """epoch 초를 DB 저장용 date_str로 (고유한 시각만 strftime)"""
+    return format_date_str(epoch_to_datetime(ts))
+
+
+def fits_float32(values)->bool:
+    """float32로 바꿨다가 float64로 되돌려도 모든 값이 그대로인지 (NaN은 NaN으로)"""
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(over="ignore"):
+        restored = values.astype(np.float32).astype(np.float64)
+    return bool(np.array_equal(restored, values, equal_nan=True))
+
+
+def compact_ohlcv(df)->pd.DataFrame:
+    """OHLCV DataFrame을 메모리 절약 dtype으로 변환 (date/date_str -> ts 맨 앞 컬럼)"""
+    if "ts" not in df.columns:
+        source = "date" if "date" in df.columns else "date_str"
+        df = df.assign(ts=to_epoch(df[source])).drop(columns=[c for c in ("date", "date_str") if c in df.columns])
+        df = df[["ts"] + [c for c in df.columns if c != "ts"]]
+    columns = {}
+    if "ticker" in df.columns and not isinstance(df["ticker"].dtype, pd.CategoricalDtype):
+        columns["ticker"] = df["ticker"].astype("category")
+    for name in df.columns:
+        if df[name].dtype == np.float64 and fits_float32(df[name].to_numpy()):
+            columns[name] = df[name].astype(np.float32)
+    return df.assign(**columns)
+
+
+def to_storage_frame(df)->pd.DataFrame:
+    """compact 표현을 저장용으로 되돌림 (ts -> date_str, float32 -> float64). 이미 저장용이면 그대로
+
+    float32 컬럼은 정확히 표현되는 값만 담고 있으므로 그대로 float64로 바꾸면 원래 값이다.
+    """
+    columns = {}
+    if "date_str" not in df.columns and "ts" in df.columns:
+        columns["date_str"] = epoch_to_date_str(df["ts"])
+    for name in df.columns:
+        if df[name].dtype == np.float32:
+            columns[name] = df[name].astype(np.float64)
+    return df.assign(**columns) if columns else df
+
+
+def memory_usage(df)->int:
+    """DataFrame 전체 메모리 사용량 (object 문자열 포함, 바이트)"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def report_memory(stage, df, per_column=False):
+    """단계 이름과 함께 memory_usage(deep=True) 출력 (memory_hook 기본 구현)"""
+    total = memory_usage(df)
+    per_row = total / len(df) if len(df) else 0
+    print(f"[메모리] {stage}: {total / 1024 ** 2:,.2f}MB ({len(df):,}행, {per_row:.1f}바이트/행)")
+    if per_column:
+        usage = df.memory_usage(deep=True, index=False)
+        for name, size in usage.items():
+            print(f"    {name:<18} {str(df[name].dtype):<10} {size / 1024 ** 2:,.2f}MB")
+    return total
+
+
+if __name__ == "__main__":
+    from indicators import make_sample_ohlcv
+
+    sample = pd.concat(make_sample_ohlcv(n_tickers=200, n_candles=10_000), ignore_index=True)
+    sample["date_str"] = format_date_str(sample["date"])
+    report_memory("기본 dtype", sample, per_column=True)
+    report_memory("compact", compact_ohlcv(sample), per_column=True)
@@ -0,0 +1,180 @@
+"""
+최근 캔들 인메모리 캐시 + 구독(pub/sub)
+- (테이블, 티커)별로 최근 capacity개 캔들을 고정 크기 링 버퍼(deque)에 유지
+- storage 쓰기 경로(upsert_to_database)에 리스너로 붙어서 저장되는 캔들로 갱신
+  (수집기/실시간 수집/롤업 갱신이 같은 프로세스에서 저장하면 DB를 다시 읽지 않음)
+- 구독자는 asyncio.Queue로 저장되는 캔들을 받음 (다른 스레드의 쓰기도 call_soon_threadsafe로 전달)
+- 메모리 제한: 티커 수가 max_tickers를 넘으면 가장 오래 읽지 않은 티커부터 제거,
+  idle_seconds 동안 읽지 않은 티커도 제거 (구독 중인 티커는 제외)
+
+캐시는 읽힌 적이 있는(DB에서 채운) 티커만 유지한다. 차가운 티커의 쓰기는 구독자에게만 전달되고,
+다음 조회 때 DB에서 다시 채운다. 같은 프로세스의 쓰기가 stale_seconds 동안 없으면
+다른 프로세스가 저장했을 수 있으므로 DB에서 다시 채운다.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+from storage import OHLCV_COLUMNS
+
+_DATE = OHLCV_COLUMNS.index("date_str")
+_TICKER = OHLCV_COLUMNS.index("ticker")
+
+
+def _row_dict(row, columns=None)->dict:
+    """저장 순서 튜플 -> dict (NaN은 JSON 표준이 아니므로 None)"""
+    record = {c: (None if isinstance(v, float) and math.isnan(v) else v) for c, v in zip(OHLCV_COLUMNS, row)}
+    return record if columns is None else {c: record[c] for c in columns}
+
+
+class _Ring:
+    """date_str 순으로 정렬된 최근 캔들 (capacity를 넘으면 가장 오래된 캔들이 빠짐)"""
+
+    def __init__(self, capacity):
+        self.rows = deque(maxlen=capacity)
+        self.updated_at = time.monotonic()
+        self.accessed_at = self.updated_at
+
+    def upsert(self, row):
+        rows = self.rows
+        date = row[_DATE]
+        # 대부분은 새 캔들 추가 또는 진행 중인 마지막 캔들 갱신
+        if not rows or date > rows[-1][_DATE]:
+            rows.append(row)
+        elif date == rows[-1][_DATE]:
+            rows[-1] = row
+        elif date >= rows[0][_DATE]:
+            # 백필 등 과거 캔들: 링 안쪽이면 위치를 찾아 교체/삽입
+            for i in range(len(rows) - 1, -1, -1):
+                if rows[i][_DATE] == date:
+                    rows[i] = row
+                    break
+                if rows[i][_DATE] < date:
+                    if len(rows) == rows.maxlen:
+                        rows.popleft()
+                        i -= 1
+                    rows.insert(i + 1, row)
+                    break
+        self.updated_at = time.monotonic()
+
+
+class HotCache:
+    """티커별 최근 캔들 캐시 + 구독 큐
+
+    capacity     : 티커당 유지할 캔들 수
+    max_tickers  : 캐시에 유지할 최대 (테이블, 티커) 수
+    idle_seconds : 이 시간 동안 읽지 않은 티커는 제거 (None이면 사용 안 함)
+    stale_seconds: 쓰기가 이 시간 동안 없으면 조회 시 캐시 미스로 처리 (None이면 사용 안 함)
+    queue_size   : 구독자 큐 크기 (가득 차면 가장 오래된 캔들을 버림)
+    """
+
+    def __init__(self, capacity=200, max_tickers=500, idle_seconds=600.0, stale_seconds=60.0, queue_size=1000):
+        self.capacity = capacity
+        self.max_tickers = max_tickers
+        self.idle_seconds = idle_seconds
+        self.stale_seconds = stale_seconds
+        self.queue_size = queue_size
+        self._rings = OrderedDict()
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0, "published": 0, "dropped": 0}
+
+    def latest(self, table, ticker, n=None, columns=None):
+        """최근 n개 캔들(오래된 순) 리스트. 캐시에 없거나 오래됐으면 None"""
+        n = self.capacity if n is None else n
+        now = time.monotonic()
+        with self._lock:
+            ring = self._rings.get((table, ticker))
+            if (ring is None or n > self.capacity
+                    or (self.stale_seconds is not None and now - ring.updated_at > self.stale_seconds)):
+                self.stats["misses"] += 1
+                return None
+            ring.accessed_at = now
+            self._rings.move_to_end((table, ticker))
+            rows = list(ring.rows)[-n:] if n else []
+            self.stats["hits"] += 1
+        return [_row_dict(row, columns) for row in rows]
+
+    def load(self, table, ticker, rows):
+        """DB에서 읽은 최근 캔들(OHLCV_COLUMNS 순서 튜플)로 캐시를 채움"""
+        ring = _Ring(self.capacity)
+        for row in sorted(rows, key=lambda r: r[_DATE])[-self.capacity:]:
+            ring.rows.append(tuple(row))
+        with self._lock:
+            self._rings[(table, ticker)] = ring
+            self._rings.move_to_end((table, ticker))
+            self._evict()
+
+    def publish(self, table, rows):
+        """저장된 캔들 반영 + 구독자에게 전달 (storage.add_write_listener에 등록)"""
+        deliveries = []
+        with self._lock:
+            for row in rows:
+                key = (table, row[_TICKER])
+                ring = self._rings.get(key)
+                if ring is not None:
+                    ring.upsert(row)
+                for loop, queue in self._subscribers.get(key, ()):
+                    deliveries.append((loop, queue, row))
+            self.stats["published"] += len(rows)
+        for loop, queue, row in deliveries:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, _row_dict(row))
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힘
+                self._remove(queue)
+
+    def _deliver(self, queue, record):
+        if queue.full():
+            queue.get_nowait()
+            self.stats["dropped"] += 1
+        queue.put_nowait(record)
+
+    def subscribe(self, table, ticker)->asyncio.Queue:
+        """(table, ticker)에 저장되는 캔들을 받을 큐 (실행 중인 이벤트 루프에서 호출)"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault((table, ticker), set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, table, ticker, queue):
+        with self._lock:
+            subscribers = self._subscribers.get((table, ticker), set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._subscribers.pop((table, ticker), None)
+
+    def _remove(self, queue):
+        with self._lock:
+            for key in list(self._subscribers):
+                self._subscribers[key] = {s for s in self._subscribers[key] if s[1] is not queue}
+                if not self._subscribers[key]:
+                    del self._subscribers[key]
+
+    def _evict(self):
+        """LRU 순서로 초과분 / 오래 읽지 않은 티커 제거 (잠금을 잡은 상태에서 호출)"""
+        now = time.monotonic()
+        for key in list(self._rings):
+            over = len(self._rings) > self.max_tickers
+            idle = self.idle_seconds is not None and now - self._rings[key].accessed_at > self.idle_seconds
+            if not (over or idle):
+                break
+            if key in self._subscribers:
+                continue
+            del self._rings[key]
+            self.stats["evicted"] += 1
+
+    def evict_idle(self):
+        with self._lock:
+            self._evict()
+
+    def __len__(self):
+        return len(self._rings)
+
+    def memory_rows(self)->int:
+        """캐시에 들어 있는 전체 캔들 수 (최대 capacity x max_tickers)"""
+        with self._lock:
+            return sum(len(ring.rows) for ring in self._rings.values())
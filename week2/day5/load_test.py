@@ -0,0 +1,94 @@
+"""
+crypto_api 부하 테스트
+- clients개의 동시 클라이언트가 각각 requests번씩 요청 (httpx.AsyncClient)
+- 엔드포인트별 p50 / p95 / p99 지연 시간과 처리량 출력
+- --etag를 주면 두 번째 요청부터 If-None-Match를 보내 304 경로도 측정
+
+실행:
+    uvicorn crypto_api:app --port 8000
+    python load_test.py --clients 500 --requests 20
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+import numpy as np
+
+
+def default_paths(tickers):
+    paths = []
+    for ticker in tickers:
+        paths.append(f"/ohlcv/{ticker}?limit=30&descending=true")
+        paths.append(f"/ohlcv/{ticker}?end=2020-01-01&format=ndjson")
+        paths.append(f"/indicators/{ticker}?indicators=ma5,rsi14&limit=30")
+    paths.append("/prices/latest")
+    return paths
+
+
+async def _client(client, paths, n_requests, use_etag, results, start_event):
+    etags = {}
+    await start_event.wait()
+    for _ in range(n_requests):
+        path = random.choice(paths)
+        headers = {"If-None-Match": etags[path]} if use_etag and path in etags else {}
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            await response.aread()
+            status = response.status_code
+            if "etag" in response.headers:
+                etags[path] = response.headers["etag"]
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        results.append((path.split("?")[0].rsplit("/", 1)[0] or path, status, time.perf_counter() - started))
+
+
+async def run_load_test(url, clients=500, n_requests=20, paths=None, use_etag=False):
+    """동시 클라이언트 부하를 주고 (엔드포인트, 상태, 지연 초) 리스트 반환"""
+    if paths is None:
+        async with httpx.AsyncClient(base_url=url) as client:
+            tickers = [row["ticker"] for row in (await client.get("/tickers")).json()][:20]
+        paths = default_paths(tickers)
+
+    results = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60.0) as client:
+        start_event = asyncio.Event()
+        tasks = [asyncio.create_task(_client(client, paths, n_requests, use_etag, results, start_event))
+                 for _ in range(clients)]
+        started = time.perf_counter()
+        start_event.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    report(results, elapsed, clients)
+    return results
+
+
+def report(results, elapsed, clients):
+    print(f"=== {clients}개 동시 클라이언트, {len(results)}개 요청, {elapsed:.1f}초 "
+          f"({len(results) / elapsed:,.0f} req/s) ===")
+    groups = {}
+    for endpoint, status, seconds in results:
+        groups.setdefault(endpoint, []).append((status, seconds))
+    groups["전체"] = [(status, seconds) for _, status, seconds in results]
+    for endpoint, items in groups.items():
+        latency = np.array([seconds for _, seconds in items]) * 1000
+        statuses = {}
+        for status, _ in items:
+            statuses[status] = statuses.get(status, 0) + 1
+        p50, p95, p99 = np.percentile(latency, [50, 95, 99])
+        print(f"{endpoint:<14} n={len(items):<6} p50 {p50:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms  "
+              f"상태 {statuses}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="crypto_api 부하 테스트")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20, help="클라이언트당 요청 수")
+    parser.add_argument("--etag", action="store_true", help="If-None-Match로 304 경로 측정")
+    args = parser.parse_args()
+    asyncio.run(run_load_test(args.url, args.clients, args.requests, use_etag=args.etag))
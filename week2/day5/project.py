@@ -1,21 +1,34 @@
-import pyupbit
 import pandas as pd
 import sqlite3
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import math
 import time
 import warnings
 
+from rate_limit import TokenBucket, is_rate_limited, backoff_delay
+from rollup import ROLLUP_TABLES, refresh_rollups
+from cache import CachedUpbitApi
+from charts import plot_price_trends
+from frame_memory import compact_ohlcv
+from quality import check_ohlcv, clean_ohlcv
+from indicators import DEFAULT_INDICATORS, compute_indicators, format_date_str
+from storage import (DB_PATH, OHLCV_COLUMNS, OhlcvQuery, StagingWriter, create_database,
+                     create_ohlcv_table, get_latest_dates, query_ohlcv, save_snapshot,
+                     upsert_to_database)
+
 # 경고 메시지 숨기기
 warnings.filterwarnings('ignore')
 
-# 한글 폰트 설정
-plt.rcParams['font.family'] = 'DejaVu Sans'
-plt.rcParams['axes.unicode_minus'] = False
+# 분석 대상 티커
+MAJOR_TICKERS = ['KRW-PUNDIX', 'KRW-USD1', 'KRW-BAT']
+
+# 증분 동기화 시 이동평균 계산을 위해 함께 받아오는 과거 캔들 수 (ma5 -> 4개)
+SYNC_WARMUP = 4
+
+# matplotlib(폰트 설정 포함)은 charts.plot_price_trends 호출 시, pyupbit은 수집기 생성 시 import
+# (수집만 하는 경우 import 시간을 줄이기 위함, startup_benchmark.py 참고)
 
-# 현재 비트코인 가격 조회
-current_price = pyupbit.get_current_price(['KRW-BTC'])
 # ['KRW-WAXP', 'KRW-CARV', 'KRW-LSK', 'KRW-0G', 'KRW-BORA', 'KRW-PUNDIX', 'KRW-USD1', 'KRW-BAT'
 # , 'KRW-HUNT', 'KRW-PENGU', 'KRW-FIL', 'KRW-BEAM', 'KRW-DOOD', 'KRW-WAVES', 'KRW-USDC', 'KRW-MOVE'
 # , 'KRW-TREE', 'KRW-AERGO', 'KRW-USDT', 'KRW-2Z', 'KRW-BOUNTY', 'KRW-KAITO', 'KRW-LPT', 'KRW-BLAST'
@@ -30,13 +43,23 @@ current_price = pyupbit.get_current_price(['KRW-BTC'])
 class UpbitDataCollector:
     """Upbit API를 활용한 데이터 수집 클래스"""
     
-    def __init__(self):
+    def __init__(self, api=None, rate_limiter=None, cache=None):
+        # api: pyupbit 모듈 또는 같은 함수를 가진 대체 객체 (테스트용 가짜 pyupbit 주입 가능)
+        if api is None:
+            import pyupbit
+            api = pyupbit
+        self.api = api
+        # cache: cache.ResponseCache를 주면 pyupbit 응답을 디스크에 캐시
+        if cache is not None:
+            self.api = CachedUpbitApi(self.api, cache)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket()
         self.supported_tickers = None  
+        self.last_throughput = None
 
     def get_krw_tickers(self)->list[str]:
         """KRW 마켓의 모든 티커 조회"""
         try:
-            self.supported_tickers = pyupbit.get_tickers(fiat="KRW")
+            self.supported_tickers = self.api.get_tickers(fiat="KRW")
             return self.supported_tickers
         except Exception as e:
             print(f"티커 조회 오류 : {e}")
@@ -46,46 +69,139 @@ class UpbitDataCollector:
         """현재가 조회"""
         try:
             if (isinstance(tickers,str)):
-                return pyupbit.get_current_price(tickers)
+                return self.api.get_current_price(tickers)
             else:
-                return pyupbit.get_current_price(tickers)
+                return self.api.get_current_price(tickers)
         except Exception as e:
             print(f"현재가 조회 오류 : {e}")
             return None
 
-    def get_ohlcv_data(self,ticker,interval="day",count=30):
-        """OHLCV 데이터 조회"""
+    def _fetch_prices_with_retry(self,tickers,max_retries=3):
+        """속도 제한 + 429 재시도를 적용한 현재가 조회 -> {티커: 가격}"""
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                prices = self.api.get_current_price(tickers)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    print(f"현재가 조회 오류 : {e}")
+                    return {}
+                self.rate_limiter.drain()
+                prices = None
+            if prices is not None:
+                # pyupbit는 티커가 1개면 dict가 아닌 숫자를 돌려줌
+                return prices if isinstance(prices,dict) else {tickers[0]: prices}
+            if attempt < max_retries:
+                time.sleep(backoff_delay(attempt))
+        return {}
+
+    def get_market_snapshot(self,tickers=None,chunk_size=50,max_workers=4):
+        """KRW 마켓 전체 현재가 스냅샷
+
+        티커 목록을 chunk_size개씩 나눠 병렬로 요청하고 하나의 DataFrame으로 합친다.
+        반환 컬럼: snapshot_ts(수집 시각), ticker, price
+        """
+        if tickers is None:
+            tickers = self.supported_tickers or self.get_krw_tickers()
+        tickers = list(tickers)
+        chunks = [tickers[pos:pos + chunk_size] for pos in range(0, len(tickers), chunk_size)]
+
+        started = time.perf_counter()
+        snapshot_ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        prices = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for result in executor.map(self._fetch_prices_with_retry,chunks):
+                prices.update(result)
+        elapsed = time.perf_counter() - started
+
+        snapshot = pd.DataFrame({
+            "snapshot_ts": snapshot_ts,
+            "ticker": list(prices.keys()),
+            "price": list(prices.values()),
+        })
+        print(f"시장 스냅샷 - {len(snapshot)}/{len(tickers)}개 티커, {len(chunks)}개 요청, {elapsed:.3f}초")
+        return snapshot
+
+    def get_ohlcv_data(self,ticker,interval="day",count=30,preprocess=True):
+        """OHLCV 데이터 조회 (preprocess=False면 티커만 붙인 원본 반환)"""
         try:
-            df = pyupbit.get_ohlcv(ticker,interval=interval,count=count)
+            df = self.api.get_ohlcv(ticker,interval=interval,count=count)
             
             if df is not None:
-                df["ticker"] = ticker
-                # df["ma5"] = 0.0
-                df.reset_index(inplace=True) 
-
-                df = self.preprocess_data(df)
+                df = self._prepare_ohlcv(df,ticker,preprocess)
                 
             return df
         except Exception as e:
             print(f"{ticker} OHLCV 데이터 조회 오류 : {e} ")
             return None
 
-    def preprocess_data(self,df):       
-        """데이터 전처리 함수"""
-        print("=== 데이터 전처리 시작 ===")
-        
-        # 데이터 복사
-        processed_df = df.copy()
+    def _prepare_ohlcv(self,df,ticker,preprocess=True):
+        """API 응답에 티커를 붙이고 전처리"""
+        df["ticker"] = ticker
+        # df["ma5"] = 0.0
+        df.reset_index(inplace=True) 
+        if not preprocess:
+            return df
+        return self.preprocess_data(df)
+
+    def _fetch_ohlcv_with_retry(self,ticker,interval,count,max_retries=3,preprocess=True):
+        """속도 제한 + 재시도를 적용한 OHLCV 조회"""
+        df = self._request_ohlcv(ticker,interval,count,max_retries=max_retries)
+        if df is None:
+            return None
+        return self._prepare_ohlcv(df,ticker,preprocess)
+
+    def _request_ohlcv(self,ticker,interval,count,to=None,max_retries=3):
+        """속도 제한 + 재시도를 적용한 원본 OHLCV 요청 (재시도 후에도 실패하면 None)
+
+        pyupbit.get_ohlcv는 429를 포함한 모든 오류를 None으로 돌려주므로
+        None도 재시도 대상으로 본다.
+        """
+        # get_ohlcv는 200개 단위로 나눠서 요청하므로 그만큼 토큰을 소비
+        cost = max(1, math.ceil(count / 200))
+        # 캐시에 있으면 토큰을 쓰지 않고 바로 반환
+        if isinstance(self.api, CachedUpbitApi):
+            df = self.api.lookup_ohlcv(ticker,interval=interval,count=count,to=to)
+            if df is not None:
+                return df
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire(cost)
+            try:
+                df = self.api.get_ohlcv(ticker,interval=interval,count=count,to=to)
+            except Exception as e:
+                if not is_rate_limited(e):
+                    print(f"{ticker} OHLCV 데이터 조회 오류 : {e} ")
+                    return None
+                self.rate_limiter.drain()
+                df = None
+            if df is not None:
+                return df
+            if attempt < max_retries:
+                time.sleep(backoff_delay(attempt))
+        print(f"{ticker} OHLCV 데이터 조회 실패 ({max_retries}회 재시도)")
+        return None
+
+    def preprocess_data(self,df,indicators=DEFAULT_INDICATORS,verbose=True,compact=False):       
+        """데이터 전처리 함수
+
+        여러 티커가 이어붙은 DataFrame도 한 번에 처리한다.
+        indicators: 추가로 계산할 지표 (indicators.py 참고, ma5는 항상 계산)
+        compact: True면 date_str 대신 ts(epoch 초), category 티커, 정확히 표현되는 실수 컬럼은 float32로 반환 (frame_memory.py)
+        """
+        if verbose:
+            print("=== 데이터 전처리 시작 ===")
         
-        # 날짜 컬럼 처리        
-        if 'index' in processed_df.columns:
-            processed_df['date'] = processed_df['index']
-            processed_df.drop('index', axis=1, inplace=True)
+        # 날짜 컬럼 처리 (원본을 복사하지 않고 이름만 바꾼 새 DataFrame 사용)
+        processed_df = df.rename(columns={"index": "date"})
         
-        # 날짜를 문자열로 변환 (DB 저장용)        
-        processed_df['date_str'] = processed_df['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+        # 기술적 지표 계산 (티커별 rolling/ewm을 한 번에 계산, 결과는 티커/날짜 순 정렬)
+        indicators = ("ma5",) + tuple(spec for spec in indicators if spec != "ma5")
+        processed_df = compute_indicators(processed_df,indicators)
+
+        # 날짜를 문자열로 변환 (DB 저장용, compact면 저장 직전에 변환)        
+        if not compact:
+            processed_df['date_str'] = format_date_str(processed_df['date'])
         
-        # 기술적 지표 계산        
         ##############################################################
         #### 문제1) 종가와 시가의 차이 계산의 답안을 작성해주세요####
         processed_df["price_change"] = processed_df["close"] - processed_df["open"]
@@ -94,36 +210,175 @@ class UpbitDataCollector:
 
 
         #### 문제2) 5일 이동평균선 계산 및 결측치 처리의 답안을 작성해주세
-        datas = processed_df.groupby("ticker")        
-        for key,each_df in datas:
-            processed_df["ma5"] = each_df["close"].rolling(window=5).mean()
-            processed_df["ma5"] = processed_df["ma5"].fillna(each_df["close"])
+        processed_df["ma5"] = processed_df["ma5"].fillna(processed_df["close"])
         ##############################################################
 
-        # 컬럼 순서 정리
-        columns_order = ['date_str', 'ticker', 'open', 'high', 'low', 'close', 'volume',
-                        'price_change', 'price_change_pct', 'high_low_diff', 'ma5']
-        processed_df = processed_df[columns_order]
+        # 컬럼 순서 정리 (추가 지표는 뒤에 붙임)
+        extra_columns = [c for c in processed_df.columns
+                         if c not in OHLCV_COLUMNS and c not in df.columns and c not in ("date", "index")]
+        if compact:
+            processed_df = compact_ohlcv(processed_df[["date"] + OHLCV_COLUMNS[1:] + extra_columns])
+        else:
+            processed_df = processed_df[OHLCV_COLUMNS + extra_columns]
 
-        print(f"전처리 완료 - 행 수: {len(processed_df)}")
-        print(f"추가된 컬럼: price_change, price_change_pct, high_low_diff, ma5")
+        if verbose:
+            print(f"전처리 완료 - 행 수: {len(processed_df)}")
+            print(f"추가된 컬럼: price_change, price_change_pct, high_low_diff, ma5"
+                  + "".join(f", {c}" for c in extra_columns))
         
         return processed_df
     
-    def get_multiple_ohlcv(self,tickers,interval="day",count=30,delay=0.1):
-        """여러 티커의 OHLCV 데이터 일괄 조회"""
+    def _page_ohlcv(self,ticker,since,interval="day",warmup=SYNC_WARMUP,max_pages=100,to=None):
+        """to(KST, 미포함, None이면 최신)부터 과거 방향으로 since 이전 warmup개가 나올 때까지 페이징
+
+        페이지마다 _request_ohlcv와 같은 재시도를 적용한다.
+        since 이전 warmup개에 닿거나 과거 데이터가 끝나기(200개 미만 페이지) 전에 멈추면
+        (재시도 후에도 실패, max_pages 초과 등) 일부만 저장되지 않도록 None을 돌려준다.
+
+        반환: (warmup 구간, since 이후 구간) 원본 DataFrame 또는 None
+        """
+        since = pd.Timestamp(since)
+        pages = []
+        # 인덱스는 KST, Upbit의 to는 UTC 기준(exclusive)이므로 9시간을 뺀다
+        to = None if to is None else (pd.Timestamp(to) - timedelta(hours=9)).strftime('%Y-%m-%d %H:%M:%S')
+        oldest = None
+        complete = False
+        for _ in range(max_pages):
+            page = self._request_ohlcv(ticker,interval,200,to=to)
+            if page is None:
+                break
+            if len(page) == 0:
+                complete = True
+                break
+            pages.append(page)
+            page_oldest = page.index.min()
+            if oldest is not None and page_oldest >= oldest:
+                break
+            oldest = page_oldest
+            older = sum((p.index < since).sum() for p in pages)
+            if (oldest <= since and older >= warmup) or len(page) < 200:
+                complete = True
+                break
+            to = (oldest - timedelta(hours=9)).strftime('%Y-%m-%d %H:%M:%S')
+
+        if not complete:
+            print(f"{ticker} OHLCV 페이징 중단 - {since} 이전까지 받지 못해 건너뜀")
+            return None
+        if not pages:
+            return None
+
+        df = pd.concat(pages)
+        df = df[~df.index.duplicated(keep="last")].sort_index()
+        return df[df.index < since].tail(warmup), df[df.index >= since]
+
+    def get_ohlcv_since(self,ticker,since,interval="day",warmup=SYNC_WARMUP,max_pages=100):
+        """since 이후(포함)의 캔들만 조회
+
+        한 번의 요청(200개)으로 부족하면 to 파라미터로 과거 방향 페이징한다.
+        since 캔들은 마감 전에 저장됐을 수 있으므로 다시 받아서 덮어쓰고,
+        이동평균 계산을 위해 since 이전 캔들 warmup개를 함께 받아 전처리한 뒤 잘라낸다.
+        """
+        pages = self._page_ohlcv(ticker,since,interval,warmup,max_pages)
+        if pages is None:
+            return None
+        before, df = pages
+
+        processed = self._prepare_ohlcv(pd.concat([before, df]),ticker)
+        # warmup 구간은 이미 저장되어 있으므로 제외
+        return processed.iloc[len(before):]
+
+    def get_ohlcv_range(self,ticker,start,end,interval="day",warmup=SYNC_WARMUP,max_pages=100):
+        """start~end(둘 다 포함, KST) 구간 캔들만 조회 (누락 구간 백필용, quality.py)
+
+        end 다음 캔들부터 과거 방향으로 페이징하고, ma5 계산용 warmup 캔들을 함께 받아 전처리한다.
+        """
+        end = pd.Timestamp(end)
+        pages = self._page_ohlcv(ticker,start,interval,warmup,max_pages,to=end + pd.Timedelta(seconds=1))
+        if pages is None:
+            return None
+        before, df = pages
+        df = df[df.index <= end]
+        if len(df) == 0:
+            return None
+
+        processed = self._prepare_ohlcv(pd.concat([before, df]),ticker)
+        return processed.iloc[len(before):]
+
+    def get_multiple_ohlcv(self,tickers,interval="day",count=30,delay=0.1,
+                           concurrent=False,max_workers=8,max_retries=3,progress_callback=None,
+                           compact=False,memory_hook=None):
+        """여러 티커의 OHLCV 데이터 일괄 조회
+
+        concurrent=True이면 스레드 풀로 동시에 조회하고, 요청 간격은 delay 대신
+        self.rate_limiter(토큰 버킷)가 조절한다.
+        progress_callback(완료 수, 전체 수, 티커, 성공 여부)
+        compact: 메모리 절약 dtype으로 반환 (preprocess_data 참고)
+        memory_hook(단계, DataFrame): 단계별 메모리 확인용 (예: frame_memory.report_memory)
+        """
+        if concurrent:
+            all_data = self._get_multiple_ohlcv_concurrent(tickers,interval,count,max_workers,
+                                                           max_retries,progress_callback)
+            return self._combine_ohlcv(all_data,compact,memory_hook)
         all_data = []
+        started = time.perf_counter()
         for ticker in tickers:
             print(f"{ticker} 데이터 수집중 ...")            
-            data = self.get_ohlcv_data(ticker,interval,count)            
+            data = self.get_ohlcv_data(ticker,interval,count,preprocess=False)            
             if data is not None:
                 all_data.append(data)
             time.sleep(delay)
+        elapsed = time.perf_counter() - started
+        self.last_throughput = len(tickers) / elapsed if elapsed > 0 else float("inf")
         
-        if all_data:
-            # 반환형은 pandas.core.frame.DataFrame 인것으로 보임
-            return pd.concat(all_data)
-        return pd.DataFrame()
+        # 반환형은 pandas.core.frame.DataFrame 인것으로 보임
+        return self._combine_ohlcv(all_data,compact,memory_hook)
+
+    def _combine_ohlcv(self,all_data,compact=False,memory_hook=None):
+        """티커별로 전처리하지 않고 이어붙인 뒤 한 번에 지표 계산"""
+        if not all_data:
+            return pd.DataFrame()
+        combined = pd.concat(all_data,ignore_index=True)
+        if memory_hook is not None:
+            memory_hook("수집 원본",combined)
+        if compact:
+            # 지표 계산 전에 티커 문자열 반복부터 줄임
+            combined["ticker"] = combined["ticker"].astype("category")
+            if memory_hook is not None:
+                memory_hook("ticker category",combined)
+        processed = self.preprocess_data(combined,compact=compact)
+        if memory_hook is not None:
+            memory_hook("전처리 완료",processed)
+        return processed
+
+    def _get_multiple_ohlcv_concurrent(self,tickers,interval,count,max_workers,
+                                       max_retries,progress_callback):
+        """스레드 풀 + 토큰 버킷으로 여러 티커 동시 조회 (전처리 전 티커별 DataFrame 리스트)"""
+        tickers = list(tickers)
+        results = {}
+        done = 0
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._fetch_ohlcv_with_retry,ticker,interval,count,max_retries,False): ticker
+                for ticker in tickers
+            }
+            for future in as_completed(futures):
+                ticker = futures[future]
+                data = future.result()
+                if data is not None:
+                    results[ticker] = data
+                done += 1
+                if progress_callback is not None:
+                    progress_callback(done,len(tickers),ticker,data is not None)
+
+        elapsed = time.perf_counter() - started
+        self.last_throughput = len(tickers) / elapsed if elapsed > 0 else float("inf")
+        print(f"{len(results)}/{len(tickers)}개 티커 수집 완료 - {elapsed:.2f}초, "
+              f"{self.last_throughput:.1f} tickers/sec")
+
+        # 입력 티커 순서를 유지해서 순차 조회와 같은 결과가 나오도록 함
+        return [results[ticker] for ticker in tickers if ticker in results]
 
     def display(self,groupby="ticker",count=100):
         line_with = len(self.ohlcv_data.columns) * 13
@@ -142,7 +397,7 @@ class UpbitDataCollector:
 
     def collect_market_data(self,count=30):
         """시장 데이터 수집 함수"""
-        major_tickers = ['KRW-PUNDIX', 'KRW-USD1', 'KRW-BAT']
+        major_tickers = MAJOR_TICKERS
         
         print(f"\n분석 대상 티커 : {major_tickers}")
 
@@ -164,59 +419,94 @@ class UpbitDataCollector:
         self.collect_market_data(count)
         return self
 
-def create_database():
-    """SQLite 데이터베이스 생성 함수"""
-    conn = sqlite3.connect("crypto_data.db")
-    cursor = conn.cursor()
-    return conn
-def save_to_database(df):
-    """데이터베이스에 데이터 저장 함수"""
+def save_market_snapshot(collector,tickers=None,chunk_size=50,conn=None):
+    """KRW 마켓 전체 현재가 스냅샷을 수집해서 하나의 스냅샷으로 저장 (conn을 주면 재사용)"""
+    snapshot = collector.get_market_snapshot(tickers,chunk_size)
+    if len(snapshot) == 0:
+        return 0
+    own_conn = conn is None
+    if own_conn:
+        conn = create_database()
+    count = save_snapshot(snapshot,conn)
+    if own_conn:
+        conn.close()
+    return count
+
+def sync_ohlcv(collector,tickers,interval="day",count=30,table="crypto_ohlcv",conn=None):
+    """증분 동기화: 티커별 마지막 저장 시각 이후의 캔들만 받아서 upsert
+
+    저장된 적 없는 티커는 count개를 처음부터 받는다.
+    conn을 주면 그 커넥션을 사용하고 닫지 않는다 (scheduler.py처럼 반복 실행할 때)
+    """
+    print("=== 증분 동기화 시작 ===")
+    own_conn = conn is None
+    if own_conn:
+        conn = create_database()
+    create_ohlcv_table(conn,table)
+    latest = get_latest_dates(conn,table)
+
+    total = 0
+    for ticker in tickers:
+        since = latest.get(ticker)
+        if since is None:
+            df = collector.get_ohlcv_data(ticker,interval,count)
+        else:
+            df = collector.get_ohlcv_since(ticker,since,interval)
+        if df is None or len(df) == 0:
+            continue
+        total += upsert_to_database(df,conn,table)
+        print(f"{ticker}: {len(df)}개 캔들 반영 (마지막 저장 시각: {since})")
+
+    if own_conn:
+        conn.close()
+    print(f"증분 동기화 완료 - {total}개 레코드 반영")
+    return total
+
+def sync_ohlcv_rollups(collector,tickers,count=200,conn=None):
+    """minute1 봉만 API로 증분 동기화하고 minute5/minute60/day 봉은 로컬에서 집계
+
+    주기마다 따로 API를 호출하지 않으므로 요청 수가 줄어든다.
+    조회는 rollup.query_rollup (구간에 맞는 롤업 테이블 선택)
+    """
+    total = sync_ohlcv(collector,tickers,interval="minute1",count=count,table=ROLLUP_TABLES["minute1"],conn=conn)
+    counts = refresh_rollups(conn,tickers)
+    print(f"롤업 테이블 갱신 - {counts}")
+    return total
+def save_to_database(df,staging=False,validate=True,interval="day"):
+    """데이터베이스에 데이터 저장 함수
+
+    staging=True이면 스테이징 테이블에 쌓은 뒤 배치로 병합한다.
+    validate=True이면 저장 전에 품질 검사(quality.py)를 하고, 중복/날짜 역순이 있으면 정리해서 저장한다.
+    반환값은 이번에 저장한 행 수 (전체 테이블 count(*)는 다시 세지 않음)
+    """
     print("=== 데이터베이스 저장 시작 ===")
+    if validate:
+        report = check_ohlcv(df,interval)
+        if not report.ok:
+            print(f"품질 검사 : {report.summary()}")
+        if len(report.duplicates) or len(report.non_monotonic):
+            df = clean_ohlcv(df)
     conn = create_database()
 
-    db_df = df[['date_str', 'ticker', 'open', 'high', 'low', 'close', 'volume',
-               'price_change', 'price_change_pct', 'high_low_diff', 'ma5']].copy()
-    
-    db_df.to_sql("crypto_ohlcv",conn,if_exists="replace",index=False)
-
-    cursor = conn.cursor()
-    cursor.execute("select count(*) from crypto_ohlcv")
-    count  = cursor.fetchone()[0]
+    # 전체 테이블을 교체하지 않고 (ticker, date_str) 기준으로 upsert
+    if staging:
+        writer = StagingWriter(conn)
+        count = writer.append(df)
+        writer.merge()
+    else:
+        count = upsert_to_database(df,conn)
 
     print(f"데이터베이스에 {count}개 레코드 저장 완료")
     conn.close()
     return count 
 
-def plot_price_trends(df):
-    """가격 트렌드 시각화 함수"""
-    print("=== 가격 트렌드 시각화 ===")
-    # 날짜 컬럼을 datetime으로 변환
-    df['date'] = pd.to_datetime(df['date_str'])
-
-    # 고유 티커 목록
-    tickers = df['ticker'].unique()
-    
-    # 서브플롯 생성(가로1 , 새로 3 크기로 배치하고 차트 사이즈는 가로 18인치 세로 6인치)
-    fig, axes = plt.subplots(3,1,figsize=(15,8))
-    axes = axes.flatten()
-    
-    colors = ['red','blue','green']
-    for i,ticker in enumerate(tickers):
-        ticker_data = df[df["ticker"]==ticker].sort_values("date")
-        ticker_data['date'] = ticker_data['date'].dt.strftime('%m-%d')
-        ax = axes[i]
-        ax.plot(ticker_data["date"],ticker_data['close'],color=colors[0])
-        ax.plot(ticker_data["date"],ticker_data['ma5'],color=colors[1])
-        ax.set_title(f"{tickers} close / ma5 visualization ")
-        ax.set_xlabel("date")
-        ax.set_ylabel("price")
-        # print(ticker_data)
-    
-    plt.show()
-
 def load_from_database(table,where,orderby):
-    """데이터베이스에서 데이터 로드 함수"""
-    conn = sqlite3.connect("crypto_data.db")
+    """데이터베이스에서 데이터 로드 함수
+
+    where/orderby 문자열을 그대로 SQL에 넣으므로 외부 입력에는 쓰지 말 것.
+    일반적인 티커/날짜 범위 조회는 storage.query_ohlcv를 사용한다.
+    """
+    conn = sqlite3.connect(DB_PATH)
     query = f"select * from {table} where {where} order by {orderby}"
     df = pd.read_sql_query(query, conn)
     conn.close()
@@ -226,11 +516,12 @@ if __name__ == "__main__":
 
     upbit_collector = UpbitDataCollector()
     # ohlcv_data,current_pricea = upbit_collector.collect_market(30).display(groupby="ticker",count=30)
-    ohlcv_data,current_pricea = upbit_collector.collect_market_data(30)
+    # ohlcv_data,current_pricea = upbit_collector.collect_market_data(30)
+    # save_to_database(ohlcv_data)
 
-    
-    
-    save_to_database(ohlcv_data)
-    selectedRow = load_from_database("crypto_ohlcv","1=1"," date_str DESC ")
+    # 마지막 저장 시각 이후의 캔들만 받아서 반영
+    sync_ohlcv(upbit_collector,MAJOR_TICKERS,count=30)
+    # selectedRow = load_from_database("crypto_ohlcv","1=1"," date_str DESC ")
+    selectedRow = query_ohlcv(OhlcvQuery(descending=True))
     upbit_collector.print_datafram(selectedRow)
     plot_price_trends(selectedRow)
\ No newline at end of file
@@ -0,0 +1,200 @@
+"""
+저장된/수집한 캔들 데이터 품질 검사
+- 티커별 시계열을 벡터화해서 검사: 누락 구간(gap), 중복, 날짜 역순, OHLC 불변식
+  (low <= open/close <= high, 가격 > 0, 거래량 >= 0, 결측값)
+- DB 검사는 기본 키 (ticker, date_str) 순서 그대로 한 번에 읽으므로 정렬 비용이 없음
+- 누락 구간만 API로 다시 받아 채움 (구간 뒤 ma5 계산에 쓰이는 캔들도 다시 계산)
+
+Upbit는 거래가 없던 분에는 캔들을 만들지 않으므로, 거래가 적은 티커의 분봉 gap은
+백필해도 채워지지 않을 수 있다 (결과의 "채우지 못함"으로 보고).
+
+실행: python quality.py [--backfill]
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from cache import INTERVAL_PERIODS
+from frame_memory import epoch_to_datetime
+from storage import DB_PATH, create_database, upsert_to_database
+
+# gap 뒤에서 ma5를 다시 계산해야 하는 캔들 수 (ma5 -> 4개)
+REFRESH_AFTER_GAP = 4
+
+_CHECK_COLUMNS = ["date_str", "ticker", "open", "high", "low", "close", "volume"]
+
+
+def _parse_dates(df)->np.ndarray:
+    """date(datetime), date_str 또는 ts(compact) 컬럼을 datetime64 배열로 (고유한 문자열만 파싱)"""
+    if "date" in df.columns and pd.api.types.is_datetime64_any_dtype(df["date"]):
+        return df["date"].to_numpy(dtype="datetime64[ns]")
+    if "date_str" not in df.columns and "ts" in df.columns:
+        return epoch_to_datetime(df["ts"]).to_numpy(dtype="datetime64[ns]")
+    codes, uniques = pd.factorize(df["date_str"])
+    parsed = pd.to_datetime(uniques, format='%Y-%m-%d %H:%M:%S').to_numpy(dtype="datetime64[ns]")
+    return parsed[codes]
+
+
+@dataclass
+class QualityReport:
+    """check_ohlcv 결과
+
+    gaps         : ticker, start, end (누락된 첫/마지막 캔들 시각), missing (누락 캔들 수)
+    duplicates   : ticker, date, count (같은 시각 행 수)
+    non_monotonic: ticker, date, previous (입력 순서에서 이전 행보다 과거인 행)
+    invalid      : ticker, date, check (어긴 불변식 이름)
+    """
+    rows: int = 0
+    tickers: int = 0
+    gaps: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["ticker", "start", "end", "missing"]))
+    duplicates: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["ticker", "date", "count"]))
+    non_monotonic: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["ticker", "date", "previous"]))
+    invalid: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=["ticker", "date", "check"]))
+
+    @property
+    def ok(self)->bool:
+        return not (len(self.gaps) or len(self.duplicates) or len(self.non_monotonic) or len(self.invalid))
+
+    def summary(self)->str:
+        missing = int(self.gaps["missing"].sum()) if len(self.gaps) else 0
+        return (f"{self.tickers}개 티커 {self.rows:,}행 - 누락 구간 {len(self.gaps)}개({missing}캔들), "
+                f"중복 {len(self.duplicates)}, 날짜 역순 {len(self.non_monotonic)}, 불변식 위반 {len(self.invalid)}")
+
+
+def check_ohlcv(df, interval="day")->QualityReport:
+    """여러 티커가 섞인 OHLCV DataFrame 검사 (입력 순서 그대로 날짜 역순도 확인)
+
+    interval을 모르면(month 등 길이가 일정하지 않은 주기) gap 검사는 건너뛴다.
+    """
+    report = QualityReport(rows=len(df))
+    if len(df) == 0:
+        return report
+    codes, tickers = pd.factorize(df["ticker"])
+    tickers = np.asarray(tickers, dtype=object)
+    dates = _parse_dates(df)
+    report.tickers = len(tickers)
+
+    # 입력 순서에서 같은 티커인데 날짜가 줄어드는 행
+    same = codes[1:] == codes[:-1]
+    backwards = np.flatnonzero(same & (dates[1:] < dates[:-1])) + 1
+    if len(backwards):
+        report.non_monotonic = pd.DataFrame({
+            "ticker": tickers[codes[backwards]], "date": dates[backwards], "previous": dates[backwards - 1]})
+
+    # 중복/누락은 (ticker, date) 순으로 정렬해서 이웃한 행끼리 비교 (DB에서 읽은 경우는 이미 정렬됨)
+    is_sorted = np.all(codes[1:] >= codes[:-1]) and len(backwards) == 0
+    order = np.arange(len(df)) if is_sorted else np.lexsort((dates, codes))
+    codes_sorted, dates_sorted = codes[order], dates[order]
+    same = codes_sorted[1:] == codes_sorted[:-1]
+    delta = dates_sorted[1:] - dates_sorted[:-1]
+
+    dup = same & (delta == np.timedelta64(0))
+    if dup.any():
+        pos = np.flatnonzero(dup) + 1
+        dups = pd.DataFrame({"ticker": tickers[codes_sorted[pos]], "date": dates_sorted[pos]})
+        report.duplicates = (dups.groupby(["ticker", "date"], sort=False).size() + 1).rename("count").reset_index()
+
+    period = INTERVAL_PERIODS.get(interval)
+    if period is not None:
+        step = period.to_timedelta64()
+        gap = np.flatnonzero(same & (delta > step))
+        if len(gap):
+            report.gaps = pd.DataFrame({
+                "ticker": tickers[codes_sorted[gap]],
+                "start": dates_sorted[gap] + step,
+                "end": dates_sorted[gap + 1] - step,
+                "missing": (delta[gap] // step - 1).astype(int),
+            })
+
+    prices = {c: df[c].to_numpy(dtype=float) for c in ("open", "high", "low", "close")}
+    checks = {
+        "missing_price": np.isnan(np.column_stack(list(prices.values()))).any(axis=1),
+        "non_positive_price": (np.column_stack(list(prices.values())) <= 0).any(axis=1),
+        "high_below_low": prices["high"] < prices["low"],
+        "high_below_open_close": prices["high"] < np.maximum(prices["open"], prices["close"]),
+        "low_above_open_close": prices["low"] > np.minimum(prices["open"], prices["close"]),
+    }
+    if "volume" in df.columns:
+        checks["negative_volume"] = df["volume"].to_numpy(dtype=float) < 0
+    frames = []
+    for name, mask in checks.items():
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            frames.append(pd.DataFrame({"ticker": tickers[codes[rows]], "date": dates[rows], "check": name}))
+    if frames:
+        report.invalid = pd.concat(frames, ignore_index=True)
+    return report
+
+
+def clean_ohlcv(df)->pd.DataFrame:
+    """(ticker, 날짜) 순으로 정렬하고 중복 시각은 마지막 행만 남김"""
+    dates = _parse_dates(df)
+    codes, _ = pd.factorize(df["ticker"])
+    order = np.lexsort((dates, codes))
+    codes, dates = codes[order], dates[order]
+    # 다음 행과 (ticker, 날짜)가 다르면 그 시각의 마지막 행
+    keep = np.r_[(codes[1:] != codes[:-1]) | (dates[1:] != dates[:-1]), True]
+    return df.iloc[order[keep]].reset_index(drop=True)
+
+
+def scan_database(conn, table="crypto_ohlcv", interval="day", tickers=None)->QualityReport:
+    """저장된 테이블 전체(또는 tickers) 검사
+
+    WITHOUT ROWID 테이블은 기본 키 (ticker, date_str) 순서로 저장되어 있으므로
+    ORDER BY ticker, date_str는 정렬 없이 테이블을 순서대로 읽는다.
+    """
+    if not table.isidentifier():
+        raise ValueError(f"잘못된 테이블 이름입니다: {table}")
+    sql = f"SELECT {', '.join(_CHECK_COLUMNS)} FROM {table}"
+    params = []
+    if tickers:
+        sql += f" WHERE ticker IN ({', '.join('?' * len(tickers))})"
+        params.extend(tickers)
+    sql += " ORDER BY ticker, date_str"
+    return check_ohlcv(pd.read_sql_query(sql, conn, params=params), interval)
+
+
+def backfill_gaps(collector, gaps, interval="day", conn=None, table="crypto_ohlcv",
+                  refresh_after=REFRESH_AFTER_GAP)->pd.DataFrame:
+    """누락 구간만 API로 다시 받아 upsert
+
+    gap 뒤 refresh_after개 캔들도 함께 받아 덮어써서, 누락 구간에 걸쳐 계산된 ma5를 바로잡는다.
+    반환: gaps에 filled(채운 캔들 수), unfilled(채우지 못한 수) 컬럼을 붙인 DataFrame
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = create_database()
+    step = INTERVAL_PERIODS[interval]
+    filled = []
+    for gap in gaps.itertuples(index=False):
+        df = collector.get_ohlcv_range(gap.ticker, gap.start, gap.end + step * refresh_after, interval)
+        count = 0
+        if df is not None and len(df):
+            upsert_to_database(df, conn, table)
+            inside = _parse_dates(df)
+            count = int(((inside >= np.datetime64(gap.start)) & (inside <= np.datetime64(gap.end))).sum())
+        filled.append(count)
+        print(f"{gap.ticker}: {gap.start} ~ {gap.end} 누락 {gap.missing}개 중 {count}개 채움")
+    if own_conn:
+        conn.close()
+    result = gaps.assign(filled=filled)
+    return result.assign(unfilled=result["missing"] - result["filled"])
+
+
+if __name__ == "__main__":
+    conn = create_database(DB_PATH)
+    started = time.perf_counter()
+    report = scan_database(conn)
+    print(f"검사 완료 ({time.perf_counter() - started:.2f}초) : {report.summary()}")
+    if len(report.invalid):
+        print(report.invalid.head(20))
+    if "--backfill" in sys.argv and len(report.gaps):
+        from project import UpbitDataCollector
+
+        result = backfill_gaps(UpbitDataCollector(), report.gaps, conn=conn)
+        print(f"채우지 못함 (거래 없음 등) : {int(result['unfilled'].sum())}캔들")
+    conn.close()
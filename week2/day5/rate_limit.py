@@ -0,0 +1,68 @@
+"""
+Upbit API 호출 속도 제한 유틸리티
+- 토큰 버킷 기반 초당 요청 수 제한
+- 429(Too Many Requests) 재시도용 지수 백오프
+"""
+
+import random
+import threading
+import time
+
+# Upbit 시세(Quotation) API 초당 허용 요청 수
+UPBIT_QUOTATION_RATE = 10
+
+
+class TokenBucket:
+    """토큰 버킷 방식의 요청 속도 제한기 (여러 스레드에서 공유 가능)"""
+
+    def __init__(self, rate=UPBIT_QUOTATION_RATE, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """경과 시간만큼 토큰 보충 (lock을 잡은 상태에서 호출)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1)->bool:
+        """토큰이 있으면 즉시 차감하고 True, 없으면 False"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens=1):
+        """토큰을 얻을 때까지 대기"""
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def drain(self):
+        """429 응답을 받았을 때 남은 토큰을 비워 다른 스레드도 잠시 쉬게 함"""
+        with self._lock:
+            self._refill()
+            self._tokens = 0.0
+
+
+def is_rate_limited(error)->bool:
+    """429 오류인지 판별 (pyupbit.errors.TooManyRequests 또는 status 429)"""
+    if type(error).__name__ == "TooManyRequests":
+        return True
+    return getattr(error, "status_code", None) == 429
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0)->float:
+    """지수 백오프 대기 시간 (full jitter)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
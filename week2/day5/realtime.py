@@ -0,0 +1,211 @@
+"""
+Upbit WebSocket 실시간 수집
+- trade(또는 ticker) 스트림을 구독해서 체결을 1분봉 OHLCV로 집계
+- 마감된 분봉은 지표(ma5 등)를 붙여 배치 단위로 저장소에 upsert
+- 수신과 집계 사이에 크기 제한 큐를 두어 저장이 밀리면 수신도 멈춤(backpressure)
+- 분봉을 저장할 때마다 minute5/minute60/day 롤업 테이블도 증분 갱신 (rollup.py)
+
+pyupbit.WebSocketManager는 별도 프로세스에서 실제 Upbit 주소로만 접속하므로,
+접속 주소를 바꿀 수 있도록(로컬 가짜 서버 테스트용) websockets로 직접 구독한다.
+
+실행: python realtime.py KRW-BTC KRW-ETH
+"""
+
+import asyncio
+import json
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from rate_limit import backoff_delay
+from rollup import ROLLUP_TABLES, refresh_rollup
+from storage import DB_PATH, create_database, create_ohlcv_table, upsert_to_database
+from streaming_indicators import StreamingIndicators
+
+UPBIT_WS_URL = "wss://api.upbit.com/websocket/v1"
+KST = ZoneInfo("Asia/Seoul")
+
+
+class MinuteBarAggregator:
+    """체결을 티커별 N초(기본 60초) 봉으로 집계"""
+
+    def __init__(self, interval_seconds=60, grace_seconds=2.0):
+        self.interval_ms = int(interval_seconds * 1000)
+        self.grace_ms = int(grace_seconds * 1000)
+        self.bars = {}
+        self.late_trades = 0
+
+    def add_trade(self, ticker, price, volume, timestamp_ms)->list:
+        """체결 1건 반영. 새 봉이 시작되어 마감된 이전 봉이 있으면 리스트로 반환"""
+        start = timestamp_ms - timestamp_ms % self.interval_ms
+        bar = self.bars.get(ticker)
+        if bar is not None and (start < bar["start"] or (start == bar["start"] and bar["open"] is None)):
+            # 이미 내보낸 봉에 속하는 늦은 체결
+            self.late_trades += 1
+            return []
+        if bar is None or start > bar["start"]:
+            closed = [bar] if bar is not None and bar["open"] is not None else []
+            self.bars[ticker] = {
+                "ticker": ticker, "start": start,
+                "open": price, "high": price, "low": price, "close": price, "volume": volume,
+            }
+            return closed
+        bar["high"] = max(bar["high"], price)
+        bar["low"] = min(bar["low"], price)
+        bar["close"] = price
+        bar["volume"] += volume
+        return []
+
+    def flush(self, now_ms=None)->list:
+        """체결이 끊겨도 시간이 지나 마감된 봉을 내보냄"""
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        closed = [bar for bar in self.bars.values()
+                  if bar["open"] is not None and bar["start"] + self.interval_ms + self.grace_ms <= now_ms]
+        for bar in closed:
+            # 같은 봉의 늦은 체결이 봉을 다시 열지 않도록 시작 시각만 남김
+            self.bars[bar["ticker"]] = dict(bar, open=None)
+        return closed
+
+    @staticmethod
+    def date_str(bar)->str:
+        """봉 시작 시각을 pyupbit와 같은 KST 문자열로"""
+        return datetime.fromtimestamp(bar["start"] / 1000, KST).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class RealtimeIngestor:
+    """WebSocket 수신 -> 분봉 집계 -> 배치 저장 파이프라인"""
+
+    def __init__(self, tickers, url=UPBIT_WS_URL, stream="trade", db_path=DB_PATH,
+                 table="crypto_ohlcv_minute1", queue_size=10_000, overflow="block",
+                 batch_size=500, flush_interval=5.0, indicators=("ma5",), rollups=("minute5", "minute60", "day")):
+        if overflow not in ("block", "drop"):
+            raise ValueError("overflow는 block 또는 drop 이어야 합니다.")
+        self.tickers = list(tickers)
+        self.url = url
+        self.stream = stream
+        self.db_path = db_path
+        self.table = table
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # rollups: 저장 후 갱신할 롤업 주기 (table이 minute1 롤업 테이블일 때만 사용)
+        self.rollups = tuple(rollups) if table == ROLLUP_TABLES["minute1"] else ()
+        self.aggregator = MinuteBarAggregator()
+        self.indicators = StreamingIndicators(indicators)
+        self.pending = []
+        self.stats = {"messages": 0, "dropped": 0, "bars": 0, "written": 0, "reconnects": 0}
+        # sqlite 커넥션은 만든 스레드에서만 쓰므로 저장 전용 스레드 하나를 둠
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._conn = None
+
+    def _subscribe_message(self)->str:
+        return json.dumps([
+            {"ticket": str(uuid.uuid4())[:8]},
+            {"type": self.stream, "codes": self.tickers, "isOnlyRealtime": True},
+        ])
+
+    async def _reader(self, queue, stop_event):
+        """WebSocket 메시지를 큐에 넣음 (연결이 끊기면 백오프 후 재접속)"""
+        import websockets
+
+        attempt = 0
+        while not stop_event.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=60) as ws:
+                    await ws.send(self._subscribe_message())
+                    attempt = 0
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        self.stats["messages"] += 1
+                        if self.overflow == "drop" and queue.full():
+                            self.stats["dropped"] += 1
+                            continue
+                        await queue.put(message)
+                        if stop_event.is_set():
+                            return
+            except (OSError, websockets.ConnectionClosed) as e:
+                if stop_event.is_set():
+                    return
+                self.stats["reconnects"] += 1
+                print(f"WebSocket 연결 끊김 : {e} - 재접속 대기")
+                await asyncio.sleep(backoff_delay(attempt, base=1.0, cap=30.0))
+                attempt += 1
+
+    def _add_bars(self, bars):
+        for bar in bars:
+            candle = dict(bar, date_str=self.aggregator.date_str(bar))
+            row = self.indicators.update(bar["ticker"], candle)
+            if row is not None:
+                self.pending.append(row)
+                self.stats["bars"] += 1
+
+    async def _consumer(self, queue, stop_event):
+        """큐에서 체결을 꺼내 집계하고 주기적으로 저장"""
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        while not (stop_event.is_set() and queue.empty()):
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                message = None
+            if message is not None:
+                ticker = message.get("code") or message.get("cd")
+                self._add_bars(self.aggregator.add_trade(
+                    ticker, message["trade_price"], message["trade_volume"], message["trade_timestamp"]))
+            if len(self.pending) >= self.batch_size or loop.time() - last_flush >= self.flush_interval:
+                self._add_bars(self.aggregator.flush())
+                await self._flush()
+                last_flush = loop.time()
+        await self._flush()
+
+    async def _flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        loop = asyncio.get_running_loop()
+        self.stats["written"] += await loop.run_in_executor(self._executor, self._write, rows)
+
+    def _open(self):
+        """저장 스레드에서 커넥션을 열고 저장된 분봉으로 지표 상태를 채움"""
+        self._conn = create_database(self.db_path)
+        create_ohlcv_table(self._conn, self.table)
+        self.indicators.seed_from_database(self._conn, self.table, self.tickers)
+
+    def _write(self, rows)->int:
+        df = pd.DataFrame(rows)
+        count = upsert_to_database(df, self._conn, self.table)
+        tickers = df["ticker"].unique().tolist()
+        for interval in self.rollups:
+            refresh_rollup(self._conn, interval, tickers)
+        return count
+
+    async def run(self, stop_event=None):
+        """stop_event가 set 될 때까지 수집 (없으면 계속)"""
+        stop_event = stop_event or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._open)
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        reader = asyncio.create_task(self._reader(queue, stop_event))
+        try:
+            await self._consumer(queue, stop_event)
+        finally:
+            reader.cancel()
+            await asyncio.gather(reader, return_exceptions=True)
+            await loop.run_in_executor(self._executor, self._conn.close)
+            self._executor.shutdown()
+        return self.stats
+
+
+if __name__ == "__main__":
+    tickers = sys.argv[1:] or ["KRW-BTC", "KRW-ETH"]
+    ingestor = RealtimeIngestor(tickers)
+    try:
+        asyncio.run(ingestor.run())
+    except KeyboardInterrupt:
+        print(f"수집 종료 : {ingestor.stats}")
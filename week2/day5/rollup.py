@@ -0,0 +1,180 @@
+"""
+다중 주기 OHLCV 롤업
+- API에서는 가장 짧은 주기(minute1)만 받아 저장
+- minute5 / minute60 / day 봉은 로컬에서 벡터화 집계해서 롤업 테이블로 저장
+- 롤업은 마지막으로 저장된 봉부터 다시 집계하는 방식으로 증분 갱신
+  (minute1 -> minute5 -> minute60 -> day 순으로 바로 아래 주기 테이블을 읽음)
+- 대시보드 조회는 요청 구간을 충분한 해상도로 덮는 가장 긴 주기 테이블을 사용
+
+실행: python rollup.py   (저장된 minute1 봉으로 롤업 테이블 갱신)
+"""
+
+import numpy as np
+import pandas as pd
+
+from indicators import compute_indicators, format_date_str
+from storage import (DB_PATH, OHLCV_COLUMNS, OhlcvQuery, create_database, create_ohlcv_table,
+                     get_latest_dates, query_ohlcv, upsert_to_database)
+
+# 주기별 테이블 (짧은 주기 -> 긴 주기 순)
+ROLLUP_TABLES = {
+    "minute1": "crypto_ohlcv_minute1",
+    "minute5": "crypto_ohlcv_minute5",
+    "minute60": "crypto_ohlcv_minute60",
+    "day": "crypto_ohlcv_day",
+}
+
+# 주기별 (봉 길이, 시작 시각 오프셋). Upbit 일봉은 KST 09:00(UTC 00:00)에 시작한다
+ROLLUP_PERIODS = {
+    "minute1": (pd.Timedelta(minutes=1), pd.Timedelta(0)),
+    "minute5": (pd.Timedelta(minutes=5), pd.Timedelta(0)),
+    "minute60": (pd.Timedelta(hours=1), pd.Timedelta(0)),
+    "day": (pd.Timedelta(days=1), pd.Timedelta(hours=9)),
+}
+
+# 롤업 테이블별 원본 주기
+ROLLUP_SOURCES = {"minute5": "minute1", "minute60": "minute5", "day": "minute60"}
+
+# 이동평균(ma5) 계산을 위해 다시 집계하는 이전 봉 수
+ROLLUP_WARMUP = 4
+
+_RAW_COLUMNS = ["date_str", "ticker", "open", "high", "low", "close", "volume"]
+
+
+def bucket_start(dates, interval):
+    """각 시각이 속하는 interval 봉의 시작 시각"""
+    period, offset = ROLLUP_PERIODS[interval]
+    ns = np.asarray(dates, dtype="datetime64[ns]").view("int64")
+    step, shift = period.value, offset.value
+    return ((ns - shift) // step * step + shift).view("datetime64[ns]")
+
+
+def resample_ohlcv(df, interval)->pd.DataFrame:
+    """짧은 주기 OHLCV를 interval 봉으로 집계 (여러 티커를 한 번에)
+
+    df에는 ticker, open, high, low, close, volume과 date(datetime) 또는 date_str 컬럼이 있어야 한다.
+    반환: date, ticker, open, high, low, close, volume (티커 첫 등장 순서, 날짜 순)
+    """
+    if len(df) == 0:
+        return pd.DataFrame(columns=["date", "ticker", "open", "high", "low", "close", "volume"])
+    if "date" in df.columns:
+        dates = df["date"].to_numpy(dtype="datetime64[ns]")
+    else:
+        dates = pd.to_datetime(df["date_str"], format='%Y-%m-%d %H:%M:%S').to_numpy()
+    codes, uniques = pd.factorize(df["ticker"])
+    order = np.lexsort((dates, codes))
+    codes = codes[order]
+    dates = dates[order]
+    buckets = bucket_start(dates, interval)
+
+    # (티커, 봉 시작 시각)이 바뀌는 위치가 각 봉의 첫 행
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]) | (buckets[1:] != buckets[:-1])])
+    ends = np.r_[starts[1:], len(order)] - 1
+    values = {c: df[c].to_numpy(dtype=float)[order] for c in ("open", "high", "low", "close", "volume")}
+    return pd.DataFrame({
+        "date": buckets[starts],
+        "ticker": uniques[codes[starts]],
+        "open": values["open"][starts],
+        "high": np.maximum.reduceat(values["high"], starts),
+        "low": np.minimum.reduceat(values["low"], starts),
+        "close": values["close"][ends],
+        "volume": np.add.reduceat(values["volume"], starts),
+    })
+
+
+def _finish_bars(bars)->pd.DataFrame:
+    """집계한 봉에 crypto_ohlcv와 같은 파생 컬럼(ma5 등)을 붙임"""
+    bars = compute_indicators(bars, ("ma5",))
+    bars["date_str"] = format_date_str(bars["date"])
+    bars["price_change"] = bars["close"] - bars["open"]
+    bars["price_change_pct"] = bars["price_change"] / bars["open"] * 100
+    bars["high_low_diff"] = bars["high"] - bars["low"]
+    bars["ma5"] = bars["ma5"].fillna(bars["close"])
+    return bars[OHLCV_COLUMNS]
+
+
+def refresh_rollup(conn, interval, tickers=None, warmup=ROLLUP_WARMUP)->int:
+    """interval 롤업 테이블을 원본 주기 테이블로부터 증분 갱신
+
+    티커별 마지막 롤업 봉은 집계 당시 진행 중이었을 수 있으므로 다시 집계해서 덮어쓰고,
+    ma5 계산을 위해 그 이전 warmup개 봉 구간도 함께 읽는다(저장은 하지 않음).
+    처음 집계하는 티커는 원본이 시작 시각부터 덮는 봉만 저장한다.
+    """
+    source = ROLLUP_SOURCES[interval]
+    source_table, table = ROLLUP_TABLES[source], ROLLUP_TABLES[interval]
+    create_ohlcv_table(conn, source_table)
+    create_ohlcv_table(conn, table)
+    period, _ = ROLLUP_PERIODS[interval]
+    latest = get_latest_dates(conn, table)
+    tickers = list(tickers) if tickers else list(get_latest_dates(conn, source_table))
+
+    frames = []
+    resume = {}
+    for ticker in tickers:
+        query = OhlcvQuery(tickers=[ticker], columns=_RAW_COLUMNS, table=source_table)
+        if ticker in latest:
+            resume[ticker] = pd.Timestamp(latest[ticker])
+            query.start = resume[ticker] - period * warmup
+        sql, params = query.to_sql()
+        frame = pd.read_sql_query(sql, conn, params=params)
+        if ticker not in latest and len(frame):
+            # 처음 집계할 때 원본이 봉 중간부터 시작하면 첫 봉은 일부 구간만으로 집계되므로 저장하지 않음
+            # (이후 갱신은 마지막 롤업 봉부터 이어가므로 나중에 다시 채워지지 않음)
+            first = pd.Timestamp(frame["date_str"].iloc[0])
+            start = pd.Timestamp(bucket_start([first.to_datetime64()], interval)[0])
+            if start != first:
+                resume[ticker] = start + period
+        frames.append(frame)
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return 0
+
+    bars = _finish_bars(resample_ohlcv(pd.concat(frames, ignore_index=True), interval))
+    # warmup 구간은 이미 저장된 봉이므로, 원본이 중간부터 시작하는 첫 봉은 불완전하므로 제외
+    since = bars["ticker"].map(resume).fillna(pd.Timestamp.min)
+    dates = pd.to_datetime(bars["date_str"], format='%Y-%m-%d %H:%M:%S')
+    bars = bars[dates >= since]
+    return upsert_to_database(bars, conn, table)
+
+
+def refresh_rollups(conn=None, tickers=None, db_path=DB_PATH)->dict:
+    """모든 롤업 테이블을 짧은 주기부터 차례로 갱신 -> {interval: 반영 행 수}"""
+    own_conn = conn is None
+    if own_conn:
+        conn = create_database(db_path)
+    counts = {interval: refresh_rollup(conn, interval, tickers) for interval in ROLLUP_SOURCES}
+    if own_conn:
+        conn.close()
+    return counts
+
+
+def choose_interval(start, end, min_points=300)->str:
+    """start~end 구간에서 봉이 min_points개 이상 나오는 가장 긴 주기
+
+    긴 주기 테이블일수록 읽는 행이 적으므로, 차트 해상도를 만족하는 한 가장 긴 주기를 고른다.
+    어느 주기도 만족하지 못하면(짧은 구간) 가장 짧은 주기.
+    """
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    for interval in reversed(ROLLUP_TABLES):
+        period, _ = ROLLUP_PERIODS[interval]
+        if span / period >= min_points:
+            return interval
+    return next(iter(ROLLUP_TABLES))
+
+
+def query_rollup(start, end=None, tickers=None, columns=None, min_points=300,
+                 interval=None, db_path=DB_PATH)->pd.DataFrame:
+    """대시보드용 조회: 구간에 맞는 롤업 테이블을 골라 읽음 (interval을 주면 그 주기 사용)
+
+    반환 DataFrame의 attrs["interval"]에 사용한 주기를 기록한다.
+    """
+    end = end if end is not None else pd.Timestamp.now(tz="Asia/Seoul").tz_localize(None)
+    interval = interval or choose_interval(start, end, min_points)
+    df = query_ohlcv(db_path=db_path, tickers=tickers, start=start, end=end, columns=columns,
+                     table=ROLLUP_TABLES[interval])
+    df.attrs["interval"] = interval
+    return df
+
+
+if __name__ == "__main__":
+    print(refresh_rollups())
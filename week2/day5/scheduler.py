@@ -0,0 +1,283 @@
+"""
+수집 파이프라인 상주 스케줄러
+- 작업별 cron 형식 스케줄 ("분 시 일 월 요일", KST) + 실행 시각 지터
+- 수집기(UpbitDataCollector)와 DB 커넥션을 프로세스가 살아있는 동안 재사용
+  (실행마다 인터프리터 시작, pandas/pyupbit import 비용이 들지 않음)
+- 이전 실행이 아직 끝나지 않았으면 이번 실행은 건너뜀
+- 작업별 실행 시간 / 반영 행 수 / 실패 / 건너뜀 지표
+
+실행: python scheduler.py   (Ctrl+C 또는 SIGTERM으로 종료)
+"""
+
+import random
+import signal
+import sqlite3
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+
+from storage import DB_PATH, create_database
+
+KST = ZoneInfo("Asia/Seoul")
+
+
+class CronSchedule:
+    """5필드 cron 표현식 ("*/5 * * * *")의 다음 실행 시각 계산
+
+    각 필드는 *, 숫자, a-b 범위, */n 또는 a-b/n 간격, 콤마 목록을 지원한다.
+    요일은 0=일요일 (7도 일요일). 일/요일이 둘 다 지정되면 cron처럼 둘 중 하나만 맞아도 실행.
+    """
+
+    FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 6))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 표현식은 5개 필드여야 합니다: {expression}")
+        self.expression = expression
+        values = {}
+        for (name, low, high), part in zip(self.FIELDS, parts):
+            values[name] = self._parse_field(part, low, high if name != "weekday" else 7)
+        values["weekday"] = {v % 7 for v in values["weekday"]}
+        self.minutes, self.hours = values["minute"], values["hour"]
+        self.days, self.months, self.weekdays = values["day"], values["month"], values["weekday"]
+        self._any_day = parts[2] == "*"
+        self._any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(part, low, high)->set:
+        result = set()
+        for item in part.split(","):
+            step = 1
+            if "/" in item:
+                item, step = item.split("/")
+                step = int(step)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = map(int, item.split("-"))
+            else:
+                start = end = int(item)
+                if step != 1:
+                    end = high
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"잘못된 cron 필드입니다: {part}")
+            result.update(range(start, end + 1, step))
+        return result
+
+    def _day_matches(self, dt)->bool:
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        if self._any_day:
+            return weekday_ok
+        if self._any_weekday:
+            return day_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, dt)->datetime:
+        """dt 이후(미포함) 첫 실행 시각 (분 단위)"""
+        t = dt.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 맞지 않는 월/일/시는 통째로 건너뛰므로 최대 몇천 번 안에 끝남
+        for _ in range(100_000):
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"실행 시각을 찾을 수 없습니다: {self.expression}")
+
+
+@dataclass
+class JobMetrics:
+    """작업별 실행 지표 (시간은 초)"""
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    rows: int = 0
+    last_rows: int = 0
+    last_seconds: float = 0.0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    last_started: Optional[str] = None
+    last_error: Optional[str] = None
+
+    @property
+    def avg_seconds(self)->float:
+        return self.total_seconds / self.runs if self.runs else 0.0
+
+
+@dataclass
+class Job:
+    """func(context) -> 반영 행 수 를 schedule(cron)마다 실행
+
+    jitter: 실행 시각에 더하는 0~jitter초 무작위 지연 (여러 작업/프로세스의 요청이 몰리지 않도록)
+    """
+    name: str
+    func: Callable
+    schedule: str
+    jitter: float = 0.0
+    cron: CronSchedule = field(init=False)
+    next_run: Optional[datetime] = None
+    future: object = None
+    metrics: JobMetrics = field(default_factory=JobMetrics)
+
+    def __post_init__(self):
+        self.cron = CronSchedule(self.schedule)
+
+    def plan(self, now):
+        self.next_run = self.cron.next_after(now) + timedelta(seconds=random.uniform(0, self.jitter))
+
+
+class PipelineContext:
+    """실행 사이에 유지되는 수집기와 DB 커넥션
+
+    sqlite 커넥션은 스레드 사이에 공유하지 않고, 작업 스레드마다 하나씩 만들어 계속 재사용한다.
+    """
+
+    def __init__(self, collector=None, db_path=DB_PATH):
+        if collector is None:
+            from project import UpbitDataCollector
+            collector = UpbitDataCollector()
+        self.collector = collector
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self)->sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 종료 시 메인 스레드에서 닫을 수 있도록 check_same_thread=False
+            conn = create_database(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class Scheduler:
+    """cron 스케줄로 작업을 실행하는 상주 루프"""
+
+    def __init__(self, context, jobs=(), max_workers=4, report_every=300.0):
+        self.context = context
+        self.jobs = list(jobs)
+        self.report_every = report_every
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._stop = threading.Event()
+
+    def add_job(self, name, func, schedule, jitter=0.0)->Job:
+        job = Job(name, func, schedule, jitter)
+        self.jobs.append(job)
+        return job
+
+    def _run(self, job):
+        metrics = job.metrics
+        metrics.last_started = datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
+        started = time.perf_counter()
+        failed = False
+        try:
+            rows = job.func(self.context) or 0
+        except Exception as e:
+            failed = True
+            metrics.failures += 1
+            metrics.last_error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+            rows = 0
+        elapsed = time.perf_counter() - started
+        metrics.runs += 1
+        metrics.last_rows = rows
+        metrics.rows += rows
+        metrics.last_seconds = elapsed
+        metrics.total_seconds += elapsed
+        metrics.max_seconds = max(metrics.max_seconds, elapsed)
+        if failed:
+            print(f"[{job.name}] 실패 - {metrics.last_error}, {elapsed:.2f}초")
+        else:
+            print(f"[{job.name}] 완료 - {rows}개 행, {elapsed:.2f}초")
+
+    def _fire(self, job, now):
+        if job.future is not None and not job.future.done():
+            # 이전 실행이 끝나지 않았으면 겹쳐 실행하지 않음
+            job.metrics.skipped += 1
+            print(f"[{job.name}] 이전 실행 중 - 건너뜀")
+        else:
+            job.future = self._executor.submit(self._run, job)
+        job.plan(now)
+
+    def metrics(self)->dict:
+        """작업 이름 -> 지표 dict"""
+        return {job.name: dict(asdict(job.metrics), avg_seconds=job.metrics.avg_seconds) for job in self.jobs}
+
+    def report(self):
+        for name, m in self.metrics().items():
+            print(f"[지표] {name}: 실행 {m['runs']}회 (실패 {m['failures']}, 건너뜀 {m['skipped']}), "
+                  f"행 {m['rows']}개, 평균 {m['avg_seconds']:.2f}초 / 최대 {m['max_seconds']:.2f}초")
+
+    def stop(self, *_):
+        self._stop.set()
+
+    def run(self):
+        """stop()이 호출될 때까지 실행 후 실행 중인 작업을 기다리고 커넥션을 닫음"""
+        now = datetime.now(KST)
+        for job in self.jobs:
+            job.plan(now)
+        last_report = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                now = datetime.now(KST)
+                for job in self.jobs:
+                    if job.next_run <= now:
+                        self._fire(job, now)
+                if time.monotonic() - last_report >= self.report_every:
+                    self.report()
+                    last_report = time.monotonic()
+                # 작업이 없으면 report_every마다 보고만 함
+                wait = self.report_every
+                if self.jobs:
+                    wait = min(wait, (min(job.next_run for job in self.jobs) - datetime.now(KST)).total_seconds())
+                self._stop.wait(max(0.0, wait))
+        finally:
+            self._executor.shutdown(wait=True)
+            self.report()
+            self.context.close()
+
+
+def default_jobs(tickers):
+    """기본 작업: 분봉+롤업(매분), 롤업 재집계(매일 09:05 KST 일봉 마감 직후), 시장 스냅샷(5분마다)
+
+    API로는 minute1 봉만 받고 minute5/minute60/day 봉은 로컬에서 집계한다 (rollup.py).
+    """
+    from project import save_market_snapshot, sync_ohlcv_rollups
+    from rollup import refresh_rollups
+
+    return [
+        Job("minute1", lambda ctx: sync_ohlcv_rollups(ctx.collector, tickers, conn=ctx.conn), "* * * * *", jitter=5),
+        Job("rollups", lambda ctx: sum(refresh_rollups(ctx.conn, tickers).values()), "5 9 * * *", jitter=30),
+        Job("snapshot", lambda ctx: save_market_snapshot(ctx.collector, conn=ctx.conn), "*/5 * * * *", jitter=10),
+    ]
+
+
+if __name__ == "__main__":
+    from project import MAJOR_TICKERS
+
+    scheduler = Scheduler(PipelineContext(), default_jobs(MAJOR_TICKERS))
+    signal.signal(signal.SIGTERM, scheduler.stop)
+    signal.signal(signal.SIGINT, scheduler.stop)
+    scheduler.run()
@@ -0,0 +1,240 @@
+"""
+KRW 마켓 스크리닝 / BTC 대비 상관관계
+- crypto_ohlcv에서 (날짜 x 티커) 정렬 행렬(close, price_change_pct, high_low_diff)을 만들어 메모리에 유지
+- 새 캔들이 저장되면 마지막 날짜 이후 행만 읽어 행렬 끝에 추가 (증분 갱신)
+- 이동 상관계수/공분산은 누적합으로 모든 티커를 한 번에, 티커 block개씩 나눠 계산
+- 이동 상관계수 결과도 캐시해서 새로 추가된 행만 계산
+
+실행: python screening.py
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from storage import DB_PATH, query_ohlcv
+
+REFERENCE_TICKER = "KRW-BTC"
+MATRIX_FIELDS = ("close", "price_change_pct", "high_low_diff")
+
+
+class _Rows:
+    """행 추가가 잦은 2차원 배열 (용량을 두 배씩 늘려 추가 비용을 새 행 수에 비례하게 유지)"""
+
+    def __init__(self, n_cols, capacity=1024):
+        self.data = np.full((capacity, n_cols), np.nan)
+        self.n = 0
+
+    def view(self)->np.ndarray:
+        return self.data[:self.n]
+
+    def append(self, rows):
+        needed = self.n + len(rows)
+        if needed > len(self.data):
+            grown = np.full((max(needed, len(self.data) * 2), self.data.shape[1]), np.nan)
+            grown[:self.n] = self.data[:self.n]
+            self.data = grown
+        self.data[self.n:needed] = rows
+        self.n = needed
+
+
+def _to_matrix(df, field, dates, tickers)->np.ndarray:
+    """(date_str, ticker, 값) 행을 dates x tickers 배열로 (없는 칸은 NaN)"""
+    matrix = np.full((len(dates), len(tickers)), np.nan)
+    rows = pd.Index(dates).get_indexer(df["date_str"])
+    cols = pd.Index(tickers).get_indexer(df["ticker"])
+    matrix[rows, cols] = df[field].to_numpy(dtype=float)
+    return matrix
+
+
+class AlignedMatrix:
+    """crypto_ohlcv의 날짜 x 티커 정렬 행렬 (증분 추가)
+
+    refresh()는 마지막으로 읽은 날짜(진행 중이던 캔들일 수 있으므로 포함) 이후 행만 조회한다.
+    (date_str, ticker) 인덱스로 범위 조회하므로 읽는 행 수가 새 캔들 수에 비례한다.
+    새 티커가 생기거나 과거 구간이 백필되면 reload()로 다시 만든다.
+    """
+
+    def __init__(self, table="crypto_ohlcv", db_path=DB_PATH, fields=MATRIX_FIELDS, tickers=None):
+        self.table = table
+        self.db_path = db_path
+        self.fields = tuple(fields)
+        self.only_tickers = tickers
+        self.version = 0
+        self.reload()
+
+    def reload(self):
+        df = self._query()
+        self.tickers = sorted(df["ticker"].unique())
+        dates = sorted(df["date_str"].unique())
+        self.dates = list(dates)
+        self._rows = {}
+        for field in self.fields:
+            self._rows[field] = _Rows(len(self.tickers), capacity=max(1024, len(dates) * 2))
+            self._rows[field].append(_to_matrix(df, field, dates, self.tickers))
+        self.version += 1
+        return len(dates)
+
+    def _query(self, start=None):
+        return query_ohlcv(db_path=self.db_path, table=self.table, tickers=self.only_tickers, start=start,
+                           columns=["date_str", "ticker", *self.fields])
+
+    def refresh(self)->int:
+        """마지막 날짜 이후 행 반영 -> 행렬에서 다시 계산해야 하는 첫 행 위치 (변화 없으면 행 수)"""
+        if not self.dates:
+            self.reload()
+            return 0
+        df = self._query(start=self.dates[-1])
+        if len(df) == 0:
+            return len(self.dates)
+        if not set(df["ticker"].unique()) <= set(self.tickers):
+            self.reload()
+            return 0
+        new_dates = sorted(d for d in df["date_str"].unique() if d > self.dates[-1])
+        dates = [self.dates[-1]] + new_dates
+        for field in self.fields:
+            rows = self._rows[field]
+            block = _to_matrix(df, field, dates, self.tickers)
+            # 마지막 행은 진행 중이던 캔들이 갱신됐을 수 있으므로 덮어쓴다
+            last = rows.data[rows.n - 1]
+            rows.data[rows.n - 1] = np.where(np.isnan(block[0]), last, block[0])
+            rows.append(block[1:])
+        self.dates.extend(new_dates)
+        return len(self.dates) - len(new_dates) - 1
+
+    def values(self, field="close")->np.ndarray:
+        return self._rows[field].view()
+
+    def frame(self, field="close")->pd.DataFrame:
+        index = pd.to_datetime(pd.Index(self.dates), format='%Y-%m-%d %H:%M:%S')
+        return pd.DataFrame(self.values(field), index=index, columns=self.tickers)
+
+
+def _window_sum(values, window):
+    """열별 이동 합 (앞부분 window-1행은 NaN)"""
+    csum = np.cumsum(values, axis=0)
+    result = np.full_like(values, np.nan)
+    if window <= len(values):
+        result[window - 1:] = csum[window - 1:]
+        result[window:] -= csum[:-window]
+    return result
+
+
+def rolling_cov_corr(values, reference, window, block=256):
+    """각 열과 reference 열의 이동 공분산 / 상관계수 (창 안에 NaN이 있으면 NaN)
+
+    values: (T, N), reference: (T,)
+    누적합 차이로 창 합을 구하므로 창 크기와 관계없이 O(T x N), 티커 block개씩 나눠 메모리를 제한한다.
+    """
+    ref = reference[:, None]
+    ref_valid = ~np.isnan(ref)
+    cov = np.full(values.shape, np.nan)
+    corr = np.full(values.shape, np.nan)
+    for start in range(0, values.shape[1], block):
+        x = values[:, start:start + block]
+        valid = ~np.isnan(x) & ref_valid
+        x0 = np.where(valid, x, 0.0)
+        y0 = np.where(valid, ref, 0.0)
+        count = _window_sum(valid.astype(float), window)
+        sx, sy = _window_sum(x0, window), _window_sum(y0, window)
+        sxy, sxx, syy = _window_sum(x0 * y0, window), _window_sum(x0 * x0, window), _window_sum(y0 * y0, window)
+        full = count == window
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = (sxy - sx * sy / window) / (window - 1)
+            vx = (sxx - sx * sx / window) / (window - 1)
+            vy = (syy - sy * sy / window) / (window - 1)
+            r = c / np.sqrt(vx * vy)
+        cov[:, start:start + block] = np.where(full, c, np.nan)
+        corr[:, start:start + block] = np.where(full, np.clip(r, -1, 1), np.nan)
+    return cov, corr
+
+
+def simple_returns(close)->np.ndarray:
+    returns = np.full_like(close, np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1
+    return returns
+
+
+class ScreeningEngine:
+    """정렬 행렬 + BTC 대비 이동 상관/공분산 캐시
+
+    update()는 행렬을 증분 갱신하고, 이동 통계도 바뀐 행(과 그 앞 window행)만 다시 계산한다.
+    """
+
+    def __init__(self, matrix, reference=REFERENCE_TICKER, window=30, block=256):
+        if reference not in matrix.tickers:
+            raise ValueError(f"기준 티커가 없습니다: {reference}")
+        self.matrix = matrix
+        self.reference = reference
+        self.window = window
+        self.block = block
+        self._version = None
+        self._cov = None
+        self._corr = None
+
+    def _recompute(self, start):
+        close = self.matrix.values("close")
+        ref = self.matrix.tickers.index(self.reference)
+        if self._version != self.matrix.version:
+            start = 0
+            self._version = self.matrix.version
+            self._cov, self._corr = _Rows(close.shape[1]), _Rows(close.shape[1])
+        # start 행부터 다시 계산하려면 수익률 계산용 1행 + 창 window행이 앞에 필요
+        begin = max(0, start - self.window)
+        returns = simple_returns(close[begin:])
+        cov, corr = rolling_cov_corr(returns, returns[:, ref], self.window, self.block)
+        for cache, result in ((self._cov, cov), (self._corr, corr)):
+            cache.n = min(cache.n, start)
+            cache.append(result[start - begin:])
+
+    def update(self)->int:
+        """DB의 새 캔들 반영 -> 다시 계산한 행 수"""
+        start = self.matrix.refresh()
+        if self._version != self.matrix.version or start < self._corr.n:
+            before = len(self.matrix.dates)
+            self._recompute(start)
+            return before - start
+        return 0
+
+    def correlation(self)->pd.DataFrame:
+        """티커별 BTC 수익률과의 이동 상관계수 (날짜 x 티커)"""
+        if self._corr is None:
+            self._recompute(0)
+        frame = self.matrix.frame("close")
+        return pd.DataFrame(self._corr.view(), index=frame.index, columns=frame.columns)
+
+    def screen(self)->pd.DataFrame:
+        """최근 캔들 기준 티커별 지표
+
+        price_change_pct : 마지막 캔들 시가 대비 종가 변화율(%)
+        return_pct       : 최근 window 캔들 수익률(%)
+        volatility_pct   : 최근 window 캔들 평균 (high_low_diff / close) (%)
+        corr_btc / beta  : 최근 window 캔들 수익률의 BTC 대비 상관계수 / 베타
+        """
+        if self._corr is None:
+            self._recompute(0)
+        close = self.matrix.values("close")
+        tail = slice(max(0, len(close) - self.window), len(close))
+        ref = self.matrix.tickers.index(self.reference)
+        cov = self._cov.view()[-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            volatility = np.nanmean(self.matrix.values("high_low_diff")[tail] / close[tail], axis=0) * 100
+            result = pd.DataFrame({
+                "price_change_pct": self.matrix.values("price_change_pct")[-1],
+                "return_pct": (close[-1] / close[tail.start] - 1) * 100,
+                "volatility_pct": volatility,
+                "corr_btc": self._corr.view()[-1],
+                "beta": cov / cov[ref],
+            }, index=pd.Index(self.matrix.tickers, name="ticker"))
+        return result.sort_values("corr_btc", ascending=False)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    engine = ScreeningEngine(AlignedMatrix())
+    print(engine.screen())
+    print(f"초기 계산 {time.perf_counter() - started:.3f}초")
+    started = time.perf_counter()
+    engine.update()
+    print(f"증분 갱신 {time.perf_counter() - started:.3f}초")
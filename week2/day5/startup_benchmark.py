@@ -0,0 +1,80 @@
+"""
+수집 경로 시작 시간 측정 (python -X importtime)
+- 새 인터프리터에서 `import project` + UpbitDataCollector 생성까지의 import 시간 측정
+- 누적 시간이 큰 최상위 모듈 목록 출력
+- matplotlib 등 수집에 필요 없는 모듈이 import 되었는지 확인
+- 예산(STARTUP_BUDGET_MS)을 넘으면 종료 코드 1 (CI에서 사용 가능)
+
+실행: python startup_benchmark.py [반복 횟수]
+"""
+
+import re
+import subprocess
+import sys
+import time
+
+# 수집 전용 경로의 콜드 스타트 예산 (인터프리터 시작 제외, import 누적 시간 중앙값 기준)
+STARTUP_BUDGET_MS = 1200
+
+# 수집 경로에서 import 되면 안 되는 모듈 (차트는 필요할 때만 import)
+# pyarrow는 pandas가, websockets는 pyupbit가 직접 import 하므로 제외
+FORBIDDEN_MODULES = ("matplotlib",)
+
+COLLECTION_CODE = "import project; project.UpbitDataCollector()"
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure_import(code=COLLECTION_CODE)->dict:
+    """새 프로세스에서 code를 -X importtime으로 실행하고 결과를 파싱
+
+    반환: {"total_ms", "wall_ms", "top": [(모듈, 누적 ms)], "modules": set}
+    """
+    check = "import sys; print(','.join(sorted(sys.modules)))"
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"{code}; {check}"],
+                            capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    top = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        # 들여쓰기가 없는 줄이 최상위 import (누적 시간에 하위 import 포함)
+        if match and match.group(3) == " ":
+            top.append((match.group(4), int(match.group(2)) / 1000))
+    modules = set(result.stdout.strip().splitlines()[-1].split(","))
+    return {
+        "total_ms": sum(ms for _, ms in top),
+        "wall_ms": wall_ms,
+        "top": sorted(top, key=lambda item: item[1], reverse=True),
+        "modules": modules,
+    }
+
+
+def run_benchmark(repeats=5, budget_ms=STARTUP_BUDGET_MS)->bool:
+    """repeats번 측정해서 중앙값을 예산과 비교 (첫 실행은 .pyc 생성 때문에 제외)"""
+    measure_import()
+    runs = [measure_import() for _ in range(repeats)]
+    runs.sort(key=lambda run: run["total_ms"])
+    median = runs[len(runs) // 2]
+
+    print(f"=== 수집 경로 시작 시간 ({repeats}회 중앙값) ===")
+    print(f"import 누적 : {median['total_ms']:.0f}ms / 예산 {budget_ms}ms")
+    print(f"프로세스 전체 : {median['wall_ms']:.0f}ms (인터프리터 시작 포함)")
+    print("누적 시간 상위 import:")
+    for name, ms in median["top"][:10]:
+        print(f"    {name:<30} {ms:8.1f}ms")
+
+    loaded = [name for name in FORBIDDEN_MODULES if name in median["modules"]]
+    if loaded:
+        print(f"수집 경로에서 import 되면 안 되는 모듈: {loaded}")
+    ok = median["total_ms"] <= budget_ms and not loaded
+    print("통과" if ok else "실패")
+    return ok
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    sys.exit(0 if run_benchmark(repeats) else 1)
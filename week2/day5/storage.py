@@ -0,0 +1,701 @@
+"""
+crypto_ohlcv 저장소
+- (ticker, date_str) 기본 키 테이블 생성 / upsert
+- 바인딩 파라미터를 사용하는 조회 API (OhlcvQuery)
+- 읽기 전용 커넥션 풀 재사용
+- 같은 인터페이스(OhlcvStore)의 SQLite / Parquet·Arrow 백엔드
+- WAL + executemany 한 트랜잭션 대량 쓰기, 선택적 append-only 스테이징 테이블
+- 쓰기 리스너(add_write_listener)로 upsert된 캔들을 인메모리 캐시 등에 전달
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from frame_memory import to_storage_frame
+
+# 데이터베이스 파일 경로
+DB_PATH = "crypto_data.db"
+
+# crypto_ohlcv 테이블 컬럼 (저장 순서)
+OHLCV_COLUMNS = ['date_str', 'ticker', 'open', 'high', 'low', 'close', 'volume',
+                 'price_change', 'price_change_pct', 'high_low_diff', 'ma5']
+
+DateLike = Union[str, datetime, pd.Timestamp]
+
+
+# 쓰기 커넥션 PRAGMA (page_size는 새 DB 파일에만 적용됨)
+WRITE_PRAGMAS = (
+    "PRAGMA page_size = 8192",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def create_database(db_path=DB_PATH,check_same_thread=True):
+    """SQLite 데이터베이스 생성 함수 (대량 쓰기용 PRAGMA 적용)
+
+    WAL + synchronous=NORMAL: 커밋마다 fsync하지 않고 체크포인트 때만 동기화하므로
+    쓰기가 빨라지고, 쓰는 동안에도 읽기 커넥션이 막히지 않는다.
+    """
+    conn = sqlite3.connect(db_path,check_same_thread=check_same_thread)
+    cursor = conn.cursor()
+    for pragma in WRITE_PRAGMAS:
+        cursor.execute(pragma)
+    return conn
+
+def create_ohlcv_table(conn,table="crypto_ohlcv"):
+    """(ticker, date_str) 기본 키를 가진 OHLCV 테이블 생성
+
+    기본 키 순서로 행이 저장되도록 WITHOUT ROWID 테이블을 사용한다.
+    (티커별 날짜 범위 조회가 연속된 페이지만 읽게 됨)
+    예전 to_sql(replace)로 만들어진 테이블이 있으면 새 스키마로 옮긴다.
+    """
+    cursor = conn.cursor()
+    columns_sql = """
+            date_str TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            open REAL,
+            high REAL,
+            low REAL,
+            close REAL,
+            volume REAL,
+            price_change REAL,
+            price_change_pct REAL,
+            high_low_diff REAL,
+            ma5 REAL,
+            PRIMARY KEY (ticker, date_str)
+    """
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    row = cursor.fetchone()
+    if row is None:
+        cursor.execute(f"CREATE TABLE {table} ({columns_sql}) WITHOUT ROWID")
+    elif "WITHOUT ROWID" not in row[0].upper():
+        columns = ", ".join(OHLCV_COLUMNS)
+        cursor.execute(f"CREATE TABLE {table}_new ({columns_sql}) WITHOUT ROWID")
+        cursor.execute(f"INSERT OR REPLACE INTO {table}_new ({columns}) SELECT {columns} FROM {table}")
+        cursor.execute(f"DROP TABLE {table}")
+        cursor.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+    ensure_ohlcv_indexes(conn,table)
+    conn.commit()
+
+def ensure_ohlcv_indexes(conn,table="crypto_ohlcv"):
+    """조회용 인덱스 생성
+
+    (ticker, date_str)는 기본 키가 곧 클러스터 인덱스이고,
+    티커 조건 없이 날짜 범위만 조회하는 경우를 위해 (date_str, ticker) 인덱스를 추가한다.
+    """
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date_ticker ON {table} (date_str, ticker)")
+
+def create_snapshot_table(conn,table="crypto_snapshot"):
+    """시장 현재가 스냅샷 테이블 (스냅샷 시각별로 한 묶음)"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            snapshot_ts TEXT NOT NULL,
+            ticker TEXT NOT NULL,
+            price REAL,
+            PRIMARY KEY (snapshot_ts, ticker)
+        ) WITHOUT ROWID
+    """)
+    conn.commit()
+
+def save_snapshot(df,conn,table="crypto_snapshot"):
+    """snapshot_ts, ticker, price 컬럼의 스냅샷을 한 트랜잭션으로 저장"""
+    create_snapshot_table(conn,table)
+    with conn:
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {table} (snapshot_ts, ticker, price) VALUES (?, ?, ?)",
+            zip(df["snapshot_ts"].tolist(), df["ticker"].tolist(), df["price"].tolist())
+        )
+    return len(df)
+
+def _upsert_updates():
+    return ", ".join(f"{c} = excluded.{c}" for c in OHLCV_COLUMNS if c not in ("ticker", "date_str"))
+
+def _iter_rows(df):
+    """DataFrame을 executemany용 튜플로 변환 (itertuples보다 빠르게 컬럼 단위로 변환)
+
+    compact 표현(frame_memory.compact_ohlcv)이면 이 시점에 date_str을 만든다.
+    """
+    df = to_storage_frame(df)
+    return zip(*(df[c].tolist() for c in OHLCV_COLUMNS))
+
+def get_latest_dates(conn,table="crypto_ohlcv")->dict:
+    """티커별로 저장된 가장 최근 date_str 조회"""
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT ticker, MAX(date_str) FROM {table} GROUP BY ticker")
+    return dict(cursor.fetchall())
+
+# upsert 후 호출할 리스너 (hot_cache.HotCache.publish 등)
+_write_listeners = []
+
+def add_write_listener(func):
+    """upsert_to_database가 커밋한 뒤 func(table, rows) 호출 (rows: OHLCV_COLUMNS 순서 튜플 리스트)"""
+    _write_listeners.append(func)
+
+def remove_write_listener(func):
+    if func in _write_listeners:
+        _write_listeners.remove(func)
+
+def _notify_write(table, rows):
+    for func in list(_write_listeners):
+        try:
+            func(table, rows)
+        except Exception as e:
+            # 저장은 이미 커밋되었으므로 리스너 오류로 쓰기를 실패시키지 않음
+            print(f"쓰기 리스너 오류 ({table}) : {e}")
+
+def upsert_to_database(df,conn=None,table="crypto_ohlcv"):
+    """(ticker, date_str) 기준으로 새 행은 추가, 기존 행은 갱신"""
+    own_conn = conn is None
+    if own_conn:
+        conn = create_database()
+    create_ohlcv_table(conn,table)
+
+    columns = ", ".join(OHLCV_COLUMNS)
+    placeholders = ", ".join("?" * len(OHLCV_COLUMNS))
+    # 리스너가 있을 때만 행을 리스트로 만들어 둠
+    rows = list(_iter_rows(df)) if _write_listeners else _iter_rows(df)
+
+    # 한 트랜잭션 안에서 executemany로 모든 행을 upsert
+    with conn:
+        conn.executemany(
+            f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(ticker, date_str) DO UPDATE SET {_upsert_updates()}",
+            rows
+        )
+    if _write_listeners:
+        _notify_write(table, rows)
+
+    if own_conn:
+        conn.close()
+    return len(df)
+
+
+class StagingWriter:
+    """append-only 스테이징 테이블에 쌓았다가 배치로 본 테이블에 병합
+
+    수집 중에는 기본 키/인덱스가 없는 {table}_staging 테이블에 INSERT만 하고,
+    merge_every 행이 쌓이면(또는 merge() 호출 시) 한 번에 upsert 한다.
+    """
+
+    def __init__(self, conn, table="crypto_ohlcv", merge_every=100_000):
+        self.conn = conn
+        self.table = table
+        self.staging = f"{table}_staging"
+        self.merge_every = merge_every
+        self.pending = 0
+        create_ohlcv_table(conn, table)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {self.staging} ({', '.join(OHLCV_COLUMNS)})")
+        conn.commit()
+        self.pending = conn.execute(f"SELECT COUNT(*) FROM {self.staging}").fetchone()[0]
+
+    def append(self, df)->int:
+        placeholders = ", ".join("?" * len(OHLCV_COLUMNS))
+        with self.conn:
+            self.conn.executemany(f"INSERT INTO {self.staging} VALUES ({placeholders})", _iter_rows(df))
+        self.pending += len(df)
+        if self.pending >= self.merge_every:
+            self.merge()
+        return len(df)
+
+    def merge(self)->int:
+        """스테이징 행을 본 테이블에 upsert하고 비움 (같은 키는 나중에 쌓인 행이 반영됨)"""
+        if self.pending == 0:
+            return 0
+        columns = ", ".join(OHLCV_COLUMNS)
+        with self.conn:
+            # upsert + SELECT는 파서 모호성 때문에 WHERE 절이 필요함
+            self.conn.execute(
+                f"INSERT INTO {self.table} ({columns}) "
+                f"SELECT {columns} FROM {self.staging} WHERE true ORDER BY rowid "
+                f"ON CONFLICT(ticker, date_str) DO UPDATE SET {_upsert_updates()}"
+            )
+            self.conn.execute(f"DELETE FROM {self.staging}")
+        merged, self.pending = self.pending, 0
+        return merged
+
+
+class ReadConnectionPool:
+    """읽기 전용 SQLite 커넥션 풀 (스레드 간 재사용)"""
+
+    def __init__(self, db_path=DB_PATH, size=4):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute("PRAGMA mmap_size = 268435456")
+        conn.execute("PRAGMA cache_size = -65536")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """풀에서 커넥션을 빌려주고 사용 후 돌려받음"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            conn = self._connect() if can_create else self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """놀고 있는 커넥션을 모두 닫음"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_read_pool(db_path=DB_PATH)->ReadConnectionPool:
+    """DB 파일별로 하나의 읽기 풀을 공유"""
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ReadConnectionPool(db_path)
+        return _pools[db_path]
+
+
+def _to_date_str(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+
+@dataclass
+class OhlcvQuery:
+    """crypto_ohlcv 조회 조건
+
+    tickers   : 조회할 티커 목록 (None이면 전체)
+    start/end : date_str 범위 (둘 다 포함)
+    columns   : 조회할 컬럼 (None이면 전체)
+    limit     : 최대 행 수
+    descending: True면 최신 날짜부터
+    """
+    tickers: Optional[Sequence[str]] = None
+    start: Optional[DateLike] = None
+    end: Optional[DateLike] = None
+    columns: Optional[Sequence[str]] = None
+    limit: Optional[int] = None
+    descending: bool = False
+    table: str = "crypto_ohlcv"
+
+    def to_sql(self)->tuple[str, list]:
+        """(SQL, 바인딩 파라미터) 반환. 컬럼/테이블 이름은 값으로 바인딩할 수 없어 허용 목록으로 검사"""
+        columns = list(self.columns) if self.columns else OHLCV_COLUMNS
+        unknown = [c for c in columns if c not in OHLCV_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 컬럼입니다: {unknown}")
+        if not self.table.isidentifier():
+            raise ValueError(f"잘못된 테이블 이름입니다: {self.table}")
+
+        conditions = []
+        params = []
+        if self.tickers:
+            conditions.append(f"ticker IN ({', '.join('?' * len(self.tickers))})")
+            params.extend(self.tickers)
+        if self.start is not None:
+            conditions.append("date_str >= ?")
+            params.append(_to_date_str(self.start))
+        if self.end is not None:
+            conditions.append("date_str <= ?")
+            params.append(_to_date_str(self.end))
+
+        sql = f"SELECT {', '.join(columns)} FROM {self.table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        direction = "DESC" if self.descending else "ASC"
+        # 티커를 지정하면 기본 키 (ticker, date_str) 순서 그대로 읽을 수 있음
+        if self.tickers:
+            sql += f" ORDER BY ticker {direction}, date_str {direction}"
+        else:
+            sql += f" ORDER BY date_str {direction}, ticker {direction}"
+        if self.limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(self.limit))
+        return sql, params
+
+
+def query_ohlcv(query=None, db_path=DB_PATH, **kwargs)->pd.DataFrame:
+    """OhlcvQuery(또는 같은 이름의 키워드 인자)로 crypto_ohlcv 조회
+
+    예) query_ohlcv(tickers=["KRW-BTC"], start="2025-01-01", limit=100)
+    """
+    if query is None:
+        query = OhlcvQuery(**kwargs)
+    sql, params = query.to_sql()
+    with get_read_pool(db_path).connection() as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+class OhlcvStore:
+    """OHLCV 저장소 인터페이스 (save / load)"""
+
+    def save(self, df)->int:
+        """OHLCV_COLUMNS 형식의 DataFrame을 (ticker, date_str) 기준으로 upsert"""
+        raise NotImplementedError
+
+    def load(self, query=None, **kwargs)->pd.DataFrame:
+        """OhlcvQuery(또는 같은 이름의 키워드 인자) 조건으로 조회"""
+        raise NotImplementedError
+
+
+class SqliteStore(OhlcvStore):
+    """SQLite 백엔드 (기존 crypto_data.db)"""
+
+    def __init__(self, db_path=DB_PATH, table="crypto_ohlcv"):
+        self.db_path = db_path
+        self.table = table
+
+    def save(self, df)->int:
+        conn = create_database(self.db_path)
+        try:
+            return upsert_to_database(df, conn, self.table)
+        finally:
+            conn.close()
+
+    def load(self, query=None, **kwargs)->pd.DataFrame:
+        if query is None:
+            query = OhlcvQuery(table=self.table, **kwargs)
+        return query_ohlcv(query, db_path=self.db_path)
+
+
+class ColumnarStore(OhlcvStore):
+    """Parquet / Arrow IPC 백엔드
+
+    root/ticker=KRW-BTC/month=2025-01/data.parquet 형태로 티커·월 단위 파티션에 저장한다.
+    - 조회 시 티커/월 조건으로 파티션을 건너뛰고, date_str 조건은 Parquet row group 통계로 걸러냄
+    - format="arrow"이면 압축하지 않은 Arrow IPC 파일을 메모리 맵으로 읽어 복사 없이 로드
+    """
+
+    PARTITION_COLUMNS = ["ticker", "month"]
+
+    def __init__(self, root="crypto_ohlcv_store", format="parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("ColumnarStore를 사용하려면 pyarrow가 필요합니다. (pip install pyarrow)")
+        if format not in ("parquet", "arrow"):
+            raise ValueError(f"지원하지 않는 형식입니다: {format}")
+        self.root = root
+        self.format = format
+
+    def _partition_path(self, ticker, month):
+        extension = "parquet" if self.format == "parquet" else "arrow"
+        return os.path.join(self.root, f"ticker={ticker}", f"month={month}", f"data.{extension}")
+
+    def _read_file(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.format == "parquet":
+            return pq.read_table(path, memory_map=True)
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    def _write_file(self, table, path):
+        import pyarrow.feather as feather
+        import pyarrow.parquet as pq
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 쓰는 도중 실패해도 기존 파일이 깨지지 않도록 임시 파일에 쓰고 교체
+        tmp_path = path + ".tmp"
+        if self.format == "parquet":
+            pq.write_table(table, tmp_path, row_group_size=64 * 1024)
+        else:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+    def save(self, df)->int:
+        import pyarrow as pa
+
+        df = to_storage_frame(df)[OHLCV_COLUMNS]
+        df = df.assign(ticker=df["ticker"].astype(str))
+        months = df["date_str"].str.slice(0, 7)
+        for (ticker, month), part in df.groupby([df["ticker"], months], sort=False):
+            path = self._partition_path(ticker, month)
+            part = part.drop(columns="ticker")
+            if os.path.exists(path):
+                existing = self._read_file(path).to_pandas()
+                part = pd.concat([existing, part], ignore_index=True)
+                part = part.drop_duplicates("date_str", keep="last")
+            part = part.sort_values("date_str")
+            self._write_file(pa.Table.from_pandas(part, preserve_index=False), path)
+        return len(df)
+
+    def _dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow.fs import LocalFileSystem
+
+        partitioning = ds.partitioning(
+            pa.schema([("ticker", pa.string()), ("month", pa.string())]), flavor="hive")
+        return ds.dataset(self.root, format="parquet" if self.format == "parquet" else "ipc",
+                          partitioning=partitioning, filesystem=LocalFileSystem(use_mmap=True))
+
+    def load(self, query=None, **kwargs)->pd.DataFrame:
+        import pyarrow.dataset as ds
+
+        if query is None:
+            query = OhlcvQuery(**kwargs)
+        columns = list(query.columns) if query.columns else OHLCV_COLUMNS
+        unknown = [c for c in columns if c not in OHLCV_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 컬럼입니다: {unknown}")
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        conditions = []
+        if query.tickers:
+            conditions.append(ds.field("ticker").isin(list(query.tickers)))
+        if query.start is not None:
+            start = _to_date_str(query.start)
+            conditions.append((ds.field("month") >= start[:7]) & (ds.field("date_str") >= start))
+        if query.end is not None:
+            end = _to_date_str(query.end)
+            conditions.append((ds.field("month") <= end[:7]) & (ds.field("date_str") <= end))
+        condition = None
+        for expr in conditions:
+            condition = expr if condition is None else condition & expr
+
+        # 정렬에 필요한 컬럼도 함께 읽음
+        read_columns = list(dict.fromkeys(columns + ["ticker", "date_str"]))
+        table = self._dataset().to_table(columns=read_columns, filter=condition)
+        order = "descending" if query.descending else "ascending"
+        sort_keys = ["ticker", "date_str"] if query.tickers else ["date_str", "ticker"]
+        table = table.sort_by([(key, order) for key in sort_keys])
+        if query.limit is not None:
+            table = table.slice(0, query.limit)
+        table = table.select(columns)
+        # split_blocks: 숫자 컬럼을 하나의 2차원 블록으로 합치지 않아 가능한 경우 복사 없이 변환
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def get_store(kind="sqlite", **kwargs)->OhlcvStore:
+    """저장소 백엔드 생성 (kind: sqlite / parquet / arrow)"""
+    if kind == "sqlite":
+        return SqliteStore(**kwargs)
+    if kind in ("parquet", "arrow"):
+        return ColumnarStore(format=kind, **kwargs)
+    raise ValueError(f"지원하지 않는 저장소입니다: {kind}")
+
+
+def _sample_frames(n_tickers, n_candles, seed=0):
+    """벤치마크용 티커별 OHLCV DataFrame (OHLCV_COLUMNS 형식)"""
+    dates = pd.date_range("2020-01-01", periods=n_candles, freq="min").strftime('%Y-%m-%d %H:%M:%S')
+    rng = np.random.default_rng(seed)
+    for i in range(n_tickers):
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.001, n_candles)))
+        yield pd.DataFrame({
+            "date_str": dates,
+            "ticker": f"KRW-T{i:03d}",
+            "open": close,
+            "high": close * 1.001,
+            "low": close * 0.999,
+            "close": close,
+            "volume": rng.uniform(1, 100, n_candles),
+            "price_change": 0.0,
+            "price_change_pct": 0.0,
+            "high_low_diff": close * 0.002,
+            "ma5": close,
+        })
+
+
+def _build_benchmark_db(db_path, n_tickers, n_candles, chunk=200_000):
+    """벤치마크용 DB 생성 (인덱스 테이블 crypto_ohlcv + 인덱스 없는 legacy 테이블)"""
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    conn = create_database(db_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    create_ohlcv_table(conn)
+    conn.execute(f"CREATE TABLE legacy_ohlcv ({', '.join(OHLCV_COLUMNS)})")
+
+    dates = None
+    placeholders = ", ".join("?" * len(OHLCV_COLUMNS))
+    for frame in _sample_frames(n_tickers, n_candles):
+        dates = frame["date_str"]
+        rows = list(frame.itertuples(index=False, name=None))
+        for table in ("crypto_ohlcv", "legacy_ohlcv"):
+            for pos in range(0, len(rows), chunk):
+                conn.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows[pos:pos + chunk])
+        conn.commit()
+    conn.close()
+    return dates
+
+
+def benchmark_range_query(db_path="bench_ohlcv.db", n_tickers=200, n_candles=50_000, repeats=20):
+    """티커 + 날짜 범위 조회 지연 시간 비교 (기본 200 x 50,000 = 1,000만 행)
+
+    legacy: 인덱스 없는 테이블 + 호출마다 새 커넥션 + f-string SQL (기존 load_from_database)
+    new   : (ticker, date_str) 클러스터 인덱스 + 읽기 커넥션 풀 + 바인딩 파라미터
+    """
+    print(f"벤치마크 DB 생성 중... ({n_tickers * n_candles:,}행)")
+    dates = _build_benchmark_db(db_path, n_tickers, n_candles)
+    rng = np.random.default_rng(1)
+    cases = []
+    for _ in range(repeats):
+        ticker = f"KRW-T{rng.integers(n_tickers):03d}"
+        start = int(rng.integers(0, n_candles - 1440))
+        cases.append((ticker, dates[start], dates[start + 1439]))
+
+    legacy_times = []
+    for ticker, start, end in cases:
+        started = time.perf_counter()
+        conn = sqlite3.connect(db_path)
+        pd.read_sql_query(f"select * from legacy_ohlcv where ticker = '{ticker}' and "
+                          f"date_str between '{start}' and '{end}' order by date_str", conn)
+        conn.close()
+        legacy_times.append(time.perf_counter() - started)
+
+    new_times = []
+    for ticker, start, end in cases:
+        started = time.perf_counter()
+        query_ohlcv(db_path=db_path, tickers=[ticker], start=start, end=end)
+        new_times.append(time.perf_counter() - started)
+
+    print(f"하루치(1,440행) 범위 조회 {repeats}회")
+    print(f"기존 방식 : 평균 {np.mean(legacy_times) * 1000:.1f}ms, p95 {np.percentile(legacy_times, 95) * 1000:.1f}ms")
+    print(f"새 방식   : 평균 {np.mean(new_times) * 1000:.1f}ms, p95 {np.percentile(new_times, 95) * 1000:.1f}ms")
+    return legacy_times, new_times
+
+
+def benchmark_bulk_insert(db_dir="bench_insert", n_rows=1_000_000, batch_rows=1_000):
+    """기존 to_sql 경로와 대량 쓰기 경로의 처리량(rows/sec) 비교
+
+    - to_sql(replace): 기존 save_to_database (기본 키 없음, count(*) 재실행)
+    - to_sql(keyed)  : 기본 키가 있는 테이블에 기본 PRAGMA로 to_sql
+    - bulk / staging : 튜닝된 커넥션 + executemany 한 트랜잭션 / 스테이징 병합
+    마지막으로 수집 작업처럼 batch_rows개씩 여러 번 커밋하는 경우도 비교한다.
+    """
+    import shutil
+
+    if os.path.exists(db_dir):
+        shutil.rmtree(db_dir)
+    os.makedirs(db_dir)
+    n_tickers = 100
+    frame = pd.concat(_sample_frames(n_tickers, n_rows // n_tickers), ignore_index=True)
+    batches = [frame.iloc[pos:pos + batch_rows] for pos in range(0, min(len(frame), 200 * batch_rows), batch_rows)]
+
+    def run(name, write, rows=len(frame)):
+        db_path = os.path.join(db_dir, f"{name}.db")
+        started = time.perf_counter()
+        write(db_path)
+        elapsed = time.perf_counter() - started
+        print(f"{name:16s}: {elapsed:.2f}초, {rows / elapsed:,.0f} rows/sec")
+        return elapsed
+
+    def to_sql_replace(db_path):
+        conn = sqlite3.connect(db_path)
+        frame.to_sql("crypto_ohlcv", conn, if_exists="replace", index=False)
+        conn.execute("select count(*) from crypto_ohlcv").fetchone()
+        conn.close()
+
+    def to_sql_keyed(db_path):
+        conn = sqlite3.connect(db_path)
+        create_ohlcv_table(conn)
+        frame.to_sql("crypto_ohlcv", conn, if_exists="append", index=False)
+        conn.execute("select count(*) from crypto_ohlcv").fetchone()
+        conn.close()
+
+    def bulk(db_path):
+        conn = create_database(db_path)
+        upsert_to_database(frame, conn)
+        conn.close()
+
+    def staging(db_path):
+        conn = create_database(db_path)
+        writer = StagingWriter(conn, merge_every=len(frame) + 1)
+        for pos in range(0, len(frame), 50_000):
+            writer.append(frame.iloc[pos:pos + 50_000])
+        writer.merge()
+        conn.close()
+
+    def batches_default(db_path):
+        conn = sqlite3.connect(db_path)
+        for batch in batches:
+            upsert_to_database(batch, conn)
+        conn.close()
+
+    def batches_tuned(db_path):
+        conn = create_database(db_path)
+        for batch in batches:
+            upsert_to_database(batch, conn)
+        conn.close()
+
+    print(f"{len(frame):,}행 한 번에 저장")
+    results = {name: run(name, write) for name, write in
+               (("to_sql(replace)", to_sql_replace), ("to_sql(keyed)", to_sql_keyed),
+                ("bulk", bulk), ("staging", staging))}
+    print(f"{batch_rows:,}행씩 {len(batches)}번 커밋")
+    batch_total = sum(len(batch) for batch in batches)
+    for name, write in (("batch(default)", batches_default), ("batch(wal)", batches_tuned)):
+        results[name] = run(name, write, batch_total)
+    return results
+
+
+def benchmark_backends(root="bench_store", n_tickers=50, n_candles=40_000):
+    """SQLite / Parquet / Arrow 백엔드의 전체 로드와 티커 범위 로드 시간 비교"""
+    import shutil
+
+    if os.path.exists(root):
+        shutil.rmtree(root)
+    os.makedirs(root)
+    stores = {
+        "sqlite": SqliteStore(os.path.join(root, "ohlcv.db")),
+        "parquet": ColumnarStore(os.path.join(root, "parquet"), "parquet"),
+        "arrow": ColumnarStore(os.path.join(root, "arrow"), "arrow"),
+    }
+    frame = pd.concat(_sample_frames(n_tickers, n_candles), ignore_index=True)
+    dates = frame["date_str"].iloc[:n_candles]
+    query = OhlcvQuery(tickers=["KRW-T001", "KRW-T002"], start=dates.iloc[n_candles // 2])
+
+    print(f"{len(frame):,}행 기준")
+    results = {}
+    for name, store in stores.items():
+        started = time.perf_counter()
+        store.save(frame)
+        save_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store.load()
+        full_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        store.load(query)
+        range_time = time.perf_counter() - started
+
+        results[name] = (save_time, full_time, range_time)
+        print(f"{name:8s}: 저장 {save_time:.2f}초, 전체 로드 {full_time:.2f}초, 티커 범위 로드 {range_time * 1000:.1f}ms")
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_range_query()
+    benchmark_bulk_insert()
+    benchmark_backends()
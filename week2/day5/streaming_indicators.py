@@ -0,0 +1,329 @@
+"""
+스트리밍(증분) 기술적 지표 계산
+- 새 캔들 1개당 O(1)로 지표 갱신 (전체 이력을 다시 계산하지 않음)
+- crypto_ohlcv 테이블에 저장된 캔들로 초기 상태를 채운 뒤 한 개씩 입력
+- 지표 이름과 계산식은 indicators.py(배치 엔진)와 같아서 결과가 일치한다
+
+마감 전 캔들은 update(..., closed=False)로 넣으면 상태를 바꾸지 않고 값만 계산한다.
+저장소의 티커별 마지막 캔들은 마감 전 값일 수 있으므로, 같은 date_str 캔들이 다시 들어오면
+그 캔들을 반영하기 전 상태로 되돌린 뒤 새 값으로 반영한다 (seed_from_database).
+"""
+
+import copy
+import math
+from collections import deque
+
+from indicators import DEFAULT_INDICATORS, parse_indicator
+
+NAN = float("nan")
+
+
+class RollingMean:
+    """고정 길이 이동평균 (합계를 유지하며 가장 오래된 값을 빼는 방식)"""
+
+    # 부동소수점 오차가 누적되지 않도록 주기적으로 합계를 다시 계산
+    RESUM_EVERY = 10_000
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._pushes = 0
+
+    def step(self, x, commit=True):
+        full = len(self.values) == self.window
+        total = self.total + x - (self.values[0] if full else 0.0)
+        count = len(self.values) + (0 if full else 1)
+        if commit:
+            self.values.append(x)
+            self.total = total
+            self._pushes += 1
+            if self._pushes % self.RESUM_EVERY == 0:
+                self.total = math.fsum(self.values)
+        return total / self.window if count >= self.window else NAN
+
+
+class RollingStd:
+    """고정 길이 표본 표준편차 (슬라이딩 Welford 방식)"""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def step(self, x, commit=True):
+        n = len(self.values)
+        if n < self.window:
+            # 창이 찰 때까지는 일반 Welford 누적
+            count = n + 1
+            delta = x - self.mean
+            mean = self.mean + delta / count
+            m2 = self.m2 + delta * (x - mean)
+        else:
+            count = n
+            old = self.values[0]
+            mean = self.mean + (x - old) / count
+            m2 = self.m2 + (x - old) * (x - mean + old - self.mean)
+        if commit:
+            self.values.append(x)
+            self.mean, self.m2 = mean, m2
+        if count < self.window:
+            return NAN
+        return math.sqrt(max(m2, 0.0) / (count - 1))
+
+
+class ExponentialMean:
+    """지수이동평균 (pandas ewm(adjust=False)과 같은 식)"""
+
+    def __init__(self, alpha, min_periods=1):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = None
+        self.count = 0
+
+    def step(self, x, commit=True):
+        if x is None or x != x:
+            # NaN은 건너뜀 (pandas ewm과 동일)
+            value, count = self.value, self.count
+        elif self.value is None:
+            value, count = x, 1
+        else:
+            value, count = self.value + self.alpha * (x - self.value), self.count + 1
+        if commit:
+            self.value, self.count = value, count
+        return value if value is not None and count >= self.min_periods else NAN
+
+
+class _Indicator:
+    """캔들 dict를 받아 {컬럼명: 값}을 돌려주는 지표 기본형"""
+
+    def step(self, candle, prev_close, commit=True):
+        raise NotImplementedError
+
+
+class MovingAverage(_Indicator):
+    def __init__(self, period):
+        self.name = f"ma{period}"
+        self.mean = RollingMean(period)
+
+    def step(self, candle, prev_close, commit=True):
+        return {self.name: self.mean.step(candle["close"], commit)}
+
+
+class EMA(_Indicator):
+    def __init__(self, period):
+        self.name = f"ema{period}"
+        self.mean = ExponentialMean(2 / (period + 1))
+
+    def step(self, candle, prev_close, commit=True):
+        return {self.name: self.mean.step(candle["close"], commit)}
+
+
+class RSI(_Indicator):
+    def __init__(self, period):
+        self.name = f"rsi{period}"
+        self.gain = ExponentialMean(1 / period, period)
+        self.loss = ExponentialMean(1 / period, period)
+
+    def step(self, candle, prev_close, commit=True):
+        delta = NAN if prev_close is None else candle["close"] - prev_close
+        avg_gain = self.gain.step(max(delta, 0.0) if delta == delta else NAN, commit)
+        avg_loss = self.loss.step(max(-delta, 0.0) if delta == delta else NAN, commit)
+        if avg_gain != avg_gain or avg_loss != avg_loss:
+            return {self.name: NAN}
+        if avg_loss == 0:
+            return {self.name: 100.0 if avg_gain > 0 else NAN}
+        return {self.name: 100 - 100 / (1 + avg_gain / avg_loss)}
+
+
+class BollingerBands(_Indicator):
+    def __init__(self, period, num_std=2):
+        self.prefix = f"bb{period}"
+        self.num_std = num_std
+        self.mean = RollingMean(period)
+        self.std = RollingStd(period)
+
+    def step(self, candle, prev_close, commit=True):
+        mid = self.mean.step(candle["close"], commit)
+        std = self.std.step(candle["close"], commit)
+        return {
+            f"{self.prefix}_mid": mid,
+            f"{self.prefix}_upper": mid + self.num_std * std,
+            f"{self.prefix}_lower": mid - self.num_std * std,
+        }
+
+
+class ATR(_Indicator):
+    def __init__(self, period):
+        self.name = f"atr{period}"
+        self.mean = ExponentialMean(1 / period, period)
+
+    def step(self, candle, prev_close, commit=True):
+        true_range = candle["high"] - candle["low"]
+        if prev_close is not None:
+            true_range = max(true_range, abs(candle["high"] - prev_close), abs(candle["low"] - prev_close))
+        return {self.name: self.mean.step(true_range, commit)}
+
+
+class VWAP(_Indicator):
+    def __init__(self, period=None):
+        self.name = "vwap" if period is None else f"vwap{period}"
+        self.period = period
+        if period is None:
+            self.pv = 0.0
+            self.volume = 0.0
+        else:
+            self.pv_sum = RollingMean(period)
+            self.volume_sum = RollingMean(period)
+
+    def step(self, candle, prev_close, commit=True):
+        typical = (candle["high"] + candle["low"] + candle["close"]) / 3
+        pv = typical * candle["volume"]
+        if self.period is None:
+            total_pv, total_volume = self.pv + pv, self.volume + candle["volume"]
+            if commit:
+                self.pv, self.volume = total_pv, total_volume
+        else:
+            # 평균끼리 나눠도 합끼리 나눈 것과 같다
+            total_pv = self.pv_sum.step(pv, commit)
+            total_volume = self.volume_sum.step(candle["volume"], commit)
+        return {self.name: total_pv / total_volume if total_volume else NAN}
+
+
+INDICATOR_CLASSES = {
+    "ma": MovingAverage,
+    "ema": EMA,
+    "rsi": RSI,
+    "bb": BollingerBands,
+    "atr": ATR,
+    "vwap": VWAP,
+}
+
+
+class TickerIndicatorState:
+    """티커 하나의 지표 상태"""
+
+    def __init__(self, ticker, indicators=DEFAULT_INDICATORS):
+        self.ticker = ticker
+        indicators = ("ma5",) + tuple(spec for spec in indicators if spec != "ma5")
+        self.indicators = []
+        for spec in indicators:
+            name, period = parse_indicator(spec)
+            self.indicators.append(INDICATOR_CLASSES[name](period) if period else INDICATOR_CLASSES[name]())
+        self.prev_close = None
+        self.last_date = None
+        self.count = 0
+        # 마지막 캔들을 반영하기 전 상태 (revisable=True로 반영했을 때만)
+        self._provisional = None
+
+    @property
+    def revisable(self)->bool:
+        """마지막 캔들(last_date)을 같은 date_str의 새 값으로 다시 반영할 수 있는지"""
+        return self._provisional is not None
+
+    def _save(self):
+        return self.indicators, self.prev_close, self.last_date, self.count
+
+    def _restore(self, saved):
+        self.indicators, self.prev_close, self.last_date, self.count = saved
+
+    def update(self, candle, closed=True, revisable=False):
+        """캔들 1개를 반영하고 preprocess_data와 같은 컬럼의 dict 반환
+
+        closed=False(마감 전 캔들)이면 상태는 그대로 두고 값만 계산한다.
+        revisable=True면 반영 전 상태를 보관해 두고, 같은 date_str 캔들이 다시 들어오면
+        이 캔들을 빼고 새 값으로 계산한다.
+        """
+        current = None
+        if self._provisional is not None and candle.get("date_str") == self.last_date:
+            current = self._save()
+            self._restore(self._provisional)
+        if closed:
+            self._provisional = (copy.deepcopy(self.indicators), self.prev_close,
+                                 self.last_date, self.count) if revisable else None
+
+        row = {
+            "date_str": candle.get("date_str"),
+            "ticker": self.ticker,
+            "open": candle["open"],
+            "high": candle["high"],
+            "low": candle["low"],
+            "close": candle["close"],
+            "volume": candle["volume"],
+        }
+        row["price_change"] = candle["close"] - candle["open"]
+        row["price_change_pct"] = row["price_change"] / candle["open"] * 100
+        row["high_low_diff"] = candle["high"] - candle["low"]
+
+        for indicator in self.indicators:
+            row.update(indicator.step(candle, self.prev_close, closed))
+        # preprocess_data와 같이 ma5 결측치는 종가로 채움
+        if row["ma5"] != row["ma5"]:
+            row["ma5"] = candle["close"]
+
+        if closed:
+            self.prev_close = candle["close"]
+            self.last_date = candle.get("date_str")
+            self.count += 1
+        elif current is not None:
+            # 마감 전 값만 계산했으므로 보관한 마지막 캔들 상태를 그대로 둠
+            self._restore(current)
+        return row
+
+
+class StreamingIndicators:
+    """여러 티커의 지표 상태를 관리하는 클래스"""
+
+    def __init__(self, indicators=DEFAULT_INDICATORS):
+        self.indicators = tuple(indicators)
+        self.states = {}
+
+    def state(self, ticker)->TickerIndicatorState:
+        if ticker not in self.states:
+            self.states[ticker] = TickerIndicatorState(ticker, self.indicators)
+        return self.states[ticker]
+
+    def update(self, ticker, candle, closed=True):
+        """새 캔들 1개 반영 (이미 반영한 date_str 이하의 마감 캔들은 무시하고 None 반환)
+
+        다시 반영할 수 있는 마지막 캔들(state.revisable)과 date_str이 같으면 새 값으로 바꿔서 반영한다.
+        """
+        state = self.state(ticker)
+        date_str = candle.get("date_str")
+        if closed and state.last_date is not None and date_str is not None and (
+                date_str < state.last_date or (date_str == state.last_date and not state.revisable)):
+            return None
+        return state.update(candle, closed)
+
+    def seed_from_database(self, conn, table="crypto_ohlcv", tickers=None):
+        """저장된 캔들을 날짜 순으로 흘려보내 초기 상태를 만든다 (시작 시 한 번만)
+
+        티커별 마지막 캔들은 마감 전에 저장됐을 수 있으므로 revisable=True로 반영한다.
+        """
+        query = f"SELECT date_str, ticker, open, high, low, close, volume FROM {table}"
+        params = ()
+        if tickers:
+            query += f" WHERE ticker IN ({', '.join('?' * len(tickers))})"
+            params = tuple(tickers)
+        query += " ORDER BY ticker, date_str"
+
+        count = 0
+        previous = None
+        for row in conn.execute(query, params):
+            # 한 행 늦게 반영해서 티커의 마지막 행인지 알 수 있게 함
+            if previous is not None:
+                self._seed(previous, revisable=previous[1] != row[1])
+            previous = row
+            count += 1
+        if previous is not None:
+            self._seed(previous, revisable=True)
+        print(f"지표 상태 초기화 완료 - {len(self.states)}개 티커, {count}개 캔들")
+        return count
+
+    def _seed(self, row, revisable=False):
+        date_str, ticker, open_, high, low, close, volume = row
+        self.state(ticker).update({
+            "date_str": date_str, "open": open_, "high": high,
+            "low": low, "close": close, "volume": volume,
+        }, revisable=revisable)
@@ -0,0 +1,124 @@
+"""
+project.UpbitDataCollector 여러 티커 조회 테스트 (가짜 pyupbit 주입)
+
+실행: python -m pytest week2/day5/test_project.py
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import project
+from project import UpbitDataCollector
+from rate_limit import TokenBucket
+
+TICKERS = [f"KRW-T{i:02d}" for i in range(12)]
+
+
+class TooManyRequests(Exception):
+    """pyupbit.errors.TooManyRequests와 같은 이름 (rate_limit.is_rate_limited가 이름으로 판별)"""
+
+
+class FakeUpbit:
+    """pyupbit 대신 주입하는 가짜 API (티커별로 정해진 캔들, failures[티커]번 429 후 성공)"""
+
+    def __init__(self, failures=None):
+        self.failures = dict(failures or {})
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_ohlcv(self, ticker, interval="day", count=200, to=None):
+        with self._lock:
+            self.calls.append((ticker, time.monotonic()))
+            if self.failures.get(ticker, 0) > 0:
+                self.failures[ticker] -= 1
+                raise TooManyRequests("429 Too Many Requests")
+        seed = int(ticker[-2:])
+        rng = np.random.default_rng(seed)
+        close = 1000 + seed + np.cumsum(rng.normal(0, 5, count))
+        return pd.DataFrame({
+            "open": close - 1, "high": close + 2, "low": close - 2, "close": close,
+            "volume": rng.uniform(1, 10, count), "value": close * 10,
+        }, index=pd.date_range("2024-01-01 09:00", periods=count, freq="D"))
+
+
+def _no_backoff(monkeypatch):
+    """백오프 대기 없이 호출된 attempt만 기록"""
+    attempts = []
+
+    def backoff(attempt):
+        attempts.append(attempt)
+        return 0.0
+
+    monkeypatch.setattr(project, "backoff_delay", backoff)
+    return attempts
+
+
+def test_rate_limited_requests_are_retried_with_backoff(monkeypatch):
+    attempts = _no_backoff(monkeypatch)
+    api = FakeUpbit({"KRW-T00": 2, "KRW-T01": 10})
+    collector = UpbitDataCollector(api=api, rate_limiter=TokenBucket(rate=1000))
+
+    ok = collector._fetch_ohlcv_with_retry("KRW-T00", "day", 30, max_retries=3)
+    assert len(ok) == 30
+    assert attempts == [0, 1]
+
+    attempts.clear()
+    failed = collector._fetch_ohlcv_with_retry("KRW-T01", "day", 30, max_retries=3)
+    assert failed is None
+    assert attempts == [0, 1, 2]
+    assert sum(1 for ticker, _ in api.calls if ticker == "KRW-T01") == 4
+
+
+def test_progress_callback_once_per_ticker(monkeypatch):
+    _no_backoff(monkeypatch)
+    collector = UpbitDataCollector(api=FakeUpbit({"KRW-T03": 10}), rate_limiter=TokenBucket(rate=1000))
+    progress = []
+
+    df = collector.get_multiple_ohlcv(TICKERS, count=10, concurrent=True, max_workers=4, max_retries=1,
+                                      progress_callback=lambda *args: progress.append(args))
+
+    assert sorted(ticker for _, _, ticker, _ in progress) == TICKERS
+    assert [done for done, _, _, _ in progress] == list(range(1, len(TICKERS) + 1))
+    assert all(total == len(TICKERS) for _, total, _, _ in progress)
+    assert {ticker for _, _, ticker, ok in progress if not ok} == {"KRW-T03"}
+    assert set(df["ticker"]) == set(TICKERS) - {"KRW-T03"}
+
+
+def test_token_bucket_caps_request_rate():
+    rate = 20
+    api = FakeUpbit()
+    collector = UpbitDataCollector(api=api, rate_limiter=TokenBucket(rate=rate, capacity=1))
+
+    collector.get_multiple_ohlcv(TICKERS, count=10, concurrent=True, max_workers=8)
+
+    times = sorted(t for _, t in api.calls)
+    assert len(times) == len(TICKERS)
+    for k in range(1, len(times)):
+        # 버킷 용량이 1이므로 k번째 요청은 첫 요청보다 k/rate초 이후
+        assert times[k] - times[0] >= k / rate * 0.9
+
+
+def test_concurrent_matches_sequential():
+    sequential = UpbitDataCollector(api=FakeUpbit()).get_multiple_ohlcv(TICKERS, count=30, delay=0)
+    concurrent = UpbitDataCollector(api=FakeUpbit(), rate_limiter=TokenBucket(rate=1000)).get_multiple_ohlcv(
+        TICKERS, count=30, concurrent=True, max_workers=8)
+
+    assert len(sequential) == len(TICKERS) * 30
+    pdt.assert_frame_equal(concurrent, sequential)
+
+
+def test_throughput_is_reported(capsys):
+    collector = UpbitDataCollector(api=FakeUpbit(), rate_limiter=TokenBucket(rate=1000))
+
+    collector.get_multiple_ohlcv(TICKERS, count=10, concurrent=True)
+
+    assert collector.last_throughput > 0
+    assert f"{len(TICKERS)}/{len(TICKERS)}개 티커 수집 완료" in capsys.readouterr().out
@@ -0,0 +1,124 @@
+"""
+realtime.RealtimeIngestor 테스트 (로컬 가짜 WebSocket 서버)
+
+가짜 서버는 구독 메시지를 받으면 준비한 체결 메시지를 한 번에 보내고 연결을 유지한다.
+실행: python -m pytest week2/day5/test_realtime.py
+"""
+
+import asyncio
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from realtime import RealtimeIngestor
+
+TICKER = "KRW-BTC"
+# 2024-01-01 00:00:00 UTC = 2024-01-01 09:00:00 KST
+BASE_MS = 1_704_067_200_000
+
+
+def trade(price, volume, offset_seconds, ticker=TICKER)->dict:
+    return {"type": "trade", "code": ticker, "trade_price": price, "trade_volume": volume,
+            "trade_timestamp": BASE_MS + int(offset_seconds * 1000)}
+
+
+async def _serve_and_run(ingestor, messages, done, timeout=10.0):
+    """가짜 서버에 ingestor를 연결하고 done(stats)이 참이 되면 stop_event로 멈춤"""
+    subscriptions = []
+
+    async def handler(ws):
+        subscriptions.append(json.loads(await ws.recv()))
+        for message in messages:
+            await ws.send(json.dumps(message))
+        await ws.wait_closed()
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        ingestor.url = f"ws://127.0.0.1:{port}"
+        stop_event = asyncio.Event()
+        run = asyncio.create_task(ingestor.run(stop_event))
+        deadline = time.monotonic() + timeout
+        while not done(ingestor.stats) and time.monotonic() < deadline and not run.done():
+            await asyncio.sleep(0.01)
+        stop_event.set()
+        stats = await asyncio.wait_for(run, timeout)
+    return stats, subscriptions
+
+
+def _stored(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT date_str, ticker, open, high, low, close, volume FROM crypto_ohlcv_minute1 ORDER BY date_str"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _slow_writes(ingestor, seconds=0.02):
+    """저장을 느리게 해서 소비가 밀리도록 (큐가 차는 상황 재현)"""
+    write = ingestor._write
+
+    def slow(rows):
+        time.sleep(seconds)
+        return write(rows)
+
+    ingestor._write = slow
+
+
+def test_minute_bars_are_upserted(tmp_path):
+    messages = [
+        trade(100.0, 1.0, 0), trade(105.0, 2.0, 10), trade(95.0, 1.5, 30), trade(102.0, 0.5, 59.999),
+        trade(103.0, 1.0, 60), trade(101.0, 1.0, 90),
+        trade(110.0, 0.25, 120.5),
+    ]
+    db_path = str(tmp_path / "crypto.db")
+    ingestor = RealtimeIngestor([TICKER], db_path=db_path, flush_interval=0.05)
+
+    stats, subscriptions = asyncio.run(_serve_and_run(ingestor, messages, lambda s: s["written"] >= 3))
+
+    assert subscriptions[0][1] == {"type": "trade", "codes": [TICKER], "isOnlyRealtime": True}
+    assert stats["messages"] == len(messages)
+    assert stats["dropped"] == 0
+    assert _stored(db_path) == [
+        ("2024-01-01 09:00:00", TICKER, 100.0, 105.0, 95.0, 102.0, 5.0),
+        ("2024-01-01 09:01:00", TICKER, 103.0, 103.0, 101.0, 101.0, 2.0),
+        ("2024-01-01 09:02:00", TICKER, 110.0, 110.0, 110.0, 110.0, 0.25),
+    ]
+
+
+def test_block_mode_keeps_every_message(tmp_path):
+    # 체결마다 다른 분이라 체결 1건 = 분봉 1개
+    messages = [trade(100.0 + i, 1.0, 60 * i) for i in range(200)]
+    db_path = str(tmp_path / "crypto.db")
+    ingestor = RealtimeIngestor([TICKER], db_path=db_path, queue_size=2, overflow="block",
+                                batch_size=1, flush_interval=0.05, rollups=())
+    _slow_writes(ingestor, 0.002)
+
+    stats, _ = asyncio.run(_serve_and_run(ingestor, messages, lambda s: s["written"] >= len(messages)))
+
+    assert stats["messages"] == len(messages)
+    assert stats["dropped"] == 0
+    assert [row[5] for row in _stored(db_path)] == [100.0 + i for i in range(200)]
+
+
+def test_drop_mode_counts_dropped_messages(tmp_path):
+    messages = [trade(100.0 + i, 1.0, 60 * i) for i in range(200)]
+    db_path = str(tmp_path / "crypto.db")
+    ingestor = RealtimeIngestor([TICKER], db_path=db_path, queue_size=1, overflow="drop",
+                                batch_size=1, flush_interval=0.05, rollups=())
+    _slow_writes(ingestor)
+
+    stats, _ = asyncio.run(_serve_and_run(
+        ingestor, messages, lambda s: s["written"] + s["dropped"] >= len(messages)))
+
+    stored = _stored(db_path)
+    assert stats["messages"] == len(messages)
+    assert stats["dropped"] > 0
+    assert len(stored) == stats["written"] == len(messages) - stats["dropped"]
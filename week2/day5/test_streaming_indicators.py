@@ -0,0 +1,88 @@
+"""
+streaming_indicators.StreamingIndicators 테스트 (배치 엔진 compute_indicators와 비교)
+
+실행: python -m pytest week2/day5/test_streaming_indicators.py
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from indicators import compute_indicators, format_date_str, make_sample_ohlcv
+from storage import create_ohlcv_table
+from streaming_indicators import StreamingIndicators
+
+INDICATORS = ("ma5", "ema12", "rsi14", "bb20", "atr14", "vwap", "vwap10")
+COLUMNS = ["ma5", "ema12", "rsi14", "bb20_mid", "bb20_upper", "bb20_lower", "atr14", "vwap", "vwap10"]
+
+
+def _candle(row)->dict:
+    return {"date_str": row["date_str"], "open": row["open"], "high": row["high"],
+            "low": row["low"], "close": row["close"], "volume": row["volume"]}
+
+
+def _store(conn, df):
+    create_ohlcv_table(conn)
+    conn.executemany(
+        "INSERT INTO crypto_ohlcv (date_str, ticker, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        df[["date_str", "ticker", "open", "high", "low", "close", "volume"]].itertuples(index=False, name=None))
+
+
+def _expected(df):
+    return compute_indicators(df, ("ma5",) + INDICATORS).iloc[-1]
+
+
+def _assert_matches(row, expected):
+    for column in COLUMNS:
+        assert np.isclose(row[column], expected[column], rtol=1e-9, equal_nan=True), column
+
+
+def test_partial_last_candle_is_replaced_after_seed():
+    df = make_sample_ohlcv(n_tickers=1, n_candles=60)[0]
+    df["date_str"] = format_date_str(df["date"])
+    final = df.iloc[-2].copy()
+    # 저장소에는 마지막에서 두 번째 캔들이 마감 전 값으로 남아 있음
+    partial = df.iloc[:-1].copy()
+    partial.loc[partial.index[-1], ["high", "close", "volume"]] = [final["high"] * 1.01, final["close"] * 1.01, 1.0]
+
+    conn = sqlite3.connect(":memory:")
+    _store(conn, partial)
+    streaming = StreamingIndicators(INDICATORS)
+    streaming.seed_from_database(conn)
+    ticker = final["ticker"]
+
+    # 마감 전 값 미리보기는 상태를 바꾸지 않음
+    preview = streaming.update(ticker, _candle(partial.iloc[-1]), closed=False)
+    _assert_matches(preview, _expected(partial))
+
+    row = streaming.update(ticker, _candle(final))
+    assert row is not None
+    _assert_matches(row, _expected(df.iloc[:-1]))
+    # 마감된 값으로 바꾼 뒤에는 같은 캔들을 다시 반영하지 않음
+    assert streaming.update(ticker, _candle(final)) is None
+
+    row = streaming.update(ticker, _candle(df.iloc[-1]))
+    _assert_matches(row, _expected(df))
+    assert streaming.states[ticker].count == len(df)
+
+
+def test_closed_last_candle_is_kept_after_seed():
+    df = make_sample_ohlcv(n_tickers=2, n_candles=40)
+    df = pd.concat(df, ignore_index=True)
+    df["date_str"] = format_date_str(df["date"])
+    stored = df.groupby("ticker").head(39)
+
+    conn = sqlite3.connect(":memory:")
+    _store(conn, stored)
+    streaming = StreamingIndicators(INDICATORS)
+    assert streaming.seed_from_database(conn) == len(stored)
+
+    # 저장된 마지막 캔들이 이미 마감된 값이면 다음 캔들이 바로 이어짐
+    for ticker, group in df.groupby("ticker"):
+        row = streaming.update(ticker, _candle(group.iloc[-1]))
+        _assert_matches(row, _expected(group))